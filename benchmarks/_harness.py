@@ -0,0 +1,94 @@
+import asyncio
+import socket
+from typing import Any, Optional
+
+from nimbus.applications import NimbusApp
+from nimbus.connections import create_connection
+from nimbus.types import Scope
+
+
+def make_scope(
+    path: str = "/",
+    method: str = "GET",
+    headers: Optional[list[tuple[bytes, bytes]]] = None,
+    query_string: bytes = b"",
+) -> Scope:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.1"},
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "headers": headers or [(b"host", b"localhost")],
+        "server": ("127.0.0.1", 8000),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+async def _discard(event: dict[str, Any]) -> None:
+    return None
+
+
+def _make_receive(body: bytes):
+    async def receive(n: int) -> bytes:
+        return body
+
+    return receive
+
+
+async def dispatch(app: NimbusApp, scope: Scope, body: bytes = b""):
+    connection = create_connection(scope, _make_receive(body), _discard)
+    response = await app(connection)
+    return connection, response
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class MemoryWriter:
+    """Minimal asyncio.StreamWriter stand-in that records what is written."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.chunks.append(data)
+
+    def writelines(self, data) -> None:
+        self.chunks.extend(data)
+
+    async def drain(self) -> None:
+        return None
+
+    def get_extra_info(self, name: str, default=None):
+        return default
+
+    def is_closing(self) -> bool:
+        return False
+
+
+def memory_reader(raw: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(raw)
+    reader.feed_eof()
+    return reader
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(port: int) -> None:
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.05)
+        else:
+            writer.close()
+            return
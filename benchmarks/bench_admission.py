@@ -0,0 +1,129 @@
+"""Latency under 2x overload, with and without an ``AdmissionController``.
+
+The server process fronts a simulated downstream that handles ``WORKERS``
+requests at a time in ``SERVICE_TIME`` each (about 200 req/s). An
+open-loop client sends requests at twice that rate for ``DURATION``
+seconds, plus one ``/health`` probe every 50 ms, and reports p50/p99 of
+successful requests, goodput (200s answered within one second), the 503
+rate and the health-check p99.
+
+Run with ``python -m benchmarks.bench_admission``.
+"""
+
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.admission import AdmissionController, PriorityClass
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+WORKERS = 4
+SERVICE_TIME = 0.02
+CAPACITY = WORKERS / SERVICE_TIME
+DURATION = 10.0
+CLIENT_TIMEOUT = 10.0
+
+
+def serve(port: int, admission: bool) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+    downstream = asyncio.Semaphore(WORKERS)
+
+    @app.get("/work")
+    async def work(connection):
+        async with downstream:
+            await asyncio.sleep(SERVICE_TIME)
+        return HttpResponse("ok")
+
+    @app.get("/health")
+    async def health(connection):
+        return HttpResponse("ok")
+
+    controller = None
+    if admission:
+        controller = AdmissionController(
+            [
+                PriorityClass("health", ("/health",), timeout=1.0),
+                PriorityClass("default", timeout=0.25),
+            ]
+        )
+    NimbusServer(app, port=port, backlog=4096, admission=controller).run()
+
+
+async def fetch(port: int, path: str) -> tuple[int, float]:
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(CLIENT_TIMEOUT):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+        status = int(response.split(b" ", 2)[1])
+    except (TimeoutError, OSError, IndexError, ValueError):
+        status = 0
+    return status, time.perf_counter() - started
+
+
+async def load(port: int) -> tuple[list, list]:
+    work: list[asyncio.Task] = []
+    health: list[asyncio.Task] = []
+    interval = 1 / (2 * CAPACITY)
+    start = time.perf_counter()
+    sent = 0
+    while (now := time.perf_counter() - start) < DURATION:
+        while sent * interval <= now:
+            work.append(asyncio.create_task(fetch(port, "/work")))
+            if sent % int(0.05 / interval) == 0:
+                health.append(asyncio.create_task(fetch(port, "/health")))
+            sent += 1
+        await asyncio.sleep(interval / 2)
+    return await asyncio.gather(*work), await asyncio.gather(*health)
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+    return statistics.quantiles(values, n=100)[p - 1]
+
+
+def main() -> None:
+    print(
+        f"capacity ~{CAPACITY:.0f} req/s, offered {2 * CAPACITY:.0f} req/s "
+        f"for {DURATION:.0f} s"
+    )
+    for admission in (False, True):
+        port = free_port()
+        server = multiprocessing.Process(target=serve, args=(port, admission))
+        server.start()
+        try:
+            asyncio.run(wait_for_server(port))
+            work, health = asyncio.run(load(port))
+        finally:
+            server.terminate()
+            server.join()
+        ok = [latency for status, latency in work if status == 200]
+        rejected = [latency for status, latency in work if status == 503]
+        failed = len(work) - len(ok) - len(rejected)
+        health_ok = [latency for status, latency in health if status == 200]
+        print(
+            f"admission {'on ' if admission else 'off'}: "
+            f"200 p50 {percentile(ok, 50) * 1e3:7.1f} ms  "
+            f"p99 {percentile(ok, 99) * 1e3:7.1f} ms  "
+            f"goodput {sum(t < 1 for t in ok) / DURATION:5.0f}/s  "
+            f"503 {len(rejected) / len(work):5.1%} "
+            f"(p99 {percentile(rejected, 99) * 1e3:5.1f} ms)  "
+            f"failed {failed:5d}  "
+            f"health p99 {percentile(health_ok, 99) * 1e3:7.1f} ms "
+            f"({len(health_ok)}/{len(health)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
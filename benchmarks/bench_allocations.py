@@ -0,0 +1,85 @@
+"""Per-request allocation footprint of connection and response objects.
+
+Run with ``python -m benchmarks.bench_allocations``.
+"""
+
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse, JsonResponse
+
+from ._harness import dispatch, make_scope
+
+REQUESTS = 10_000
+
+
+def build_app() -> NimbusApp:
+    app = NimbusApp()
+
+    @app.get("/")
+    async def index(connection):
+        return HttpResponse("hello", headers={"content-type": "text/plain"})
+
+    @app.get("/json")
+    async def json_route(connection):
+        connection.query_params
+        return JsonResponse({"ok": True})
+
+    return app
+
+
+async def retained(app: NimbusApp, path: str) -> tuple[float, float]:
+    scope_headers = [(b"host", b"localhost"), (b"cookie", b"a=1")]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = []
+    for _ in range(REQUESTS):
+        kept.append(await dispatch(app, make_scope(path, headers=scope_headers)))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / REQUESTS, size / REQUESTS
+
+
+async def peak(app: NimbusApp, path: str) -> float:
+    gc.collect()
+    tracemalloc.start()
+    await dispatch(app, make_scope(path))
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    await dispatch(app, make_scope(path))
+    _, high = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(high - base)
+
+
+async def throughput(app: NimbusApp, path: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await dispatch(app, make_scope(path))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    app = build_app()
+    for path in ("/", "/json"):
+        blocks, size = await retained(app, path)
+        high = await peak(app, path)
+        rps = await throughput(app, path)
+        print(
+            f"{path:<6} retained: {blocks:6.1f} blocks/req {size:8.1f} B/req | "
+            f"peak transient: {high:8.0f} B | {rps:10.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main())
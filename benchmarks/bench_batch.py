@@ -0,0 +1,132 @@
+"""Fetching ``FANOUT`` resources one request each vs. in one batch.
+
+A server process serves ``GET /items/<id>``, which waits ``WORK_MS`` (a
+stand-in for a database call) and returns a small JSON document, and
+mounts a ``BatchRouter`` at ``/batch``. The client fetches ``FANOUT``
+items ``ROUNDS`` times three ways: one connection per item with at most
+``BROWSER_CONNECTIONS`` in flight (what a browser does against an
+HTTP/1.1 origin), the same with every request in flight at once, and a
+single ``POST /batch``. It reports the median and p90 time to have every
+item, and the time to the first item for the batch.
+
+Run with ``python -m benchmarks.bench_batch``.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.batch import BatchRouter
+from nimbus.response import JsonResponse
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+FANOUT = 20
+ROUNDS = 100
+WORK_MS = 5
+BROWSER_CONNECTIONS = 6
+
+
+def serve(port: int) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+    app.mount("/batch", BatchRouter(max_concurrency=FANOUT))
+
+    @app.get("/items/<int:item_id>")
+    async def item(connection, item_id):
+        await asyncio.sleep(WORK_MS / 1000)
+        return JsonResponse({"id": item_id, "name": f"item {item_id}"})
+
+    NimbusServer(app, port=port, backlog=1024).run()
+
+
+async def fetch(port: int, raw: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    response = await reader.read()
+    writer.close()
+    assert response.startswith(b"HTTP/1.1 200"), response[:80]
+    return response
+
+
+async def separate(port: int, connections: int) -> tuple[float, float]:
+    slots = asyncio.Semaphore(connections)
+
+    async def one(i: int) -> None:
+        async with slots:
+            await fetch(port, f"GET /items/{i} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(FANOUT)))
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+
+async def batched(port: int) -> tuple[float, float]:
+    body = json.dumps([{"path": f"/items/{i}"} for i in range(FANOUT)]).encode()
+    raw = (
+        b"POST /batch HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+        b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+    )
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200"), head[:80]
+    first = None
+    data = b""
+    while chunk := await reader.read(65536):
+        if first is None and b"index" in chunk:
+            first = time.perf_counter() - started
+        data += chunk
+    writer.close()
+    elapsed = time.perf_counter() - started
+    assert data.count(b'"status": 200') == FANOUT
+    return first or elapsed, elapsed
+
+
+def summary(samples: list[float]) -> str:
+    ms = sorted(s * 1e3 for s in samples)
+    return f"p50 {statistics.median(ms):6.2f} ms  p90 {ms[int(len(ms) * 0.9)]:6.2f} ms"
+
+
+async def run(port: int) -> None:
+    modes = {
+        f"{FANOUT} requests, {BROWSER_CONNECTIONS} connections": lambda: separate(
+            port, BROWSER_CONNECTIONS
+        ),
+        f"{FANOUT} requests, {FANOUT} connections": lambda: separate(port, FANOUT),
+        "1 batch request": lambda: batched(port),
+    }
+    for label, mode in modes.items():
+        await mode()  # warm up
+        firsts, totals = [], []
+        for _ in range(ROUNDS):
+            first, total = await mode()
+            firsts.append(first)
+            totals.append(total)
+        print(f"{label:<28} all items: {summary(totals)}")
+        if label.startswith("1 batch"):
+            print(f"{'':<28} first item: {summary(firsts)}")
+
+
+def main() -> None:
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(port,))
+    server.start()
+    try:
+        asyncio.run(wait_for_server(port))
+        asyncio.run(run(port))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
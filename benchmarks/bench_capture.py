@@ -0,0 +1,141 @@
+"""Cost of ``TrafficCapture`` and a replay of what it recorded.
+
+A server process serves a small mixed workload: a cheap ``GET /``, a
+``GET /items/<id>`` with a query string and an auth header, and a
+``POST /upload`` with a 1-16 KiB body. The client sends ``REQUESTS`` of
+them with ``CONCURRENCY`` in flight, once without capture and once
+capturing every request, and reports the throughput of each plus the
+capture file size per request. The capture is then replayed against a
+fresh server at half the recorded rate and at full speed with
+``nimbus.server.replay``.
+
+Run with ``python -m benchmarks.bench_capture``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse, JsonResponse
+from nimbus.server.capture import TrafficCapture, read_capture
+from nimbus.server.replay import replay
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+REQUESTS = 3_000
+CONCURRENCY = 16
+
+
+def serve(port: int, capture_path: Optional[str]) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+
+    @app.get("/")
+    async def index(connection):
+        return HttpResponse("ok")
+
+    @app.get("/items/<item_id>")
+    async def item(connection, item_id):
+        return JsonResponse({"id": item_id, "page": connection.query_params})
+
+    @app.post("/upload")
+    async def upload(connection):
+        return JsonResponse({"size": len(await connection.get_body())})
+
+    capture = TrafficCapture(capture_path) if capture_path else None
+    NimbusServer(app, port=port, backlog=1024, capture=capture).run()
+
+
+def workload() -> list[bytes]:
+    rng = random.Random(42)
+    requests = []
+    for i in range(REQUESTS):
+        kind = rng.random()
+        if kind < 0.5:
+            requests.append(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        elif kind < 0.85:
+            requests.append(
+                f"GET /items/{i}?page={i % 7} HTTP/1.1\r\nHost: localhost\r\n"
+                "Authorization: Bearer abc\r\nAccept: application/json\r\n\r\n".encode()
+            )
+        else:
+            body = os.urandom(rng.randint(1024, 16384))
+            requests.append(
+                b"POST /upload HTTP/1.1\r\nHost: localhost\r\n"
+                b"Content-Type: application/octet-stream\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+            )
+    return requests
+
+
+async def drive(port: int, requests: list[bytes]) -> float:
+    queue = list(reversed(requests))
+
+    async def client():
+        while queue:
+            raw = queue.pop()
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            response = await reader.read()
+            writer.close()
+            assert response.startswith(b"HTTP/1.1 200"), response[:80]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONCURRENCY)))
+    return len(requests) / (time.perf_counter() - started)
+
+
+def run_server(port: int, capture_path: Optional[str]) -> multiprocessing.Process:
+    server = multiprocessing.Process(target=serve, args=(port, capture_path))
+    server.start()
+    asyncio.run(wait_for_server(port))
+    return server
+
+
+def main() -> None:
+    requests = workload()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "capture.bin")
+        for capture_path in (None, path):
+            port = free_port()
+            server = run_server(port, capture_path)
+            try:
+                rps = asyncio.run(drive(port, requests))
+            finally:
+                server.terminate()  # SIGTERM: the capture is flushed on shutdown
+                server.join()
+            label = "capture on " if capture_path else "capture off"
+            print(f"{label}: {rps:7.0f} req/s")
+
+        captured = list(read_capture(path))
+        wire = sum(len(raw) for raw in requests)
+        size = os.path.getsize(path)
+        print(
+            f"{len(captured)} requests captured, {size / len(captured):.0f} B per "
+            f"request ({size / wire:.2f}x the bytes on the wire)"
+        )
+
+        for speed in (0.5, None):
+            port = free_port()
+            server = run_server(port, None)
+            try:
+                report = asyncio.run(
+                    replay(captured, port=port, speed=speed, connections=CONCURRENCY)
+                )
+            finally:
+                server.terminate()
+                server.join()
+            print(f"\nreplay at {'max' if speed is None else f'{speed:g}x'} speed")
+            print(report.format())
+
+
+if __name__ == "__main__":
+    main()
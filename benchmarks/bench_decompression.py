@@ -0,0 +1,109 @@
+"""Ingest throughput for compressed JSON batch uploads.
+
+Each request carries a ~1 MB JSON batch, read through ``get_parsed_body``
+(buffered) or ``stream_body`` (64 KiB chunks, decoded incrementally). The
+body arrives in 64 KiB reads like it would from a socket. Throughput is
+reported in decoded megabytes per second and requests per second.
+
+Run with ``python -m benchmarks.bench_decompression``.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+import zlib
+from typing import Callable
+
+from nimbus.connections import HttpConnection
+from nimbus.server.decompression import supported_encodings
+
+from ._harness import _discard, make_scope
+
+REQUESTS = 30
+READ_SIZE = 65536
+BATCH = json.dumps(
+    [
+        {"id": i, "user": f"user-{i % 977}", "score": i * 0.37, "tags": ["a", "b"]}
+        for i in range(16000)
+    ]
+).encode()
+
+
+def compressors() -> dict[str, Callable[[bytes], bytes]]:
+    codecs: dict[str, Callable[[bytes], bytes]] = {
+        "identity": lambda data: data,
+        "gzip": gzip.compress,
+        "deflate": zlib.compress,
+    }
+    if "br" in supported_encodings():
+        import brotli
+
+        codecs["br"] = brotli.compress
+    if "zstd" in supported_encodings():
+        import zstandard
+
+        codecs["zstd"] = zstandard.ZstdCompressor().compress
+    return codecs
+
+
+def make_connection(encoding: str, body: bytes) -> HttpConnection:
+    view = memoryview(body)
+    position = 0
+
+    async def receive(n: int) -> bytes:
+        nonlocal position
+        chunk = bytes(view[position : position + min(n, READ_SIZE)])
+        position += len(chunk)
+        return chunk
+
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if encoding != "identity":
+        headers.append((b"content-encoding", encoding.encode()))
+    scope = make_scope("/ingest", method="POST", headers=headers)
+    return HttpConnection(scope, receive, _discard)
+
+
+async def buffered(encoding: str, body: bytes) -> None:
+    connection = make_connection(encoding, body)
+    if encoding == "identity":
+        # get_body() would read content-length in one call; mirror a socket.
+        data = b"".join([chunk async for chunk in connection.stream_body()])
+        json.loads(data)
+    else:
+        await connection.get_parsed_body()
+
+
+async def streamed(encoding: str, body: bytes) -> None:
+    connection = make_connection(encoding, body)
+    decoded = 0
+    async for chunk in connection.stream_body(READ_SIZE):
+        decoded += len(chunk)
+    assert decoded == len(BATCH)
+
+
+async def measure(mode, encoding: str, body: bytes) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await mode(encoding, body)
+    elapsed = time.perf_counter() - start
+    return REQUESTS / elapsed, REQUESTS * len(BATCH) / elapsed / 1e6
+
+
+async def main() -> None:
+    print(f"batch {len(BATCH) / 1e6:.2f} MB decoded, {REQUESTS} requests per row")
+    for encoding, compress in compressors().items():
+        body = compress(BATCH)
+        for name, mode in (("parse", buffered), ("stream", streamed)):
+            rps, mbps = await measure(mode, encoding, body)
+            print(
+                f"{encoding:>8} {name:>6}: {len(body) / 1e3:8.1f} kB on the wire"
+                f"  {rps:7.1f} req/s  {mbps:7.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
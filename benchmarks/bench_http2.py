@@ -0,0 +1,112 @@
+"""HTTP/2 multiplexed streams vs HTTP/1.1 connections against a local server.
+
+The HTTP/1.1 side opens one connection per request, which is what
+NimbusServer serves today. Requires the optional ``h2`` package.
+
+Run with ``python -m benchmarks.bench_http2``.
+"""
+
+import asyncio
+import multiprocessing
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+
+
+def build_app() -> NimbusApp:
+    app = NimbusApp()
+
+    @app.get("/")
+    async def index(connection):
+        return HttpResponse("hello", headers={"content-type": "text/plain"})
+
+    return app
+
+
+async def http11(port: int) -> float:
+    remaining = iter(range(REQUESTS))
+
+    async def worker():
+        for _ in remaining:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await reader.read()
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def http2(port: int) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    client = h2.connection.H2Connection(h2.config.H2Configuration(client_side=True))
+    client.initiate_connection()
+    headers = [
+        (":method", "GET"),
+        (":path", "/"),
+        (":scheme", "http"),
+        (":authority", "localhost"),
+    ]
+    next_stream = 1
+    in_flight = 0
+    completed = 0
+
+    start = time.perf_counter()
+    while completed < REQUESTS:
+        while in_flight < CONCURRENCY and next_stream < 2 * REQUESTS:
+            client.send_headers(next_stream, headers, end_stream=True)
+            next_stream += 2
+            in_flight += 1
+        writer.write(client.data_to_send())
+        for event in client.receive_data(await reader.read(65536)):
+            if isinstance(event, h2.events.DataReceived):
+                client.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                in_flight -= 1
+                completed += 1
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return REQUESTS / elapsed
+
+
+def serve(port: int) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    NimbusServer(build_app(), port=port, http2=True).run()
+
+
+async def main() -> None:
+    # The server runs in its own process so client-side framing cost does
+    # not count against it.
+    port = free_port()
+    process = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    process.start()
+    try:
+        await wait_for_server(port)
+        print(f"HTTP/1.1, connection per request: {await http11(port):8.0f} req/s")
+        print(
+            f"HTTP/2, one connection, {CONCURRENCY} streams: "
+            f"{await http2(port):8.0f} req/s"
+        )
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
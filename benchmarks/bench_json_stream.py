@@ -0,0 +1,103 @@
+"""Million-row JSON exports: ``JsonResponse`` vs ``JsonStreamingResponse``.
+
+Each variant runs in a fresh server process. ``JsonResponse`` builds the
+full list and serializes it in one ``json.dumps``; the streaming variants
+serialize rows from a generator as NDJSON or a JSON array. The client
+reports time to the first body byte, total transfer time and the server's
+peak RSS (``ru_maxrss``), next to its RSS before the export.
+
+Run with ``python -m benchmarks.bench_json_stream``.
+"""
+
+import asyncio
+import multiprocessing
+import resource
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse, JsonResponse, JsonStreamingResponse
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+ROWS = 1_000_000
+
+
+def rows():
+    for i in range(ROWS):
+        yield {
+            "id": i,
+            "name": f"customer-{i}",
+            "email": f"customer-{i}@example.com",
+            "balance": i * 0.25,
+            "active": i % 3 != 0,
+        }
+
+
+def serve(port: int, variant: str) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+
+    @app.get("/export")
+    async def export(connection):
+        if variant == "JsonResponse":
+            return JsonResponse(list(rows()))
+        return JsonStreamingResponse(rows(), format=variant)
+
+    @app.get("/rss")
+    async def rss(connection):
+        return HttpResponse(str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+    NimbusServer(app, port=port).run()
+
+
+async def export(port: int) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /export HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await reader.readuntil(b"\r\n\r\n")
+    size = len(await reader.read(65536))
+    first_byte = time.perf_counter() - started
+    while chunk := await reader.read(1 << 20):
+        size += len(chunk)
+    writer.close()
+    return first_byte, time.perf_counter() - started, size
+
+
+async def peak_rss(port: int) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /rss HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    return int(response.rsplit(b"\r\n\r\n", 1)[1])
+
+
+async def measure(port: int) -> tuple[float, float, int, int, int]:
+    await wait_for_server(port)
+    idle = await peak_rss(port)
+    first_byte, total, size = await export(port)
+    return first_byte, total, size, idle, await peak_rss(port)
+
+
+def main() -> None:
+    print(f"{ROWS} rows")
+    for variant in ("JsonResponse", "ndjson", "array"):
+        port = free_port()
+        server = multiprocessing.Process(target=serve, args=(port, variant))
+        server.start()
+        try:
+            first_byte, total, size, idle, peak = asyncio.run(measure(port))
+        finally:
+            server.terminate()
+            server.join()
+        print(
+            f"{variant:>12}: first byte {first_byte * 1e3:8.1f} ms  "
+            f"total {total:6.2f} s  {size / 1e6:6.1f} MB  "
+            f"peak RSS {peak / 1024:6.1f} MB (idle {idle / 1024:5.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cost and effect of ``nimbus.memoize`` on an async lookup.
+
+``lookup`` stands in for a feature-flag or profile fetch: it takes
+``BACKEND_MS`` and can serve ``BACKEND_CONCURRENCY`` calls at once. Three
+in-process scenarios, no sockets:
+
+- the cost of a cache hit against awaiting a coroutine that returns at
+  once;
+- ``REQUESTS`` requests, ``CONCURRENCY`` at a time, each looking up a key
+  drawn from a Zipf-like distribution over ``KEYS`` keys, uncached and
+  memoized with a 1 s TTL;
+- a cold burst of ``BURST`` concurrent lookups of one key.
+
+Run with ``python -m benchmarks.bench_memoize``.
+"""
+
+import asyncio
+import random
+import time
+
+from nimbus.memoize import memoize
+
+BACKEND_MS = 2
+BACKEND_CONCURRENCY = 16
+REQUESTS = 5_000
+CONCURRENCY = 64
+KEYS = 200
+BURST = 500
+HIT_LOOPS = 200_000
+
+
+class Backend:
+    def __init__(self):
+        self.calls = 0
+        self.slots = asyncio.Semaphore(BACKEND_CONCURRENCY)
+
+    async def lookup(self, key: int) -> dict:
+        self.calls += 1
+        async with self.slots:
+            await asyncio.sleep(BACKEND_MS / 1000)
+        return {"key": key, "enabled": key % 2 == 0}
+
+
+async def hit_cost() -> None:
+    async def plain(key):
+        return key
+
+    cached = memoize(plain)
+    await cached(1)
+    for label, func in (("plain coroutine", plain), ("memoized hit", cached)):
+        started = time.perf_counter()
+        for _ in range(HIT_LOOPS):
+            await func(1)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<16} {elapsed / HIT_LOOPS * 1e6:6.2f} us per call")
+
+
+async def workload(cache: bool) -> None:
+    backend = Backend()
+    lookup = memoize(backend.lookup, ttl=1.0) if cache else backend.lookup
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(KEYS)]
+    keys = rng.choices(range(KEYS), weights, k=REQUESTS)
+    latencies = []
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(key: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            await lookup(key)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(k) for k in keys))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(
+        f"{'memoized' if cache else 'uncached':<9} {REQUESTS / elapsed:8.0f} req/s  "
+        f"p50 {latencies[len(latencies) // 2] * 1e3:6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.2f} ms  "
+        f"backend calls {backend.calls}"
+    )
+    if cache:
+        stats = lookup.stats()
+        print(
+            f"{'':<9} hits {stats.hits}, misses {stats.misses}, "
+            f"coalesced {stats.coalesced} ({stats.hit_ratio:.1%} served from cache)"
+        )
+
+
+async def burst(cache: bool) -> None:
+    backend = Backend()
+    lookup = memoize(backend.lookup) if cache else backend.lookup
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(7) for _ in range(BURST)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'memoized' if cache else 'uncached':<9} {BURST} concurrent cold lookups: "
+        f"{elapsed * 1e3:6.1f} ms, backend calls {backend.calls}"
+    )
+
+
+async def run() -> None:
+    await hit_cost()
+    print()
+    for cache in (False, True):
+        await workload(cache)
+    print()
+    for cache in (False, True):
+        await burst(cache)
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
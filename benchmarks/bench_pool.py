@@ -0,0 +1,79 @@
+"""Pooled vs connect-per-request backend calls against a local TCP echo server.
+
+Run with ``python -m benchmarks.bench_pool``.
+"""
+
+import asyncio
+import time
+
+from nimbus.pool import ResourcePool
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+PAYLOAD = b"x" * 64
+
+
+async def echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    while data := await reader.read(1024):
+        writer.write(data)
+        await writer.drain()
+    writer.close()
+
+
+async def roundtrip(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    writer.write(PAYLOAD)
+    await writer.drain()
+    await reader.readexactly(len(PAYLOAD))
+
+
+async def drive(call) -> float:
+    remaining = iter(range(REQUESTS))
+
+    async def worker():
+        for _ in remaining:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    server = await asyncio.start_server(echo, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    async def per_request():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await roundtrip(reader, writer)
+        writer.close()
+        await writer.wait_closed()
+
+    async def close(connection) -> None:
+        connection[1].close()
+        await connection[1].wait_closed()
+
+    pool = ResourcePool(
+        lambda: asyncio.open_connection("127.0.0.1", port),
+        close=close,
+        min_size=10,
+        max_size=20,
+    )
+    await pool.open()
+
+    async def pooled():
+        async with pool.acquire() as (reader, writer):
+            await roundtrip(reader, writer)
+
+    print(f"connect per request: {await drive(per_request):10.0f} calls/s")
+    print(f"pooled (max 20):     {await drive(pooled):10.0f} calls/s")
+    stats = pool.stats()
+    print(
+        f"pool: created={stats.created} acquired={stats.acquired} "
+        f"mean_wait={stats.mean_wait * 1e3:.3f}ms max_wait={stats.max_wait * 1e3:.3f}ms"
+    )
+    await pool.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""Reverse-proxy throughput: ``ProxyRouter`` vs a connect-per-request handler.
+
+A stand-in upstream process answers ``/bytes/<n>`` with ``n`` bytes over
+keep-alive HTTP/1.1. A Nimbus server process exposes the same upstream
+twice: ``/naive`` is a handler that opens a fresh upstream connection and
+buffers the whole response into an ``HttpResponse`` (what proxying
+handlers did before), ``/proxy`` is a mounted ``ProxyRouter`` with pooled
+connections and streamed bodies. The client keeps ``CONCURRENCY``
+requests in flight and reports requests/s, latency percentiles and how
+many upstream connections were opened.
+
+Run with ``python -m benchmarks.bench_proxy``.
+"""
+
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.proxy import ProxyRouter
+from nimbus.response import HttpResponse
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+REQUESTS = 2_000
+CONCURRENCY = 16
+SIZES = (1_024, 262_144)
+
+
+def upstream(port: int) -> None:
+    connections = 0
+
+    async def handle(reader, writer):
+        nonlocal connections
+        connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ", 2)[1]
+                if path == b"/stats":
+                    body = b"%d" % connections
+                else:
+                    body = b"x" * int(path.rsplit(b"/", 1)[1])
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\ncontent-type: application/octet-stream\r\n"
+                    b"content-length: %d\r\n\r\n" % len(body)
+                )
+                writer.write(body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", port, backlog=1024)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def serve(port: int, upstream_port: int) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+
+    @app.get("/naive/bytes/<size>")
+    async def naive(connection, size):
+        reader, writer = await asyncio.open_connection("127.0.0.1", upstream_port)
+        try:
+            writer.write(
+                f"GET /bytes/{size} HTTP/1.1\r\nHost: upstream\r\n"
+                "Connection: close\r\n\r\n".encode()
+            )
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+            body = await reader.readexactly(length)
+        finally:
+            writer.close()
+        return HttpResponse(body, headers={"content-type": "application/octet-stream"})
+
+    app.mount("/proxy", ProxyRouter([f"http://127.0.0.1:{upstream_port}"]))
+    NimbusServer(app, port=port, backlog=1024).run()
+
+
+async def fetch(port: int, path: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+async def load(port: int, path: str, size: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    remaining = REQUESTS
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await fetch(port, path)
+            latencies.append(time.perf_counter() - started)
+            assert response.endswith(b"x" * min(size, 64)), response[:80]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start), latencies
+
+
+async def upstream_connections(port: int) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /stats HTTP/1.1\r\nHost: upstream\r\n\r\n")
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.split(b"content-length: ")[1].split(b"\r\n")[0])
+    count = int(await reader.readexactly(length))
+    writer.close()
+    return count - 1  # this connection
+
+
+async def main(port: int, upstream_port: int) -> None:
+    await wait_for_server(upstream_port)
+    await wait_for_server(port)
+    print(f"{REQUESTS} requests, {CONCURRENCY} in flight")
+    for size in SIZES:
+        for name in ("naive", "proxy"):
+            path = f"/{name}/bytes/{size}"
+            await load(port, path, size)  # warm up
+            before = await upstream_connections(upstream_port)
+            rps, latencies = await load(port, path, size)
+            opened = await upstream_connections(upstream_port) - before - 1
+            cuts = statistics.quantiles(latencies, n=100)
+            print(
+                f"{size:>7} B {name:>5}: {rps:7.0f} req/s  "
+                f"p50 {cuts[49] * 1e3:6.2f} ms  p99 {cuts[98] * 1e3:6.2f} ms  "
+                f"{opened:5d} upstream connections"
+            )
+
+
+if __name__ == "__main__":
+    port, upstream_port = free_port(), free_port()
+    processes = [
+        multiprocessing.Process(target=upstream, args=(upstream_port,), daemon=True),
+        multiprocessing.Process(target=serve, args=(port, upstream_port), daemon=True),
+    ]
+    for process in processes:
+        process.start()
+    try:
+        asyncio.run(main(port, upstream_port))
+    finally:
+        for process in processes:
+            process.terminate()
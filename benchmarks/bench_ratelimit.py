@@ -0,0 +1,74 @@
+"""Per-request cost and memory of RateLimitMiddleware.
+
+Run with ``python -m benchmarks.bench_ratelimit``.
+"""
+
+import asyncio
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.ratelimit import RateLimitMiddleware, RateLimitTable
+from nimbus.response import HttpResponse
+
+from ._harness import dispatch, make_scope
+
+REQUESTS = 10_000
+KEYS = 1_000_000
+
+
+async def passthrough(connection, next_middleware):
+    return await next_middleware()
+
+
+def build_app(middleware=None) -> NimbusApp:
+    app = NimbusApp()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/")
+    async def index(connection):
+        return HttpResponse("hello")
+
+    return app
+
+
+async def throughput(app: NimbusApp) -> float:
+    scopes = [make_scope() for _ in range(REQUESTS)]
+    for index, scope in enumerate(scopes):
+        scope["client"] = (f"10.{index % 250}.{index // 250 % 250}.1", 1234)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for scope in scopes:
+            await dispatch(app, scope)
+        best = min(best, time.perf_counter() - start)
+    return REQUESTS / best
+
+
+def table_cost() -> None:
+    table = RateLimitTable(rate=10, burst=20, capacity=65536)
+    keys = [f"client-{index}" for index in range(KEYS)]
+    start = time.perf_counter()
+    for key in keys:
+        table.acquire(key)
+    elapsed = time.perf_counter() - start
+    print(
+        f"table: {KEYS} distinct keys, {elapsed / KEYS * 1e9:.0f} ns/acquire, "
+        f"{table.nbytes / 1024:.0f} KiB fixed state"
+    )
+
+
+async def main() -> None:
+    table_cost()
+    baseline = await throughput(build_app(passthrough))
+    limited = await throughput(build_app(RateLimitMiddleware(rate=1e9, burst=10**9)))
+    overhead = (1 / limited - 1 / baseline) * 1e6
+    print(f"pass-through middleware: {baseline:10.0f} req/s")
+    print(f"rate limit middleware:   {limited:10.0f} req/s ({overhead:+.2f} us/req)")
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main())
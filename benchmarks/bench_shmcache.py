@@ -0,0 +1,109 @@
+"""SharedCache vs a per-process dict at several process counts.
+
+Each process runs a read-mostly workload over the same (uniform) key space. On a
+miss the value is recomputed (a few hashes) and stored. With a dict every
+process computes and stores its own copy; with SharedCache a value computed
+by one process is a hit for all others.
+
+Run with ``python -m benchmarks.bench_shmcache``.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from nimbus.shmcache import SharedCache
+
+KEYS = 20_000
+OPS = 100_000
+PROCESS_COUNTS = (1, 2, 4)
+
+
+def compute(key: str) -> bytes:
+    digest = key.encode()
+    for _ in range(20):
+        digest = hashlib.sha256(digest).digest()
+    return digest * 3  # 96 bytes
+
+
+def workload(store, seed: int) -> tuple[int, float]:
+    rng = random.Random(seed)
+    keys = [f"item:{i}" for i in range(KEYS)]
+    misses = 0
+    start = time.perf_counter()
+    for _ in range(OPS):
+        key = keys[rng.randrange(KEYS)]
+        if store.get(key) is None:
+            misses += 1
+            store.set(key, compute(key))
+    return misses, time.perf_counter() - start
+
+
+class DictStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def dict_size(store: dict) -> int:
+    return sys.getsizeof(store) + sum(
+        sys.getsizeof(k) + sys.getsizeof(v) for k, v in store.items()
+    )
+
+
+def run_dict(seed: int, results) -> None:
+    store = DictStore()
+    misses, elapsed = workload(store, seed)
+    results.put((misses, elapsed, dict_size(store)))
+
+
+def run_shared(path: str, seed: int, results) -> None:
+    cache = SharedCache(path=path, capacity=2 * KEYS, slot_size=160)
+    misses, elapsed = workload(cache, seed)
+    cache.close()
+    results.put((misses, elapsed, 0))
+
+
+def measure(target, args, processes: int) -> tuple[float, int, int]:
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=target, args=(*args, seed, results))
+        for seed in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get() for _ in workers]
+    wall = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    misses = sum(outcome[0] for outcome in outcomes)
+    memory = sum(outcome[2] for outcome in outcomes)
+    return processes * OPS / wall, misses, memory
+
+
+def main() -> None:
+    print(f"{os.cpu_count()} CPU(s), {KEYS} keys, {OPS} ops per process")
+    for processes in PROCESS_COUNTS:
+        rate, misses, memory = measure(run_dict, (), processes)
+        print(
+            f"{processes} proc  dict:   {rate:9.0f} ops/s  {misses:6d} recomputes  "
+            f"{memory / 1e6:6.1f} MB total"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache")
+            cache = SharedCache(path=path, capacity=2 * KEYS, slot_size=160)
+            rate, misses, _ = measure(run_shared, (path,), processes)
+            print(
+                f"{processes} proc  shared: {rate:9.0f} ops/s  {misses:6d} recomputes  "
+                f"{cache.nbytes / 1e6:6.1f} MB total"
+            )
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
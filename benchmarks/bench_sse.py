@@ -0,0 +1,78 @@
+"""Fan-out of server-sent events to 10k concurrent in-process streams.
+
+Each stream is a real HttpConnection running an EventSourceResponse; only
+the socket is replaced by an in-memory send.
+
+Run with ``python -m benchmarks.bench_sse``.
+"""
+
+import asyncio
+import time
+import tracemalloc
+
+from nimbus.connections import HttpConnection
+from nimbus.sse import EventChannel, EventSourceResponse
+
+from ._harness import make_scope
+
+STREAMS = 10_000
+EVENTS = 20
+
+
+async def main() -> None:
+    channel = EventChannel(queue_size=32)
+    delivered = 0
+    all_delivered = asyncio.Event()
+    target = STREAMS * EVENTS
+
+    async def receive(size: int) -> bytes:
+        return b""
+
+    async def send(event) -> None:
+        nonlocal delivered
+        if event["type"] == "http.response.body" and event["body"]:
+            delivered += 1
+            if delivered == target:
+                all_delivered.set()
+
+    async def stream() -> None:
+        connection = HttpConnection(make_scope("/events"), receive, send)
+        await EventSourceResponse(channel.subscribe(), connection, ping_interval=30)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(stream()) for _ in range(STREAMS)]
+    while len(channel.subscribers) < STREAMS:
+        await asyncio.sleep(0)
+    setup = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    payload = '{"cpu": 0.42, "mem": 0.73, "ts": 1700000000}'
+    latencies = []
+    start = time.perf_counter()
+    for index in range(EVENTS):
+        published = time.perf_counter()
+        channel.publish(payload)
+        while delivered < (index + 1) * STREAMS:
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - published)
+    await all_delivered.wait()
+    elapsed = time.perf_counter() - start
+
+    channel.close()
+    await asyncio.gather(*tasks)
+
+    print(
+        f"{STREAMS} streams: setup {setup:.2f}s, "
+        f"{memory / STREAMS / 1024:.1f} KiB/stream"
+    )
+    print(
+        f"{EVENTS} events fanned out: {target / elapsed:,.0f} deliveries/s, "
+        f"publish-to-all-delivered mean {sum(latencies) / EVENTS * 1e3:.1f}ms "
+        f"max {max(latencies) * 1e3:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
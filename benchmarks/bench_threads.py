@@ -0,0 +1,131 @@
+"""Scaling of ``NimbusServer(threads=N)`` next to one process per loop.
+
+Each configuration runs in a fresh server process (or ``N`` processes on
+one ``SO_REUSEPORT`` port for the ``processes`` rows). The handler does a
+little CPU work per request, rendering a JSON document of ``ROWS`` rows,
+so loops only scale if they really run in parallel: on a GIL build the
+threads rows should stay flat, on a free-threaded build (``python3.13t``)
+they should track the process rows. ``CLIENTS`` client processes keep
+``CONCURRENCY`` requests in flight each. Reports requests/s and the
+servers' summed peak RSS (``VmHWM``, so Linux only).
+
+Run with ``python -m benchmarks.bench_threads``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+from nimbus.applications import NimbusApp
+from nimbus.response import JsonResponse
+from nimbus.server.server import NimbusServer
+
+from ._harness import free_port, wait_for_server
+
+ROWS = 200
+DURATION = 5.0
+CLIENTS = 2
+CONCURRENCY = 16
+LOOPS = (1, 2, 4)
+
+
+def serve(port: int, threads: int) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+    # Shared by every loop; with processes each one holds its own copy.
+    catalogue = [
+        {"id": i, "name": f"item {i}", "tags": ["a", "b"]} for i in range(ROWS)
+    ]
+
+    @app.get("/work")
+    async def work(connection):
+        return JsonResponse(catalogue)
+
+    NimbusServer(app, port=port, backlog=1024, threads=threads, reuse_port=True).run()
+
+
+async def fetch(port: int, path: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def client(port: int, results) -> None:
+    async def run() -> int:
+        done = 0
+        deadline = time.perf_counter() + DURATION
+
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                response = await fetch(port, "/work")
+                assert response.startswith(b"HTTP/1.1 200"), response[:80]
+                done += 1
+
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return done
+
+    results.put(asyncio.run(run()))
+
+
+def measure(port: int) -> float:
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    clients = [
+        multiprocessing.Process(target=client, args=(port, results))
+        for _ in range(CLIENTS)
+    ]
+    for process in clients:
+        process.start()
+    total = sum(results.get() for _ in clients)
+    for process in clients:
+        process.join()
+    return total / DURATION
+
+
+def peak_rss(pid: int) -> int:
+    """Peak resident set size of ``pid`` in KiB (Linux only)."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def main() -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, "
+        f"{os.cpu_count()} CPUs, {CLIENTS}x{CONCURRENCY} clients for {DURATION:.0f} s"
+    )
+    for mode in ("threads", "processes"):
+        for loops in LOOPS:
+            port = free_port()
+            threads, processes = (loops, 1) if mode == "threads" else (1, loops)
+            servers = [
+                multiprocessing.Process(target=serve, args=(port, threads))
+                for _ in range(processes)
+            ]
+            for server in servers:
+                server.start()
+            try:
+                asyncio.run(wait_for_server(port))
+                rps = measure(port)
+                rss = sum(peak_rss(server.pid) for server in servers)
+            finally:
+                for server in servers:
+                    server.terminate()
+                    server.join()
+            print(
+                f"{mode:>9} x{loops}: {rps:7.0f} req/s  "
+                f"peak RSS {rss / 1024:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""TLS handshakes per second, full vs resumed, against a local server.
+
+Uses a throwaway self-signed certificate generated with the ``openssl``
+command line tool. The resumed run presents the session (ticket) from the
+previous connection, and the resumption ratio is what the client observed.
+
+Run with ``python -m benchmarks.bench_tls``.
+"""
+
+import asyncio
+import multiprocessing
+import socket
+import ssl
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from nimbus.applications import NimbusApp
+from nimbus.response import PrecomputedResponse
+from nimbus.server.server import NimbusServer
+from nimbus.server.tls import TLSConfig
+
+from ._harness import free_port, wait_for_server
+
+HANDSHAKES = 1_000
+
+
+def make_certificate(directory: Path) -> tuple[str, str]:
+    certfile, keyfile = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "ec",
+            "-pkeyopt", "ec_paramgen_curve:prime256v1", "-nodes",
+            "-subj", "/CN=localhost", "-days", "1",
+            "-keyout", str(keyfile), "-out", str(certfile),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    return str(certfile), str(keyfile)
+
+
+def serve(port: int, certfile: str, keyfile: str) -> None:
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    app = NimbusApp()
+    app.add_constant_response("/", PrecomputedResponse("hello"))
+    NimbusServer(app, port=port, tls=TLSConfig(certfile, keyfile)).run()
+
+
+def handshakes(port: int, resume: bool) -> tuple[float, float]:
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    session = None
+    resumed = 0
+    start = time.perf_counter()
+    for _ in range(HANDSHAKES):
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            with context.wrap_socket(sock, session=session) as tls_sock:
+                tls_sock.sendall(b"GET / HTTP/1.1\r\n\r\n")
+                while tls_sock.recv(4096):
+                    pass
+                resumed += tls_sock.session_reused
+                if resume:
+                    # TLS 1.3 tickets arrive after the handshake, so the
+                    # session is only usable once the response was read.
+                    session = tls_sock.session
+    elapsed = time.perf_counter() - start
+    return HANDSHAKES / elapsed, resumed / HANDSHAKES
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_certificate(Path(directory))
+        port = free_port()
+        process = multiprocessing.Process(
+            target=serve, args=(port, certfile, keyfile), daemon=True
+        )
+        process.start()
+        try:
+            await wait_for_server(port)
+            for label, resume in (("full", False), ("resumed", True)):
+                rate, ratio = await asyncio.to_thread(handshakes, port, resume)
+                print(
+                    f"{label:>8} handshakes: {rate:8.0f}/s  "
+                    f"resumption ratio {ratio:.2f}"
+                )
+        finally:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
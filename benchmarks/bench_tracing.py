@@ -0,0 +1,75 @@
+"""Per-request cost of tracing: disabled, unsampled and sampled.
+
+Requests go through NimbusServer._process_connection with in-memory
+reader/writer objects, so socket cost is excluded. Sampled spans are
+encoded to OTLP/JSON and then discarded.
+
+Run with ``python -m benchmarks.bench_tracing``.
+"""
+
+import asyncio
+import time
+from typing import Any, Optional
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.server import NimbusServer
+from nimbus.tracing import SpanExporter, Tracer
+
+from ._harness import MemoryWriter, memory_reader
+
+REQUESTS = 20_000
+RAW = b"GET /items/1 HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+
+class DiscardExporter(SpanExporter):
+    async def export(self, request: dict[str, Any]) -> None:
+        return None
+
+
+async def passthrough(connection, next_middleware):
+    return await next_middleware()
+
+
+def build_app() -> NimbusApp:
+    app = NimbusApp()
+    app.add_middleware(passthrough)
+
+    @app.get("/items/<item_id>")
+    async def item(connection, item_id):
+        return HttpResponse(item_id)
+
+    return app
+
+
+async def run(tracer: Optional[Tracer]) -> float:
+    server = NimbusServer(build_app(), tracer=tracer)
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await server._process_connection(
+                memory_reader(RAW), MemoryWriter(), ("127.0.0.1", 50000)
+            )
+        if tracer is not None:
+            await tracer.flush()
+        best = min(best, time.perf_counter() - start)
+    return best / REQUESTS * 1e6
+
+
+async def main() -> None:
+    cases = [
+        ("no tracer", None),
+        ("unsampled (rate 0)", Tracer(DiscardExporter(), sample_rate=0.0)),
+        ("1% sampled", Tracer(DiscardExporter(), sample_rate=0.01)),
+        ("all sampled", Tracer(DiscardExporter(), sample_rate=1.0)),
+    ]
+    for label, tracer in cases:
+        print(f"{label:>20}: {await run(tracer):6.1f} us/req")
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main())
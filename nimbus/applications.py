@@ -1,23 +1,65 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Awaitable, Callable, Optional
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional
 
+from nimbus.background import BackgroundWorkers
 from nimbus.connections import BaseConnection, HttpConnection, WebSocketConnection
+from nimbus.exceptions import InvalidRequestBody
 from nimbus.middleware import MiddlewareManager, MiddlewareType
-from nimbus.response import HttpResponse
+from nimbus.pool import ResourcePool
+from nimbus.response import HttpResponse, PrecomputedResponse
 from nimbus.router import Router
+from nimbus.server.decompression import DEFAULT_MAX_DECOMPRESSED_SIZE
+from nimbus.shmcache import SharedCache
+from nimbus.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+LifecycleHook = Callable[[], Awaitable[None]]
+Lifespan = Callable[["NimbusApp"], AsyncContextManager[Optional[dict[str, Any]]]]
+
+
 class ASGIApplication(ABC):
     @abstractmethod
     async def __call__(self, connection: BaseConnection) -> HttpResponse | None:
         raise NotImplementedError()
 
+    async def startup(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def constant_response(self, method: str, path: str) -> PrecomputedResponse | None:
+        return None
+
+    def loop_bound_resources(self) -> list[str]:
+        """Resources that only work on the event loop that opened them."""
+        return []
+
 
 class NimbusApp(ASGIApplication):
-    def __init__(self):
+    def __init__(
+        self,
+        lifespan: Optional[Lifespan] = None,
+        background: Optional[BackgroundWorkers] = None,
+        background_timeout: float = 10.0,
+        max_decompressed_size: int = DEFAULT_MAX_DECOMPRESSED_SIZE,
+    ):
+        self.state = SimpleNamespace()
+        self.lifespan = lifespan
+        self.startup_hooks: list[LifecycleHook] = []
+        self.shutdown_hooks: list[LifecycleHook] = []
+        self._lifespan_stack: Optional[AsyncExitStack] = None
+        self.pools: dict[str, ResourcePool] = {}
+        self.caches: dict[str, SharedCache] = {}
+        self.background = background or BackgroundWorkers()
+        self.background_timeout = background_timeout
+        self.max_decompressed_size = max_decompressed_size
+        self.constant_responses: dict[tuple[str, str], PrecomputedResponse] = {}
         self.routers: list[tuple[str, Router]] = []
         self.middleware_manager = MiddlewareManager()
         self.websocket_handlers: dict[
@@ -33,6 +75,90 @@ class NimbusApp(ASGIApplication):
     def add_middleware(self, middleware: MiddlewareType):
         self.middleware_manager.add_middleware(middleware)
 
+    def add_constant_response(
+        self,
+        path: str,
+        response: PrecomputedResponse,
+        methods: Optional[list[str]] = None,
+        bypass_middleware: bool = True,
+    ) -> None:
+        methods = methods or ["GET"]
+        if bypass_middleware:
+            for method in methods:
+                self.constant_responses[(method, path)] = response
+            return
+
+        async def handler(connection: HttpConnection) -> PrecomputedResponse:
+            return response
+
+        self.default_router.add_route(path, handler, methods)
+
+    def constant_response(self, method: str, path: str) -> PrecomputedResponse | None:
+        return self.constant_responses.get((method, path))
+
+    def loop_bound_resources(self) -> list[str]:
+        resources = [f"pool {name!r}" for name in self.pools]
+        resources += [
+            f"{type(router).__name__} at {prefix or '/'!r}"
+            for prefix, router in self.routers
+            if router.loop_bound
+        ]
+        return resources
+
+    def add_pool(self, name: str, pool: ResourcePool) -> ResourcePool:
+        self.pools[name] = pool
+        return pool
+
+    def add_cache(self, name: str, cache: SharedCache) -> SharedCache:
+        self.caches[name] = cache
+        return cache
+
+    def on_startup(self, hook: LifecycleHook) -> LifecycleHook:
+        self.startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: LifecycleHook) -> LifecycleHook:
+        self.shutdown_hooks.append(hook)
+        return hook
+
+    async def startup(self) -> None:
+        logger.info("Running application startup")
+        self.background.attach()
+        self._lifespan_stack = stack = AsyncExitStack()
+        try:
+            for name, pool in self.pools.items():
+                logger.debug(f"Opening pool '{name}'")
+                await pool.open()
+                stack.push_async_callback(pool.close)
+            for cache in self.caches.values():
+                stack.callback(cache.close)
+            if self.lifespan is not None:
+                state = await stack.enter_async_context(self.lifespan(self))
+                if state:
+                    vars(self.state).update(state)
+            for hook in self.startup_hooks:
+                await hook()
+        except BaseException:
+            # Nothing calls shutdown() after a failed startup: close whatever
+            # was opened so far here.
+            self._lifespan_stack = None
+            await stack.aclose()
+            raise
+
+    async def shutdown(self) -> None:
+        logger.info("Running application shutdown")
+        try:
+            # Background tasks may still need pools and lifespan state.
+            await self.background.close(self.background_timeout)
+            for hook in self.shutdown_hooks:
+                await hook()
+            for _, router in self.routers:
+                await router.close()
+        finally:
+            if self._lifespan_stack is not None:
+                stack, self._lifespan_stack = self._lifespan_stack, None
+                await stack.aclose()
+
     def websocket(self, path: str):
         def decorator(handler: Callable[[WebSocketConnection], Awaitable[None]]):
             self.websocket_handlers[path] = handler
@@ -41,10 +167,12 @@ class NimbusApp(ASGIApplication):
         return decorator
 
     async def __call__(self, connection: BaseConnection) -> HttpResponse | None:
+        connection.scope["app"] = self
         if isinstance(connection, WebSocketConnection):
             await self._handle_websocket(connection)
         elif isinstance(connection, HttpConnection):
-            return await self._handle_http(connection)
+            with span("app.handle_http"):
+                return await self._handle_http(connection)
 
     async def _handle_websocket(self, connection: WebSocketConnection) -> None:
         path = connection.scope["path"]
@@ -60,17 +188,31 @@ class NimbusApp(ASGIApplication):
         method = connection.scope["method"]
         logger.info(f"Handling {method} request for path: {path}")
 
+        constant = self.constant_responses.get((method, path))
+        if constant is not None:
+            return await self._process_http_response(constant, connection)
+
         for prefix, router in self.routers:
             logger.debug(f"Checking router with prefix: '{prefix}'")
             if path.startswith(prefix):
                 logger.debug(f"Attempting to route request with router: '{prefix}'")
                 try:
-                    response = await self.middleware_manager.apply_middleware(
-                        connection, lambda: router(connection)
-                    )
+                    with span(f"router {prefix or '/'}"):
+                        response = await self.middleware_manager.apply_middleware(
+                            connection, lambda: router(connection)
+                        )
                     if response:
                         logger.debug(f"Router '{prefix}' handled the request")
                         return await self._process_http_response(response, connection)
+                except InvalidRequestBody as e:
+                    logger.info(f"Rejected request body for {path}: {e}")
+                    response = HttpResponse(
+                        str(e),
+                        connection,
+                        headers={"Content-Type": "text/plain"},
+                        status_code=e.status_code,
+                    )
+                    return await self._process_http_response(response, connection)
                 except Exception as e:
                     logger.error(f"Error in router '{prefix}'. {str(e)}")
 
@@ -88,16 +230,26 @@ class NimbusApp(ASGIApplication):
     ) -> HttpResponse:
         response.connection = connection
         await response
+        if response.background is not None:
+            await self.background.submit(response.background)
+        if connection.background_tasks:
+            for task in connection.background_tasks:
+                await self.background.submit(task)
         return response
 
-    def route(self, rule: str, methods: Optional[list[str]] = None):
-        return self.default_router.route(rule, methods)
+    def route(
+        self,
+        rule: str,
+        methods: Optional[list[str]] = None,
+        typed: Optional[bool] = None,
+    ):
+        return self.default_router.route(rule, methods, typed)
 
-    def get(self, rule: str):
-        return self.route(rule, ["GET"])
+    def get(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["GET"], typed)
 
-    def post(self, rule: str):
-        return self.route(rule, ["POST"])
+    def post(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["POST"], typed)
 
-    def patch(self, rule: str):
-        return self.route(rule, ["PATCH"])
+    def patch(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["PATCH"], typed)
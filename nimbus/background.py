@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop", "wait"]
+
+
+class BackgroundTask:
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    async def __call__(self) -> None:
+        if iscoroutinefunction(self.func):
+            await self.func(*self.args, **self.kwargs)
+        else:
+            await asyncio.to_thread(self.func, *self.args, **self.kwargs)
+
+
+@dataclass
+class BackgroundStats:
+    queued: int
+    running: int
+    workers: int
+    completed: int
+    failed: int
+    dropped: int
+    total_latency: float
+    max_latency: float
+    total_duration: float
+
+    @property
+    def mean_latency(self) -> float:
+        started = self.completed + self.failed
+        return self.total_latency / started if started else 0.0
+
+    @property
+    def mean_duration(self) -> float:
+        finished = self.completed + self.failed
+        return self.total_duration / finished if finished else 0.0
+
+
+class BackgroundWorkers:
+    """Runs background tasks on a fixed number of worker coroutines.
+
+    At most ``queue_size`` tasks wait for a worker. When the queue is full,
+    ``overflow="drop"`` discards the new task and ``"wait"`` makes the
+    submitter wait for room. Latency is the time a task spent queued.
+
+    Workers run on the loop passed to ``attach`` (or the first one to
+    submit); tasks submitted from other loops are handed over to it.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 1024,
+        overflow: OverflowPolicy = "drop",
+    ):
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be at least 1")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.closed = False
+        self._queue: Optional[asyncio.Queue[tuple[float, BackgroundTask]]] = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._total_duration = 0.0
+
+    def attach(self) -> None:
+        """Run the workers on the current event loop."""
+        self._loop = asyncio.get_running_loop()
+
+    def _start(self) -> asyncio.Queue[tuple[float, BackgroundTask]]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            loop = self._loop = asyncio.get_running_loop()
+            self._workers = [
+                loop.create_task(self._work(self._queue)) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    async def submit(self, task: BackgroundTask) -> bool:
+        if self.closed:
+            logger.warning("Background task submitted after shutdown; dropping it")
+            self._dropped += 1
+            return False
+        loop = self._loop
+        if loop is not None and loop is not asyncio.get_running_loop():
+            future = asyncio.run_coroutine_threadsafe(self.submit(task), loop)
+            return await asyncio.wrap_future(future)
+        queue = self._start()
+        item = (time.monotonic(), task)
+        if self.overflow == "wait":
+            await queue.put(item)
+            return True
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            return False
+        return True
+
+    async def _work(self, queue: asyncio.Queue[tuple[float, BackgroundTask]]) -> None:
+        while True:
+            queued_at, task = await queue.get()
+            started = time.monotonic()
+            latency = started - queued_at
+            self._total_latency += latency
+            if latency > self._max_latency:
+                self._max_latency = latency
+            self._running += 1
+            try:
+                await task()
+            except Exception:
+                self._failed += 1
+                logger.exception(f"Background task {task.func!r} failed")
+            else:
+                self._completed += 1
+            finally:
+                self._running -= 1
+                self._total_duration += time.monotonic() - started
+                queue.task_done()
+
+    async def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Let queued and running tasks finish, cancelling them after ``timeout``."""
+        self.closed = True
+        queue, self._queue = self._queue, None
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Cancelling {self._running} running and {queue.qsize()} queued "
+                "background task(s)"
+            )
+            self._dropped += queue.qsize()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> BackgroundStats:
+        return BackgroundStats(
+            queued=self._queue.qsize() if self._queue is not None else 0,
+            running=self._running,
+            workers=len(self._workers),
+            completed=self._completed,
+            failed=self._failed,
+            dropped=self._dropped,
+            total_latency=self._total_latency,
+            max_latency=self._max_latency,
+            total_duration=self._total_duration,
+        )
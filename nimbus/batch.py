@@ -0,0 +1,220 @@
+import asyncio
+import base64
+import json
+import logging
+from typing import Any, AsyncIterator, Optional, Protocol, Sequence
+
+from nimbus.connections import HttpConnection
+from nimbus.response import HttpResponse, PrecomputedResponse, StreamingResponse
+from nimbus.router import Router
+from nimbus.types import Scope
+
+logger = logging.getLogger(__name__)
+
+# Headers a sub-request takes from the batch request unless it sets them.
+DEFAULT_INHERITED_HEADERS = ("authorization", "cookie", "user-agent", "accept-language")
+
+
+class Admission(Protocol):
+    """What BatchRouter needs from nimbus.server.admission.AdmissionController."""
+
+    response: PrecomputedResponse
+
+    async def acquire(self, path: str) -> Optional[float]: ...
+
+    def release(self, admitted_at: float, dropped: bool = False) -> None: ...
+
+
+class BatchRouter(Router):
+    """Runs a JSON array of sub-requests through the app without sockets.
+
+    ``POST`` a list of ``{"method", "path", "headers", "body"}`` objects
+    (only ``path`` is required; a non-string ``body`` is sent as JSON). Each
+    one is dispatched through the app's routers and middleware on an
+    in-memory ``HttpConnection``, at most ``max_concurrency`` at a time.
+    Results are streamed back as NDJSON in completion order, one
+    ``{"index", "status", "headers", "body"}`` line per sub-request; JSON
+    bodies are embedded as JSON, other bodies as text, or as base64 with
+    ``"encoding": "base64"`` when they are not UTF-8.
+
+    The server's ``AdmissionController`` only sees the batch request itself;
+    its sub-requests bypass it. Pass the same controller as ``admission`` to
+    count each sub-request against it too, and have a rejected one answered
+    with its 503. The batch request keeps its own slot meanwhile, so keep
+    the limit well above ``max_concurrency``. A sub-request slower than
+    ``timeout`` seconds is answered with a 504.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_requests: int = 50,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 10.0,
+        inherit_headers: Sequence[str] = DEFAULT_INHERITED_HEADERS,
+        admission: Optional[Admission] = None,
+    ):
+        super().__init__()
+        if max_requests < 1 or max_concurrency < 1:
+            raise ValueError("max_requests and max_concurrency must be at least 1")
+        self.max_requests = max_requests
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.admission = admission
+        self.inherit_headers = frozenset(
+            name.lower().encode() for name in inherit_headers
+        )
+
+    async def _handle_http_connection(
+        self, connection: HttpConnection
+    ) -> Optional[HttpResponse]:
+        connection.scope["route"] = self.prefix or "/"
+        if connection.scope["method"] != "POST":
+            return _error(405, "Batch requests must be POSTed")
+        try:
+            items = json.loads(await connection.get_body())
+        except ValueError:
+            return _error(400, "Batch body must be a JSON array")
+        if not isinstance(items, list):
+            return _error(400, "Batch body must be a JSON array")
+        if len(items) > self.max_requests:
+            return _error(413, f"At most {self.max_requests} requests per batch")
+        return StreamingResponse(
+            self._results(connection, items),
+            headers={"content-type": "application/x-ndjson"},
+        )
+
+    async def _results(
+        self, connection: HttpConnection, items: list[Any]
+    ) -> AsyncIterator[bytes]:
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(index: int, item: Any) -> dict[str, Any]:
+            async with slots:
+                result = await self._dispatch(connection, item)
+            result["index"] = index
+            return result
+
+        tasks = [asyncio.create_task(run(i, item)) for i, item in enumerate(items)]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield json.dumps(await done).encode() + b"\n"
+        finally:
+            # The client went away: abandon whatever has not finished.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, parent: HttpConnection, item: Any) -> dict[str, Any]:
+        try:
+            scope, body = self._sub_scope(parent.scope, item)
+        except ValueError as e:
+            return {"status": 400, "headers": {}, "body": str(e)}
+        sent: list[dict[str, Any]] = []
+        body_view = memoryview(body)
+
+        async def receive(n: int = -1) -> bytes:
+            nonlocal body_view
+            size = len(body_view) if n < 0 else n
+            chunk, body_view = body_view[:size], body_view[size:]
+            return bytes(chunk)
+
+        async def send(event: dict[str, Any]) -> None:
+            sent.append(event)
+
+        sub = HttpConnection(scope, receive, send)  # type: ignore[arg-type]
+        admission, admitted_at = self.admission, None
+        if admission is not None:
+            admitted_at = await admission.acquire(scope["path"])
+            if admitted_at is None:
+                status = admission.response.status_code
+                return {"status": status, "headers": {}, "body": "Service Unavailable"}
+        dropped = False
+        try:
+            async with asyncio.timeout(self.timeout):
+                await parent.app(sub)
+        except TimeoutError:
+            dropped = True
+            return {"status": 504, "headers": {}, "body": "Gateway Timeout"}
+        except Exception as e:
+            logger.error(f"Batch sub-request to {scope['path']} failed: {e!r}")
+            return {"status": 500, "headers": {}, "body": "Internal Server Error"}
+        finally:
+            if admission is not None and admitted_at is not None:
+                admission.release(admitted_at, dropped)
+        if not sent:
+            return {"status": 500, "headers": {}, "body": "Internal Server Error"}
+        start = sent[0]
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in start["headers"]
+        }
+        return {
+            "status": start["status"],
+            "headers": headers,
+            **_encode_body(b"".join(e.get("body", b"") for e in sent[1:]), headers),
+        }
+
+    def _sub_scope(self, parent: Scope, item: Any) -> tuple[Scope, bytes]:
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise ValueError("Each sub-request needs a path")
+        target = item["path"]
+        if not target.startswith("/"):
+            raise ValueError("Sub-request paths must start with '/'")
+        path, _, query = target.partition("?")
+        if self.prefix and (path == self.prefix or path.startswith(self.prefix + "/")):
+            raise ValueError("Batch requests cannot be nested")
+        method = str(item.get("method", "GET")).upper()
+        headers = {
+            name: value
+            for name, value in parent["headers"]
+            if name in self.inherit_headers
+        }
+        raw_headers = item.get("headers") or {}
+        if not isinstance(raw_headers, dict):
+            raise ValueError("Sub-request headers must be an object")
+        for name, value in raw_headers.items():
+            headers[str(name).lower().encode("latin-1")] = str(value).encode("latin-1")
+        body = item.get("body")
+        if body is None:
+            data = b""
+        elif isinstance(body, str):
+            data = body.encode()
+        else:
+            data = json.dumps(body).encode()
+            headers.setdefault(b"content-type", b"application/json")
+        if data:
+            headers[b"content-length"] = str(len(data)).encode()
+        headers.pop(b"content-encoding", None)
+        scope: Scope = {
+            "type": "http",
+            "asgi": parent.get("asgi", {"version": "3.0"}),
+            "http_version": "1.1",
+            "method": method,
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": list(headers.items()),
+            "server": parent["server"],
+            "client": parent["client"],
+            "scheme": parent.get("scheme", "http"),
+        }
+        return scope, data
+
+
+def _encode_body(body: bytes, headers: dict[str, str]) -> dict[str, Any]:
+    if "json" in headers.get("content-type", ""):
+        try:
+            return {"body": json.loads(body)}
+        except ValueError:
+            pass
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode(), "encoding": "base64"}
+
+
+def _error(status: int, message: str) -> HttpResponse:
+    return HttpResponse(
+        message, status_code=status, headers={"Content-Type": "text/plain"}
+    )
@@ -1,30 +1,55 @@
-from functools import cached_property
 from http.cookies import SimpleCookie
-from typing import Any
+from typing import Any, Optional
 from urllib.parse import parse_qsl
 
+from nimbus.headers import Headers
 from nimbus.types import ReceiveCallable, Scope, SendCallable
 
 
 class BaseConnection:
+    __slots__ = (
+        "scope",
+        "receive",
+        "_raw_send",
+        "_headers",
+        "_cookies",
+        "_query_params",
+    )
+
     def __init__(self, scope: Scope, receive: ReceiveCallable, send: SendCallable):
         self.scope = scope
         self.receive = receive
         self._raw_send = send
+        self._headers: Optional[Headers] = None
+        self._cookies: Optional[SimpleCookie] = None
+        self._query_params: Optional[dict[str, str]] = None
 
-    @cached_property
-    def headers(self) -> dict[str, str]:
-        return {k.decode("ascii"): v.decode("ascii") for k, v in self.scope["headers"]}
+    @property
+    def headers(self) -> Headers:
+        if self._headers is None:
+            self._headers = Headers(self.scope["headers"])
+        return self._headers
 
-    @cached_property
+    @property
     def cookies(self) -> SimpleCookie:
-        cookie = SimpleCookie()
-        cookie.load(self.headers.get("cookie", ""))
-        return cookie
+        if self._cookies is None:
+            self._cookies = SimpleCookie()
+            self._cookies.load("; ".join(self.headers.getall("cookie")))
+        return self._cookies
 
-    @cached_property
+    @property
     def query_params(self) -> dict[str, str]:
-        return dict(parse_qsl(self.scope["query_string"].decode()))
+        if self._query_params is None:
+            self._query_params = dict(parse_qsl(self.scope["query_string"].decode()))
+        return self._query_params
+
+    @property
+    def app(self) -> Any:
+        return self.scope.get("app")
+
+    @property
+    def state(self) -> Any:
+        return self.app.state
 
     async def send(self, event: dict[str, Any]) -> None:
         await self._raw_send(event)
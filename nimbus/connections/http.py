@@ -1,27 +1,127 @@
-from typing import Any, AsyncIterator, Optional, Union
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Mapping,
+    Optional,
+    Union,
+)
 
+from nimbus.background import BackgroundTask
 from nimbus.connections.base import BaseConnection
 from nimbus.exceptions import ResponseAlreadyStarted
+from nimbus.headers import MutableHeaders
 from nimbus.server.body_parser import BodyParser
+from nimbus.server.decompression import DEFAULT_MAX_DECOMPRESSED_SIZE, BodyDecoder
 from nimbus.types import ReceiveCallable, Scope, SendCallable
 
 
 class HttpConnection(BaseConnection):
+    __slots__ = (
+        "started",
+        "finished",
+        "response_headers",
+        "response_status",
+        "background_tasks",
+        "memo",
+        "_body",
+        "_parsed_body",
+        "_body_streamed",
+    )
+
     def __init__(self, scope: Scope, receive: ReceiveCallable, send: SendCallable):
         super().__init__(scope, receive, send)
         self.started = False
         self.finished = False
-        self.response_headers: dict[bytes, bytes] = {}
+        self.response_headers = MutableHeaders()
         self.response_status: int = 200
+        self.background_tasks: Optional[list[BackgroundTask]] = None
+        # Request-scoped results of nimbus.memoize functions.
+        self.memo: Optional[dict[Any, Any]] = None
         self._body = None
         self._parsed_body = None
+        self._body_streamed = False
+
+    @property
+    def pools(self) -> dict[str, Any]:
+        return self.app.pools
+
+    @property
+    def caches(self) -> dict[str, Any]:
+        return self.app.caches
+
+    def add_background_task(
+        self, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> None:
+        """Run ``func`` on the app's background workers once the response is sent."""
+        if self.background_tasks is None:
+            self.background_tasks = []
+        self.background_tasks.append(BackgroundTask(func, *args, **kwargs))
 
     async def get_body(self) -> bytes:
         if self._body is None:
-            content_length = int(self.headers.get("content-length", "0"))
-            self._body = await self.receive(content_length)
+            content_length = self.headers.get("content-length")
+            if "content-encoding" in self.headers:
+                self._body = b"".join([chunk async for chunk in self.stream_body()])
+            elif content_length is not None:
+                self._body = await self.receive(int(content_length))
+            elif self.scope.get("http_version") == "2":
+                # HTTP/2 frames the body itself; read until the stream ends.
+                self._body = await self.receive(-1)
+            else:
+                self._body = b""
         return self._body
 
+    async def stream_body(
+        self, chunk_size: int = 65536, decode: bool = True
+    ) -> AsyncIterator[bytes]:
+        """Yield the request body as it arrives.
+
+        Any Content-Encoding is removed unless ``decode`` is False.
+        """
+        if self._body is not None:
+            if self._body:
+                yield self._body
+            return
+        if self._body_streamed:
+            raise RuntimeError("Request body was already streamed")
+        self._body_streamed = True
+        encoding = self.headers.get("content-encoding") if decode else None
+        decoder = (
+            BodyDecoder(
+                encoding,
+                getattr(
+                    self.app, "max_decompressed_size", DEFAULT_MAX_DECOMPRESSED_SIZE
+                ),
+            )
+            if encoding
+            else None
+        )
+        async for chunk in self._receive_chunks(chunk_size):
+            if decoder is not None:
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        if decoder is not None:
+            tail = decoder.flush()
+            if tail:
+                yield tail
+
+    async def _receive_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        content_length = self.headers.get("content-length")
+        if content_length is not None:
+            remaining = int(content_length)
+            while remaining > 0:
+                chunk = await self.receive(min(chunk_size, remaining))
+                if not chunk:
+                    return  # the client went away mid-body
+                remaining -= len(chunk)
+                yield chunk
+        elif self.scope.get("http_version") == "2":
+            while chunk := await self.receive(chunk_size):
+                yield chunk
+
     async def get_parsed_body(self) -> Optional[dict[str, Any]]:
         if self._parsed_body is None:
             body = await self.get_body()
@@ -32,7 +132,7 @@ class HttpConnection(BaseConnection):
         self,
         status: int,
         body: Union[str, bytes],
-        headers: Optional[dict[str, str]] = None,
+        headers: Optional[Mapping[str, str]] = None,
     ) -> None:
         self._ensure_response_not_started()
         self._prepare_response(status, headers)
@@ -45,19 +145,19 @@ class HttpConnection(BaseConnection):
             raise ResponseAlreadyStarted("Response already started")
         self.started = True
 
-    def _prepare_response(self, status: int, headers: Optional[dict[str, str]]) -> None:
+    def _prepare_response(
+        self, status: int, headers: Optional[Mapping[str, str]]
+    ) -> None:
         self.response_status = status
         if headers:
-            self.response_headers.update(
-                {k.encode("ascii"): v.encode("ascii") for k, v in headers.items()}
-            )
+            self.response_headers.update(headers)
 
     async def _send_response_start(self) -> None:
         await self.send(
             {
                 "type": "http.response.start",
                 "status": self.response_status,
-                "headers": list(self.response_headers.items()),
+                "headers": self.response_headers.raw,
             }
         )
 
@@ -71,20 +171,27 @@ class HttpConnection(BaseConnection):
     async def stream_response(
         self,
         status: int,
-        body_iterator: AsyncIterator[Union[str, bytes]],
-        headers: Optional[dict[str, str]] = None,
+        body_iterator: AsyncIterable[Union[str, bytes]],
+        headers: Optional[Mapping[str, str]] = None,
     ) -> None:
         self._ensure_response_not_started()
         self._prepare_response(status, headers)
-        await self._send_response_start()
         await self._stream_response_body(body_iterator)
         self.finished = True
 
     async def _stream_response_body(
-        self, body_iterator: AsyncIterator[Union[str, bytes]]
+        self, body_iterator: AsyncIterable[Union[str, bytes]]
     ) -> None:
-        async for chunk in body_iterator:
-            await self._send_response_chunk(chunk, more_body=True)
+        try:
+            await self._send_response_start()
+            async for chunk in body_iterator:
+                await self._send_response_chunk(chunk, more_body=True)
+        finally:
+            # Release the producer (e.g. an event stream subscription) even
+            # when the client went away before or during the stream.
+            aclose = getattr(body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
         await self._send_response_chunk(b"", more_body=False)
 
     async def _send_response_chunk(
@@ -6,6 +6,8 @@ from .base import BaseConnection
 
 
 class WebSocketConnection(BaseConnection):
+    __slots__ = ("accepted", "closed")
+
     def __init__(self, scope: Scope, receive: ReceiveCallable, send: SendCallable):
         super().__init__(scope, receive, send)
         self.accepted = False
@@ -6,7 +6,7 @@ import time
 from nimbus.applications import NimbusApp
 from nimbus.connections import HttpConnection, WebSocketConnection
 from nimbus.example.routers import admin_router, api_router
-from nimbus.response import HttpResponse, JsonResponse
+from nimbus.response import HttpResponse, JsonResponse, PrecomputedResponse
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +32,15 @@ app.mount("/api", api_router)
 app.mount("/admin", admin_router)
 
 
-@app.get("/")
-async def index(connection: HttpConnection):
-    return HttpResponse("Welcome to the modular Nimbus app!")
+app.add_constant_response(
+    "/", PrecomputedResponse("Welcome to the modular Nimbus app!")
+)
+app.add_constant_response(
+    "/health",
+    PrecomputedResponse(
+        '{"status": "ok"}', headers={"content-type": "application/json"}
+    ),
+)
 
 
 @app.post("/echo")
@@ -8,3 +8,41 @@ class ResponseAlreadyStarted(NimbusException):
 
 class UnsupportedConnectionType(ValueError):
     pass
+
+
+class PoolTimeout(NimbusException):
+    """Exception raised when no pooled resource became available in time."""
+
+
+class PoolClosed(NimbusException):
+    """Exception raised when acquiring from a pool that has been closed."""
+
+
+class ValidationError(NimbusException):
+    """Exception raised when request parameters do not match a handler's signature."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class InvalidRequestBody(NimbusException):
+    """Exception raised when the request body cannot be read or decoded."""
+
+    status_code = 400
+
+
+class RequestEntityTooLarge(InvalidRequestBody):
+    """Exception raised when a request body exceeds the configured size limit."""
+
+    status_code = 413
+
+
+class UnsupportedContentEncoding(InvalidRequestBody):
+    """Exception raised when a request body uses a Content-Encoding we cannot decode."""
+
+    status_code = 415
+
+
+class UpstreamError(NimbusException):
+    """Exception raised when a proxied upstream sends an unusable response."""
@@ -0,0 +1,126 @@
+from typing import Iterator, Mapping, Optional, TypeVar, Union, overload
+
+RawHeaders = list[tuple[bytes, bytes]]
+
+_T = TypeVar("_T")
+
+
+def _encode_name(name: str) -> bytes:
+    return name.lower().encode("latin-1")
+
+
+class Headers(Mapping[str, str]):
+    """Case-insensitive, multi-value view over raw ASGI header pairs.
+
+    Header names are expected lowercased, as the ASGI spec mandates for the
+    scope. Nothing is decoded until it is looked up.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: Optional[RawHeaders] = None):
+        self._raw: RawHeaders = raw if raw is not None else []
+
+    @property
+    def raw(self) -> RawHeaders:
+        return self._raw
+
+    @overload
+    def get(self, key: str) -> Optional[str]: ...
+
+    @overload
+    def get(self, key: str, default: Union[str, _T]) -> Union[str, _T]: ...
+
+    def get(self, key, default=None):
+        name = _encode_name(key)
+        for header_name, header_value in self._raw:
+            if header_name == name:
+                return header_value.decode("latin-1")
+        return default
+
+    def getall(self, key: str) -> list[str]:
+        name = _encode_name(key)
+        return [
+            header_value.decode("latin-1")
+            for header_name, header_value in self._raw
+            if header_name == name
+        ]
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        name = _encode_name(key)
+        return any(header_name == name for header_name, _ in self._raw)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name.decode("latin-1") for name, _ in self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def keys(self) -> list[str]:  # type: ignore[override]
+        return [name.decode("latin-1") for name, _ in self._raw]
+
+    def values(self) -> list[str]:  # type: ignore[override]
+        return [value.decode("latin-1") for _, value in self._raw]
+
+    def items(self) -> list[tuple[str, str]]:  # type: ignore[override]
+        return [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in self._raw
+        ]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Headers):
+            return sorted(self._raw) == sorted(other._raw)
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.items()!r})"
+
+
+class MutableHeaders(Headers):
+    """Headers that can be edited in place, used for responses.
+
+    Names are lowercased on insertion so ``raw`` can be written to the wire
+    as-is.
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, key: str, value: str) -> None:
+        name = _encode_name(key)
+        self._raw[:] = [pair for pair in self._raw if pair[0] != name]
+        self._raw.append((name, value.encode("latin-1")))
+
+    def __delitem__(self, key: str) -> None:
+        name = _encode_name(key)
+        remaining = [pair for pair in self._raw if pair[0] != name]
+        if len(remaining) == len(self._raw):
+            raise KeyError(key)
+        self._raw[:] = remaining
+
+    def append(self, key: str, value: str) -> None:
+        self._raw.append((_encode_name(key), value.encode("latin-1")))
+
+    def setdefault(self, key: str, value: str) -> str:
+        existing = self.get(key)
+        if existing is not None:
+            return existing
+        self.append(key, value)
+        return value
+
+    def update(self, other: Mapping[str, str]) -> None:
+        if isinstance(other, Headers):
+            names = {name for name, _ in other.raw}
+            self._raw[:] = [pair for pair in self._raw if pair[0] not in names]
+            self._raw.extend(other.raw)
+            return
+        for key, value in other.items():
+            self[key] = value
@@ -0,0 +1,308 @@
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MethodType
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from nimbus.connections import BaseConnection, HttpConnection
+from nimbus.response import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Separates positional from keyword arguments in a key, as functools does.
+_KWARGS = object()
+
+
+@dataclass
+class MemoizeStats:
+    hits: int
+    stale_hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    errors: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return (lookups - self.misses) / lookups if lookups else 0.0
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "stale_until")
+
+    def __init__(self, value: Any, expires: float, stale_until: float):
+        self.value = value
+        self.expires = expires
+        self.stale_until = stale_until
+
+
+class Memoized:
+    """An async function whose results are cached; see ``memoize``."""
+
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *,
+        ttl: Optional[float] = None,
+        maxsize: Optional[int] = 1024,
+        stale_ttl: float = 0.0,
+        key: Optional[Callable[..., Hashable]] = None,
+        request_scoped: bool = False,
+    ):
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"memoize needs an async function, got {func!r}")
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.key = key
+        self.request_scoped = request_scoped
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate() and clear() so that calls already running
+        # do not store results computed before the invalidation.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        return self if instance is None else MethodType(self, instance)
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        key = self.make_key(args, kwargs)
+        if self.request_scoped:
+            return await self._call_in_request(key, args, kwargs)
+        # Fresh hits skip the lock: a single dict operation is atomic, and
+        # an entry evicted by another thread meanwhile is still a good value.
+        # The hit counter may then undercount.
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or time.monotonic() < entry.expires):
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                pass
+            self._hits += 1
+            return entry.value
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                now = time.monotonic()
+                if now < entry.expires:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.value
+                if now < entry.stale_until:
+                    self._entries.move_to_end(key)
+                    self._stale_hits += 1
+                    if key not in self._inflight:
+                        loop = asyncio.get_running_loop()
+                        self._start(loop, key, args, kwargs, refresh=True)
+                    return entry.value
+                del self._entries[key]
+            loop = asyncio.get_running_loop()
+            task = self._inflight.get(key)
+            # Tasks belong to one loop; other loop threads compute their own.
+            if task is not None and task.get_loop() is loop:
+                self._coalesced += 1
+            else:
+                self._misses += 1
+                task = self._start(loop, key, args, kwargs, refresh=False)
+        # Shielded so that a cancelled caller does not fail the others.
+        return await asyncio.shield(task)
+
+    def make_key(self, args: tuple, kwargs: dict[str, Any]) -> Hashable:
+        if self.key is not None:
+            return self.key(*args, **kwargs)
+        if self.request_scoped:
+            # Results are kept on the connection, so it is not part of the key.
+            args = tuple(a for a in args if not isinstance(a, BaseConnection))
+            kwargs = {
+                name: value
+                for name, value in kwargs.items()
+                if not isinstance(value, BaseConnection)
+            }
+        else:
+            for arg in (*args, *kwargs.values()) if kwargs else args:
+                if isinstance(arg, BaseConnection):
+                    # Leaving it out would hand one caller's result (their
+                    # user, their query) to every other caller.
+                    raise TypeError(
+                        f"{self.__name__} takes a connection; pass key= to say "
+                        "which parts of the request its result depends on"
+                    )
+        key = args
+        if kwargs:
+            key += (_KWARGS,)
+            for item in sorted(kwargs.items()):
+                key += item
+        return key
+
+    def invalidate(self, *args: Any, **kwargs: Any) -> bool:
+        """Drop the entry for these arguments; True if there was one."""
+        key = self.make_key(args, kwargs)
+        with self._lock:
+            self._generation += 1
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> MemoizeStats:
+        with self._lock:
+            return MemoizeStats(
+                hits=self._hits,
+                stale_hits=self._stale_hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                evictions=self._evictions,
+                errors=self._errors,
+                size=len(self._entries),
+            )
+
+    def _start(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        key: Hashable,
+        args: tuple,
+        kwargs: dict[str, Any],
+        refresh: bool,
+    ) -> asyncio.Task:
+        # Called with the lock held.
+        task = loop.create_task(
+            self._fill(key, args, kwargs, self._generation, refresh)
+        )
+        self._inflight.setdefault(key, task)
+        task.add_done_callback(functools.partial(self._done, key))
+        return task
+
+    async def _fill(
+        self,
+        key: Hashable,
+        args: tuple,
+        kwargs: dict[str, Any],
+        generation: int,
+        refresh: bool,
+    ) -> Any:
+        try:
+            value = await self.func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            if refresh:
+                logger.warning(f"Refreshing {self.__name__}{args!r} failed: {e!r}")
+            raise
+        if isinstance(value, HttpResponse):
+            with self._lock:
+                self._errors += 1
+            raise TypeError(
+                f"{self.__name__} returned a response, which belongs to one "
+                "connection; memoize the data it is built from instead"
+            )
+        now = time.monotonic()
+        expires = math.inf if self.ttl is None else now + self.ttl
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = _Entry(value, expires, expires + self.stale_ttl)
+                self._entries.move_to_end(key)
+                if self.maxsize is not None:
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self._evictions += 1
+        return value
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if not task.cancelled():
+            # Retrieved here so that a failure nobody awaited is not reported
+            # again as "exception was never retrieved".
+            task.exception()
+
+    async def _call_in_request(
+        self, key: Hashable, args: tuple, kwargs: dict[str, Any]
+    ) -> Any:
+        connection = next(
+            (a for a in (*args, *kwargs.values()) if isinstance(a, HttpConnection)),
+            None,
+        )
+        if connection is None:
+            raise TypeError(
+                f"{self.__name__} is request-scoped and needs the connection "
+                "as an argument"
+            )
+        if connection.memo is None:
+            connection.memo = {}
+        slot = (self, key)
+        task = connection.memo.get(slot)
+        with self._lock:
+            if task is None:
+                self._misses += 1
+            elif task.done():
+                self._hits += 1
+            else:
+                self._coalesced += 1
+        if task is None:
+            task = asyncio.ensure_future(self.func(*args, **kwargs))
+            connection.memo[slot] = task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if connection.memo.get(slot) is task:
+                # Failures are not remembered; the next call tries again.
+                del connection.memo[slot]
+                with self._lock:
+                    self._errors += 1
+            raise
+
+
+def memoize(
+    func: Optional[Callable[..., Awaitable[Any]]] = None,
+    *,
+    ttl: Optional[float] = None,
+    maxsize: Optional[int] = 1024,
+    stale_ttl: float = 0.0,
+    key: Optional[Callable[..., Hashable]] = None,
+    request_scoped: bool = False,
+) -> Any:
+    """Cache the results of an async function by its arguments.
+
+    Results live for ``ttl`` seconds (forever if None) in an LRU of at most
+    ``maxsize`` entries. For ``stale_ttl`` seconds after that, callers get
+    the expired value at once while a single background call refreshes it.
+    Concurrent calls with the same key share one call of ``func``.
+    Exceptions are never cached, and neither are responses. A function that
+    takes a connection needs ``key``, computed from the parts of the request
+    its result depends on.
+
+    With ``request_scoped=True`` results are kept on the ``HttpConnection``
+    passed to the function instead, for the lifetime of that request.
+    """
+    options = dict(
+        ttl=ttl,
+        maxsize=maxsize,
+        stale_ttl=stale_ttl,
+        key=key,
+        request_scoped=request_scoped,
+    )
+    if func is not None:
+        return Memoized(func, **options)  # type: ignore[arg-type]
+    return lambda f: Memoized(f, **options)  # type: ignore[arg-type]
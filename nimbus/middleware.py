@@ -2,6 +2,7 @@ from typing import Awaitable, Callable
 
 from nimbus.connections.http import HttpConnection
 from nimbus.response import HttpResponse
+from nimbus.tracing import span
 
 MiddlewareHandlerType = Callable[[], Awaitable[HttpResponse | None]]
 MiddlewareType = Callable[
@@ -14,16 +15,26 @@ class MiddlewareManager:
         self.middlewares: list[MiddlewareType] = []
 
     def add_middleware(self, middleware: MiddlewareType):
-        self.middlewares.append(middleware)
+        # Replaced rather than appended to, so requests already running in
+        # other threads keep the chain they started with.
+        self.middlewares = [*self.middlewares, middleware]
 
     async def apply_middleware(
         self, connection: HttpConnection, handler: MiddlewareHandlerType
     ) -> HttpResponse | None:
+        middlewares = self.middlewares
+
         async def middleware_chain(index: int) -> HttpResponse | None:
-            if index < len(self.middlewares):
-                return await self.middlewares[index](
-                    connection, lambda: middleware_chain(index + 1)
-                )
+            if index < len(middlewares):
+                middleware = middlewares[index]
+                with span(f"middleware {_name(middleware)}"):
+                    return await middleware(
+                        connection, lambda: middleware_chain(index + 1)
+                    )
             return await handler()
 
         return await middleware_chain(0)
+
+
+def _name(middleware: MiddlewareType) -> str:
+    return getattr(middleware, "__name__", type(middleware).__name__)
@@ -0,0 +1,382 @@
+import dataclasses
+import inspect
+import json
+import types
+import typing
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, Union
+from urllib.parse import parse_qsl
+
+from nimbus.exceptions import ValidationError
+from nimbus.response import JsonResponse
+
+Decoder = Callable[[Any, tuple], Any]
+Handler = Callable[..., Awaitable[Any]]
+
+_MISSING = object()
+_TRUE = frozenset(("true", "1", "yes", "on"))
+_FALSE = frozenset(("false", "0", "no", "off"))
+
+
+@dataclasses.dataclass(frozen=True)
+class Query:
+    alias: Optional[str] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Header:
+    alias: Optional[str] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Body:
+    pass
+
+
+def _error(loc: tuple, msg: str) -> dict[str, Any]:
+    return {"loc": list(loc), "msg": msg}
+
+
+class _Invalid(Exception):
+    def __init__(self, errors: list[dict[str, Any]]):
+        self.errors = errors
+
+
+def _optional_inner(annotation: Any) -> tuple[Any, bool]:
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1 and len(args) < len(typing.get_args(annotation)):
+            return args[0], True
+    return annotation, False
+
+
+# -- string values (path, query and header parameters) --
+
+
+def _string_decoder(annotation: Any) -> Decoder:
+    if annotation is str or annotation is inspect.Parameter.empty:
+        return lambda value, loc: value
+    if annotation is bool:
+
+        def decode_bool(value: Any, loc: tuple) -> bool:
+            lowered = str(value).lower()
+            if lowered in _TRUE:
+                return True
+            if lowered in _FALSE:
+                return False
+            raise _Invalid([_error(loc, "value is not a valid boolean")])
+
+        return decode_bool
+    if annotation in (int, float):
+        message = f"value is not a valid {annotation.__name__}"
+
+        def decode_number(value: Any, loc: tuple) -> Any:
+            try:
+                return annotation(value)
+            except (TypeError, ValueError):
+                raise _Invalid([_error(loc, message)]) from None
+
+        return decode_number
+    raise TypeError(f"Unsupported parameter type: {annotation!r}")
+
+
+# -- JSON values (request bodies) --
+
+
+def _json_decoder(annotation: Any) -> Decoder:
+    annotation, optional = _optional_inner(annotation)
+    decoder = _json_decoder_for(annotation)
+    if not optional:
+        return decoder
+    return lambda value, loc: None if value is None else decoder(value, loc)
+
+
+def _json_decoder_for(annotation: Any) -> Decoder:
+    if annotation is Any or annotation is inspect.Parameter.empty:
+        return lambda value, loc: value
+    if dataclasses.is_dataclass(annotation):
+        return _dataclass_decoder(annotation)
+    if annotation is float:
+
+        def decode_float(value: Any, loc: tuple) -> float:
+            if type(value) is float or type(value) is int:
+                return float(value)
+            raise _Invalid([_error(loc, "value is not a valid float")])
+
+        return decode_float
+    if annotation in (str, int, bool):
+        message = f"value is not a valid {annotation.__name__}"
+
+        def decode_exact(value: Any, loc: tuple) -> Any:
+            # ``type() is`` so that JSON booleans are not accepted as ints.
+            if type(value) is annotation:
+                return value
+            raise _Invalid([_error(loc, message)])
+
+        return decode_exact
+    origin = typing.get_origin(annotation)
+    if origin is list:
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        decode_item = _json_decoder(item_type)
+
+        def decode_list(value: Any, loc: tuple) -> list:
+            if type(value) is not list:
+                raise _Invalid([_error(loc, "value is not a valid list")])
+            return [decode_item(item, loc + (i,)) for i, item in enumerate(value)]
+
+        return decode_list
+    if origin is dict or annotation is dict:
+        _, value_type = typing.get_args(annotation) or (str, Any)
+        decode_value = _json_decoder(value_type)
+
+        def decode_dict(value: Any, loc: tuple) -> dict:
+            if type(value) is not dict:
+                raise _Invalid([_error(loc, "value is not a valid object")])
+            return {k: decode_value(v, loc + (k,)) for k, v in value.items()}
+
+        return decode_dict
+    raise TypeError(f"Unsupported body type: {annotation!r}")
+
+
+def _dataclass_decoder(cls: type) -> Decoder:
+    hints = typing.get_type_hints(cls)
+    fields = []
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+        required = (
+            field.default is dataclasses.MISSING
+            and field.default_factory is dataclasses.MISSING
+        )
+        fields.append((field.name, _json_decoder(hints[field.name]), required))
+
+    def decode_dataclass(value: Any, loc: tuple) -> Any:
+        if type(value) is not dict:
+            raise _Invalid([_error(loc, "value is not a valid object")])
+        kwargs = {}
+        errors = []
+        for name, decode, required in fields:
+            item = value.get(name, _MISSING)
+            if item is _MISSING:
+                if required:
+                    errors.append(_error(loc + (name,), "field required"))
+                continue
+            try:
+                kwargs[name] = decode(item, loc + (name,))
+            except _Invalid as e:
+                errors.extend(e.errors)
+        if errors:
+            raise _Invalid(errors)
+        return cls(**kwargs)
+
+    return decode_dataclass
+
+
+# -- handler compilation --
+
+
+@dataclasses.dataclass
+class _Param:
+    name: str
+    source: str  # "path", "query", "header" or "body"
+    key: Any
+    decode: Decoder
+    default: Any
+    many: bool = False
+    scalar: Any = None
+    message: str = ""
+
+
+def _classify(
+    parameter: inspect.Parameter, annotation: Any, path_arguments: set[str]
+) -> _Param:
+    marker = None
+    if typing.get_origin(annotation) is typing.Annotated:
+        annotation, *extras = typing.get_args(annotation)
+        marker = next((m for m in extras if isinstance(m, (Query, Header, Body))), None)
+    default = (
+        _MISSING if parameter.default is inspect.Parameter.empty else parameter.default
+    )
+    inner, optional = _optional_inner(annotation)
+    if optional and default is _MISSING:
+        default = None
+    name = parameter.name
+
+    if name in path_arguments:
+        return _string_param(name, "path", name, inner, default)
+    if isinstance(marker, Body) or (marker is None and dataclasses.is_dataclass(inner)):
+        return _Param(name, "body", None, _json_decoder(annotation), default)
+    if isinstance(marker, Header):
+        key = (marker.alias or name.replace("_", "-")).lower().encode("latin-1")
+        return _string_param(name, "header", key, inner, default)
+    key = marker.alias if isinstance(marker, Query) and marker.alias else name
+    if typing.get_origin(inner) is list:
+        (item_type,) = typing.get_args(inner) or (str,)
+        return _Param(
+            name, "query", key, _string_decoder(item_type), default, many=True
+        )
+    return _string_param(name, "query", key, inner, default)
+
+
+def _string_param(
+    name: str, source: str, key: Any, annotation: Any, default: Any
+) -> _Param:
+    param = _Param(name, source, key, _string_decoder(annotation), default)
+    if annotation is str or annotation is inspect.Parameter.empty:
+        param.scalar = str
+    elif annotation in (int, float):
+        param.scalar = annotation
+        param.message = f"value is not a valid {annotation.__name__}"
+    return param
+
+
+def _parse_query(raw: bytes) -> dict[str, list[str]]:
+    query: dict[str, list[str]] = {}
+    if not raw:
+        return query
+    text = raw.decode()
+    if "%" in text or "+" in text:
+        pairs = parse_qsl(text, keep_blank_values=True)
+    else:
+        # Nothing to unquote, which is the common case.
+        pairs = [pair.partition("=")[::2] for pair in text.split("&") if pair]
+    for key, value in pairs:
+        if key in query:
+            query[key].append(value)
+        else:
+            query[key] = [value]
+    return query
+
+
+def _fill_source(index: int, param: _Param) -> list[str]:
+    """Source lines storing ``value`` into ``kwargs`` for one parameter."""
+    target = f"kwargs[{param.name!r}]"
+    if param.default is _MISSING:
+        missing = f"errors.append(_error(loc{index}, 'field required'))"
+    else:
+        missing = f"{target} = default{index}"
+    if param.source == "body":
+        convert = f"{target} = p{index}.decode(loads(value), loc{index})"
+    elif param.many:
+        convert = (
+            f"{target} = [p{index}.decode(item, loc{index} + (i,)) "
+            "for i, item in enumerate(value)]"
+        )
+    else:
+        convert = f"{target} = p{index}.decode(value, loc{index})"
+    lines = [
+        "if value is _MISSING:",
+        f"    {missing}",
+    ]
+    if param.scalar is str:
+        return lines + ["else:", f"    {target} = value"]
+    if param.scalar in (int, float):
+        # Inline the cast; the decoder is only used to build the error.
+        convert = f"{target} = {param.scalar.__name__}(value)"
+        handled = "(TypeError, ValueError)"
+        error = f"errors.append(_error(loc{index}, {param.message!r}))"
+    else:
+        handled = "_Invalid as e"
+        error = "errors.extend(e.errors)"
+    lines += [
+        "else:",
+        "    try:",
+        f"        {convert}",
+        f"    except {handled}:",
+        f"        {error}",
+    ]
+    if param.source == "body":
+        lines += [
+            "    except ValueError:",
+            "        errors.append(_error(('body',), 'invalid JSON'))",
+        ]
+    return lines
+
+
+def _compile_decoder(
+    handler: Handler, path_arguments: set[str]
+) -> Callable[[Any, dict[str, Any]], Awaitable[dict[str, Any]]]:
+    signature = inspect.signature(handler)
+    hints = typing.get_type_hints(handler, include_extras=True)
+    parameters = list(signature.parameters.values())[1:]  # skip the connection
+    params = []
+    for parameter in parameters:
+        if parameter.kind not in (
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            inspect.Parameter.KEYWORD_ONLY,
+        ):
+            raise TypeError(
+                f"Unsupported parameter {parameter.name!r} in {handler.__name__}"
+            )
+        annotation = hints.get(parameter.name, inspect.Parameter.empty)
+        params.append(_classify(parameter, annotation, path_arguments))
+    if sum(param.source == "body" for param in params) > 1:
+        raise TypeError(f"{handler.__name__} declares more than one body parameter")
+
+    # Generate a straight-line decoder for this signature, in the spirit of
+    # what dataclasses does for __init__, so a request pays for one call
+    # instead of a loop over per-parameter closures.
+    namespace: dict[str, Any] = {
+        "_MISSING": _MISSING,
+        "_Invalid": _Invalid,
+        "_error": _error,
+        "_parse_query": _parse_query,
+        "ValidationError": ValidationError,
+        "loads": json.loads,
+        "wanted_headers": frozenset(
+            param.key for param in params if param.source == "header"
+        ),
+    }
+    body = ["scope = connection.scope", "kwargs = {}", "errors = []"]
+    if any(param.source == "query" for param in params):
+        body.append("query = _parse_query(scope['query_string'])")
+    if namespace["wanted_headers"]:
+        body += [
+            "found = {}",
+            "for name, raw in scope['headers']:",
+            "    name = name.lower()",
+            "    if name in wanted_headers:",
+            "        found[name] = raw.decode('latin-1')",
+        ]
+    for index, param in enumerate(params):
+        namespace[f"p{index}"] = param
+        namespace[f"loc{index}"] = (param.source, param.name)
+        namespace[f"default{index}"] = param.default
+        if param.source == "path":
+            body.append(f"value = path_kwargs.get({param.name!r}, _MISSING)")
+        elif param.source == "query":
+            body.append(f"value = query.get({param.key!r}, _MISSING)")
+            if not param.many:
+                body += ["if value is not _MISSING:", "    value = value[-1]"]
+        elif param.source == "header":
+            body.append(f"value = found.get({param.key!r}, _MISSING)")
+        else:
+            body.append("value = await connection.get_body() or _MISSING")
+        body += _fill_source(index, param)
+    body += ["if errors:", "    raise ValidationError(errors)", "return kwargs"]
+    source = "async def decode(connection, path_kwargs):\n" + "\n".join(
+        "    " + line for line in body
+    )
+    exec(compile(source, f"<decoder {handler.__qualname__}>", "exec"), namespace)
+    return namespace["decode"]
+
+
+def compile_handler(handler: Handler, path_arguments: set[str]) -> Handler:
+    """Wrap ``handler`` so that its arguments are decoded from its signature.
+
+    The signature is inspected once here. Parameters named like a rule
+    argument come from the path, dataclasses and ``Annotated[..., Body()]``
+    from the JSON body, ``Annotated[..., Header()]`` from request headers and
+    everything else from the query string. Invalid requests get a 422.
+    """
+    decode = _compile_decoder(handler, path_arguments)
+
+    @wraps(handler)
+    async def typed_handler(connection: Any, **path_kwargs: Any) -> Any:
+        try:
+            kwargs = await decode(connection, path_kwargs)
+        except ValidationError as e:
+            return JsonResponse({"detail": e.errors}, status_code=422)
+        return await handler(connection, **kwargs)
+
+    return typed_handler
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Generic, Optional, TypeVar
+
+from nimbus.exceptions import PoolClosed, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    max_size: int
+    acquired: int
+    created: int
+    destroyed: int
+    timeouts: int
+    failed_checks: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def utilization(self) -> float:
+        return self.in_use / self.max_size if self.max_size else 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class _PooledResource(Generic[T]):
+    __slots__ = ("resource", "created_at", "last_used")
+
+    def __init__(self, resource: T, now: float):
+        self.resource = resource
+        self.created_at = now
+        self.last_used = now
+
+
+class ResourcePool(Generic[T]):
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        close: Optional[Callable[[T], Awaitable[None]]] = None,
+        check: Optional[Callable[[T], Awaitable[bool]]] = None,
+        min_size: int = 0,
+        max_size: int = 10,
+        acquire_timeout: Optional[float] = None,
+        max_idle: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size")
+        self.factory = factory
+        self.close_resource = close
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.closed = False
+        self._size = 0
+        self._idle: deque[_PooledResource[T]] = deque()
+        self._in_use: dict[int, _PooledResource[T]] = {}
+        self._waiters: deque[asyncio.Future[Optional[_PooledResource[T]]]] = deque()
+        self._reaper: Optional[asyncio.Task] = None
+        self._acquired = 0
+        self._created = 0
+        self._destroyed = 0
+        self._timeouts = 0
+        self._failed_checks = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def open(self) -> None:
+        self.closed = False
+        await self._fill()
+        interval = min(
+            (limit for limit in (self.max_idle, self.max_lifetime) if limit),
+            default=None,
+        )
+        if interval and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap(interval / 2))
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(PoolClosed("Pool closed"))
+        while self._idle:
+            await self._destroy(self._idle.popleft())
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[T]:
+        resource = await self.get()
+        try:
+            yield resource
+        except BaseException:
+            await self.release(resource, discard=True)
+            raise
+        else:
+            await self.release(resource)
+
+    async def get(self) -> T:
+        if self.closed:
+            raise PoolClosed("Pool closed")
+        started = time.monotonic()
+        item: Optional[_PooledResource[T]] = None
+        reserved = False
+        while item is None:
+            if not reserved and not self._waiters:
+                item = await self._pop_idle(started)
+                if item is None and self._size < self.max_size:
+                    self._size += 1
+                    reserved = True
+            if item is None and not reserved:
+                item = await self._wait(started)
+                reserved = item is None
+            if item is not None and not await self._healthy(item):
+                await self._destroy(item, keep_slot=True)
+                item, reserved = None, True
+            if reserved and item is None:
+                item = await self._create()
+                reserved = False
+
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        self._in_use[id(item.resource)] = item
+        return item.resource
+
+    async def release(self, resource: T, *, discard: bool = False) -> None:
+        item = self._in_use.pop(id(resource), None)
+        if item is None:
+            raise ValueError("Resource does not belong to this pool")
+        now = time.monotonic()
+        if discard or self.closed or self._expired(item, now):
+            await self._destroy(item)
+            return
+        item.last_used = now
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(item)
+                return
+        self._idle.append(item)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self._size,
+            idle=len(self._idle),
+            in_use=len(self._in_use),
+            waiting=len(self._waiters),
+            max_size=self.max_size,
+            acquired=self._acquired,
+            created=self._created,
+            destroyed=self._destroyed,
+            timeouts=self._timeouts,
+            failed_checks=self._failed_checks,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+        )
+
+    async def _pop_idle(self, now: float) -> Optional[_PooledResource[T]]:
+        while self._idle:
+            item = self._idle.pop()
+            if not self._expired(item, now):
+                return item
+            await self._destroy(item)
+        return None
+
+    async def _wait(self, started: float) -> Optional[_PooledResource[T]]:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None
+        if self.acquire_timeout is not None:
+            timeout = max(0.0, self.acquire_timeout - (time.monotonic() - started))
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as err:
+            if waiter.done() and not waiter.cancelled() and not waiter.exception():
+                self._return_handoff(waiter.result())
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(err, asyncio.TimeoutError):
+                self._timeouts += 1
+                raise PoolTimeout(
+                    f"Timed out after {self.acquire_timeout}s waiting for a resource"
+                ) from None
+            raise
+
+    def _return_handoff(self, item: Optional[_PooledResource[T]]) -> None:
+        if item is not None:
+            self._in_use[id(item.resource)] = item
+            asyncio.ensure_future(self.release(item.resource))
+        else:
+            self._free_slot()
+
+    async def _healthy(self, item: _PooledResource[T]) -> bool:
+        if self.check is None:
+            return True
+        try:
+            healthy = await self.check(item.resource)
+        except Exception as err:
+            logger.warning(f"Pool health check raised: {str(err)}")
+            healthy = False
+        if not healthy:
+            self._failed_checks += 1
+        return healthy
+
+    async def _create(self) -> _PooledResource[T]:
+        try:
+            resource = await self.factory()
+        except BaseException:
+            self._free_slot()
+            raise
+        self._created += 1
+        return _PooledResource(resource, time.monotonic())
+
+    async def _destroy(self, item: _PooledResource[T], keep_slot: bool = False) -> None:
+        self._destroyed += 1
+        if not keep_slot:
+            self._free_slot()
+        if self.close_resource is not None:
+            try:
+                await self.close_resource(item.resource)
+            except Exception as err:
+                logger.warning(f"Error closing pooled resource: {str(err)}")
+
+    def _free_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._size -= 1
+
+    def _expired(self, item: _PooledResource[T], now: float) -> bool:
+        if self.max_lifetime is not None and now - item.created_at > self.max_lifetime:
+            return True
+        return self.max_idle is not None and now - item.last_used > self.max_idle
+
+    async def _fill(self) -> None:
+        while self._size < self.min_size and not self.closed:
+            self._size += 1
+            self._idle.appendleft(await self._create())
+
+    async def _reap(self, interval: float) -> None:
+        while not self.closed:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            expired = [item for item in self._idle if self._expired(item, now)]
+            for item in expired:
+                self._idle.remove(item)
+            for item in expired:
+                await self._destroy(item)
+            try:
+                await self._fill()
+            except Exception as err:
+                logger.warning(f"Failed to replenish pool: {str(err)}")
@@ -0,0 +1,561 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+from nimbus.connections import HttpConnection
+from nimbus.exceptions import PoolClosed, PoolTimeout, UpstreamError
+from nimbus.headers import MutableHeaders
+from nimbus.pool import PoolStats, ResourcePool
+from nimbus.response import HttpResponse, StreamingResponse
+from nimbus.router import Router
+from nimbus.tracing import current_traceparent, span
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 65536
+
+HOP_BY_HOP = frozenset(
+    {
+        b"connection",
+        b"keep-alive",
+        b"proxy-authenticate",
+        b"proxy-authorization",
+        b"proxy-connection",
+        b"te",
+        b"trailer",
+        b"transfer-encoding",
+        b"upgrade",
+    }
+)
+
+# Methods that may be sent again when a reused connection fails before the
+# upstream answers (RFC 9110, section 9.2.2).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"})
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half-open"
+
+
+def _hop_by_hop(headers: list[tuple[bytes, bytes]]) -> frozenset[bytes]:
+    nominated = {
+        token.strip().lower()
+        for name, value in headers
+        if name == b"connection"
+        for token in value.split(b",")
+    }
+    return HOP_BY_HOP | nominated
+
+
+class UpstreamConnection:
+    __slots__ = ("reader", "writer", "requests")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+
+@dataclass
+class UpstreamStats:
+    address: str
+    state: str
+    outstanding: int
+    requests: int
+    failures: int
+    consecutive_failures: int
+    pool: PoolStats
+
+
+class Upstream:
+    """One backend of a ``ProxyRouter`` with its own keep-alive pool.
+
+    Failures are observed passively from proxied traffic. After
+    ``max_failures`` consecutive failures the circuit opens and the upstream
+    gets no traffic for ``cooldown`` seconds; then a single trial request
+    decides whether it closes again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_connections: int = 32,
+        max_idle: float = 60.0,
+        connect_timeout: float = 5.0,
+        pool_timeout: float = 5.0,
+        max_failures: int = 5,
+        cooldown: float = 10.0,
+    ):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Upstream must be an http:// URL, got {url!r}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.address = f"{self.host}:{self.port}"
+        self.connect_timeout = connect_timeout
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.state = CIRCUIT_CLOSED
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self._open_until = 0.0
+        self.pool: ResourcePool[UpstreamConnection] = ResourcePool(
+            self._connect,
+            close=self._disconnect,
+            check=self._alive,
+            max_size=max_connections,
+            acquire_timeout=pool_timeout,
+            max_idle=max_idle,
+        )
+
+    async def _connect(self) -> UpstreamConnection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout
+        )
+        return UpstreamConnection(reader, writer)
+
+    async def _disconnect(self, conn: UpstreamConnection) -> None:
+        conn.writer.close()
+
+    async def _alive(self, conn: UpstreamConnection) -> bool:
+        # An idle keep-alive connection the upstream closed has seen EOF.
+        return not conn.reader.at_eof() and not conn.writer.is_closing()
+
+    def available(self, now: float) -> bool:
+        if self.state == CIRCUIT_OPEN:
+            if now < self._open_until:
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+        if self.state == CIRCUIT_HALF_OPEN:
+            return self.outstanding == 0
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != CIRCUIT_CLOSED:
+            logger.info(f"Upstream {self.address} recovered; closing circuit")
+            self.state = CIRCUIT_CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if (
+            self.state == CIRCUIT_HALF_OPEN
+            or self.consecutive_failures >= self.max_failures
+        ):
+            if self.state != CIRCUIT_OPEN:
+                logger.warning(
+                    f"Opening circuit for upstream {self.address} for "
+                    f"{self.cooldown}s after {self.consecutive_failures} failure(s)"
+                )
+            self.state = CIRCUIT_OPEN
+            self._open_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> UpstreamStats:
+        return UpstreamStats(
+            address=self.address,
+            state=self.state,
+            outstanding=self.outstanding,
+            requests=self.requests,
+            failures=self.failures,
+            consecutive_failures=self.consecutive_failures,
+            pool=self.pool.stats(),
+        )
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+class _UpstreamBody:
+    """Relays an upstream response body and returns the connection after it.
+
+    A class rather than an async generator so that ``aclose`` releases the
+    connection even when the body was never iterated, and so that a body
+    dropped without even that (say, a middleware replaced the response)
+    still gives the connection back when it is collected.
+    """
+
+    __slots__ = (
+        "loop",
+        "upstream",
+        "conn",
+        "remaining",
+        "chunked",
+        "chunk_left",
+        "keep_alive",
+        "timeout",
+        "done",
+    )
+
+    def __init__(
+        self,
+        upstream: Upstream,
+        conn: UpstreamConnection,
+        length: Optional[int],
+        chunked: bool,
+        keep_alive: bool,
+        timeout: float,
+    ):
+        self.loop = asyncio.get_running_loop()
+        self.upstream = upstream
+        self.conn = conn
+        self.remaining = length
+        self.chunked = chunked
+        self.chunk_left = 0
+        # Without framing the body runs to EOF and the connection is spent.
+        self.keep_alive = keep_alive and (chunked or length is not None)
+        self.timeout = timeout
+        self.done = False
+
+    def __aiter__(self) -> "_UpstreamBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.done:
+            raise StopAsyncIteration
+        try:
+            async with asyncio.timeout(self.timeout):
+                chunk = await self._read()
+        except Exception as e:
+            logger.warning(f"Upstream {self.upstream.address} body failed: {e!r}")
+            self.upstream.record_failure()
+            await self._finish(reusable=False)
+            raise
+        if not chunk:
+            await self._finish(reusable=self.keep_alive)
+            raise StopAsyncIteration
+        return chunk
+
+    async def _read(self) -> bytes:
+        reader = self.conn.reader
+        if self.chunked:
+            return await self._read_chunk(reader)
+        if self.remaining is None:
+            return await reader.read(READ_SIZE)
+        if self.remaining == 0:
+            return b""
+        data = await reader.read(min(self.remaining, READ_SIZE))
+        if not data:
+            raise UpstreamError("Upstream closed before the end of the body")
+        self.remaining -= len(data)
+        return data
+
+    async def _read_chunk(self, reader: asyncio.StreamReader) -> bytes:
+        if self.chunk_left == 0:
+            line = await reader.readline()
+            try:
+                size = int(line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise UpstreamError(f"Invalid chunk size line {line!r}") from None
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers are dropped
+                return b""
+            self.chunk_left = size
+        data = await reader.read(min(self.chunk_left, READ_SIZE))
+        if not data:
+            raise UpstreamError("Upstream closed before the end of a chunk")
+        self.chunk_left -= len(data)
+        if self.chunk_left == 0:
+            await reader.readexactly(2)
+        return data
+
+    async def _finish(self, reusable: bool) -> None:
+        if self.done:
+            return
+        self.done = True
+        self.upstream.outstanding -= 1
+        await self.upstream.pool.release(self.conn, discard=not reusable)
+
+    async def aclose(self) -> None:
+        # The client went away before the body was read to the end.
+        await self._finish(reusable=False)
+
+    def __del__(self) -> None:
+        if self.done:
+            return
+        self.done = True
+        try:
+            self.loop.call_soon_threadsafe(_abandon, self.upstream, self.conn)
+        except RuntimeError:
+            pass  # the loop is closed, and the pool with it
+
+
+_abandoned: set[asyncio.Task] = set()
+
+
+def _abandon(upstream: Upstream, conn: UpstreamConnection) -> None:
+    upstream.outstanding -= 1
+    task = asyncio.ensure_future(upstream.pool.release(conn, discard=True))
+    _abandoned.add(task)
+    task.add_done_callback(_abandoned.discard)
+
+
+class ProxyRouter(Router):
+    """Forwards every request under its mount prefix to a set of upstreams.
+
+    Bodies are streamed in both directions with backpressure. Requests go to
+    the available upstream with the fewest outstanding requests. Connecting
+    or reading failures answer 502, timeouts 504, and 503 when every
+    upstream's circuit is open.
+    """
+
+    loop_bound = True
+
+    def __init__(
+        self,
+        upstreams: Sequence[Union[str, Upstream]],
+        *,
+        timeout: float = 30.0,
+        strip_prefix: bool = True,
+        preserve_host: bool = False,
+        failure_statuses: Sequence[int] = (502, 503, 504),
+        **upstream_options,
+    ):
+        super().__init__()
+        if not upstreams:
+            raise ValueError("ProxyRouter needs at least one upstream")
+        self.upstreams = [
+            u if isinstance(u, Upstream) else Upstream(u, **upstream_options)
+            for u in upstreams
+        ]
+        self.timeout = timeout
+        self.strip_prefix = strip_prefix
+        self.preserve_host = preserve_host
+        self.failure_statuses = frozenset(failure_statuses)
+        self._next = 0
+
+    def choose(self) -> Optional[Upstream]:
+        now = time.monotonic()
+        count = len(self.upstreams)
+        best: Optional[Upstream] = None
+        # Start after the last pick so ties rotate between upstreams.
+        for i in range(count):
+            upstream = self.upstreams[(self._next + i) % count]
+            if upstream.available(now) and (
+                best is None or upstream.outstanding < best.outstanding
+            ):
+                best = upstream
+        if best is not None:
+            self._next = (self.upstreams.index(best) + 1) % count
+        return best
+
+    async def _handle_http_connection(
+        self, connection: HttpConnection
+    ) -> Optional[HttpResponse]:
+        connection.scope["route"] = (self.prefix or "") + "/*"
+        upstream = self.choose()
+        if upstream is None:
+            return _error(503, "Service Unavailable")
+        upstream.outstanding += 1
+        upstream.requests += 1
+        try:
+            with span(f"proxy {upstream.address}"):
+                return await self._forward(upstream, connection)
+        except asyncio.TimeoutError:
+            logger.warning(f"Upstream {upstream.address} timed out")
+            upstream.outstanding -= 1
+            upstream.record_failure()
+            return _error(504, "Gateway Timeout")
+        except (OSError, UpstreamError, PoolTimeout, PoolClosed) as e:
+            logger.warning(f"Upstream {upstream.address} failed: {e!r}")
+            upstream.outstanding -= 1
+            upstream.record_failure()
+            return _error(502, "Bad Gateway")
+        except BaseException:
+            upstream.outstanding -= 1
+            raise
+
+    async def _forward(
+        self, upstream: Upstream, connection: HttpConnection
+    ) -> StreamingResponse:
+        head, has_body, chunked = self._request_head(upstream, connection)
+        method = connection.scope["method"]
+        retryable = not has_body and method in IDEMPOTENT_METHODS
+        while True:
+            conn = await upstream.pool.get()
+            reused = conn.requests > 0
+            conn.requests += 1
+            try:
+                async with asyncio.timeout(self.timeout):
+                    await self._send_request(conn, connection, head, has_body, chunked)
+                async with asyncio.timeout(self.timeout):
+                    status, headers = await _read_response_head(conn.reader)
+            except asyncio.TimeoutError:
+                await upstream.pool.release(conn, discard=True)
+                raise
+            except (OSError, asyncio.IncompleteReadError, UpstreamError) as e:
+                await upstream.pool.release(conn, discard=True)
+                answered = isinstance(e, UpstreamError) or (
+                    isinstance(e, asyncio.IncompleteReadError) and e.partial
+                )
+                if reused and retryable and not answered:
+                    # Most likely the upstream closed an idle keep-alive
+                    # connection. It may still have processed the request,
+                    # so only idempotent ones are sent again.
+                    logger.debug(f"Retrying on a new connection after {e!r}")
+                    continue
+                if isinstance(e, asyncio.IncompleteReadError):
+                    raise UpstreamError("Upstream closed the connection") from e
+                raise
+            except BaseException:
+                await upstream.pool.release(conn, discard=True)
+                raise
+            break
+
+        if status in self.failure_statuses:
+            upstream.record_failure()
+        else:
+            upstream.record_success()
+        drop = _hop_by_hop(headers)
+        response_headers = MutableHeaders(
+            [(name, value) for name, value in headers if name not in drop]
+        )
+        length = None
+        names = {name for name, _ in headers}
+        if method == "HEAD" or status in (204, 304):
+            length = 0
+        elif b"content-length" in names:
+            length = int(response_headers["content-length"])
+        keep_alive = not any(
+            name == b"connection" and b"close" in value.lower()
+            for name, value in headers
+        )
+        body = _UpstreamBody(
+            upstream,
+            conn,
+            length,
+            length is None and b"transfer-encoding" in names,
+            keep_alive,
+            self.timeout,
+        )
+        return StreamingResponse(body, status_code=status, headers=response_headers)
+
+    def _request_head(
+        self, upstream: Upstream, connection: HttpConnection
+    ) -> tuple[bytes, bool, bool]:
+        scope = connection.scope
+        target = scope.get("raw_path") or scope["path"].encode()
+        prefix = self.prefix.encode()
+        if self.strip_prefix and prefix and target.startswith(prefix):
+            target = target[len(prefix) :] or b"/"
+        if scope.get("query_string"):
+            target += b"?" + scope["query_string"]
+        raw = connection.headers.raw
+        drop = _hop_by_hop(raw) | {b"host", b"x-forwarded-for"}
+        lines = [
+            b"%s %s HTTP/1.1\r\n" % (scope["method"].encode(), target),
+            b"host: %s\r\n"
+            % (
+                connection.headers.get("host", upstream.address).encode("latin-1")
+                if self.preserve_host
+                else upstream.address.encode()
+            ),
+        ]
+        lines += [b"%s: %s\r\n" % pair for pair in raw if pair[0] not in drop]
+        client = scope.get("client")
+        forwarded = connection.headers.getall("x-forwarded-for")
+        if client:
+            forwarded.append(str(client[0]))
+        if forwarded:
+            lines.append(b"x-forwarded-for: %s\r\n" % ", ".join(forwarded).encode())
+        if "x-forwarded-proto" not in connection.headers:
+            lines.append(
+                b"x-forwarded-proto: %s\r\n" % scope.get("scheme", "http").encode()
+            )
+        if (
+            "host" in connection.headers
+            and "x-forwarded-host" not in connection.headers
+        ):
+            lines.append(
+                b"x-forwarded-host: %s\r\n" % connection.headers["host"].encode()
+            )
+        traceparent = current_traceparent()
+        if traceparent is not None and "traceparent" not in connection.headers:
+            lines.append(b"traceparent: %s\r\n" % traceparent.encode())
+
+        content_length = connection.headers.get("content-length")
+        has_body = content_length is not None and content_length != "0"
+        # HTTP/2 bodies need not declare a length; re-frame them as chunked.
+        chunked = (
+            content_length is None
+            and scope.get("http_version") == "2"
+            and scope["method"] not in ("GET", "HEAD")
+        )
+        if chunked:
+            lines.append(b"transfer-encoding: chunked\r\n")
+            has_body = True
+        lines.append(b"\r\n")
+        return b"".join(lines), has_body, chunked
+
+    async def _send_request(
+        self,
+        conn: UpstreamConnection,
+        connection: HttpConnection,
+        head: bytes,
+        has_body: bool,
+        chunked: bool,
+    ) -> None:
+        writer = conn.writer
+        writer.write(head)
+        if has_body:
+            async for chunk in connection.stream_body(READ_SIZE, decode=False):
+                if chunked:
+                    writer.writelines((b"%x\r\n" % len(chunk), chunk, b"\r\n"))
+                else:
+                    writer.write(chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def stats(self) -> list[UpstreamStats]:
+        return [upstream.stats() for upstream in self.upstreams]
+
+    async def close(self) -> None:
+        for upstream in self.upstreams:
+            await upstream.close()
+
+
+async def _read_response_head(
+    reader: asyncio.StreamReader,
+) -> tuple[int, list[tuple[bytes, bytes]]]:
+    while True:
+        try:
+            raw = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError as e:
+            raise UpstreamError("Upstream response head is too large") from e
+        status_line, *lines = raw[:-4].split(b"\r\n")
+        parts = status_line.split(b" ", 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/1."):
+            raise UpstreamError(f"Invalid upstream status line {status_line!r}")
+        try:
+            status = int(parts[1])
+        except ValueError:
+            raise UpstreamError(f"Invalid upstream status {parts[1]!r}") from None
+        if 100 <= status < 200 and status != 101:
+            continue  # interim responses such as 100 Continue
+        if status == 101:
+            raise UpstreamError("Upstream tried to switch protocols")
+        headers = []
+        for line in lines:
+            name, _, value = line.partition(b":")
+            headers.append((name.strip().lower(), value.strip()))
+        if parts[0] == b"HTTP/1.0" and not any(
+            name == b"connection" and b"keep-alive" in value.lower()
+            for name, value in headers
+        ):
+            headers.append((b"connection", b"close"))
+        return status, headers
+
+
+def _error(status: int, message: str) -> HttpResponse:
+    return HttpResponse(
+        message, status_code=status, headers={"Content-Type": "text/plain"}
+    )
@@ -0,0 +1,120 @@
+import math
+import threading
+import time
+from array import array
+from typing import Callable, Optional
+
+from nimbus.connections import HttpConnection
+from nimbus.middleware import MiddlewareHandlerType
+from nimbus.response import HttpResponse
+
+KeyFunc = Callable[[HttpConnection], Optional[str]]
+
+
+def client_address(connection: HttpConnection) -> Optional[str]:
+    client = connection.scope.get("client")
+    return client[0] if client else None
+
+
+def header_key(name: str) -> KeyFunc:
+    def key(connection: HttpConnection) -> Optional[str]:
+        return connection.headers.get(name)
+
+    return key
+
+
+def route_key(connection: HttpConnection) -> Optional[str]:
+    return f"{connection.scope['method']} {connection.scope['path']}"
+
+
+class RateLimitTable:
+    """GCRA limiter state in a fixed-size, set-associative table.
+
+    Each key hashes to a set of ``ways`` slots holding the key hash and its
+    theoretical arrival time (TAT). When a set is full the slot with the
+    oldest TAT is reused, which approximates LRU and only ever forgets
+    clients whose bucket has (nearly) refilled. Memory stays at 16 bytes
+    per slot no matter how many distinct keys are seen. ``acquire`` holds a
+    lock, so one table can serve several event loop threads.
+    """
+
+    __slots__ = ("interval", "tolerance", "ways", "sets", "_hashes", "_tats", "_lock")
+
+    def __init__(self, rate: float, burst: int, capacity: int = 65536, ways: int = 4):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.interval = 1.0 / rate
+        self.tolerance = self.interval * burst
+        self.ways = ways
+        self.sets = max(1, capacity // ways)
+        self._hashes = array("q", [0]) * (self.sets * ways)
+        self._tats = array("d", [0.0]) * (self.sets * ways)
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token for ``key``; return 0.0 if allowed, else seconds to wait."""
+        if now is None:
+            now = time.monotonic()
+        key_hash = hash(key)
+        base = (key_hash % self.sets) * self.ways
+        end = base + self.ways
+        tats = self._tats
+        with self._lock:
+            try:
+                slot = base + self._hashes[base:end].index(key_hash)
+            except ValueError:
+                candidates = tats[base:end]
+                slot = base + candidates.index(min(candidates))
+                self._hashes[slot] = key_hash
+                tats[slot] = 0.0
+
+            tat = tats[slot]
+            tat = (tat if tat > now else now) + self.interval
+            if tat - now > self.tolerance:
+                return tat - self.tolerance - now
+            tats[slot] = tat
+            return 0.0
+
+    @property
+    def nbytes(self) -> int:
+        hashes, tats = self._hashes, self._tats
+        return hashes.itemsize * len(hashes) + tats.itemsize * len(tats)
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[int] = None,
+        *,
+        period: float = 1.0,
+        key: KeyFunc = client_address,
+        capacity: int = 65536,
+    ):
+        self.table = RateLimitTable(
+            rate / period, burst or max(1, math.ceil(rate)), capacity
+        )
+        self.key = key
+
+    async def __call__(
+        self, connection: HttpConnection, next_middleware: MiddlewareHandlerType
+    ) -> Optional[HttpResponse]:
+        # The app runs middleware once per router it tries; only the first
+        # pass takes a token.
+        charged = connection.scope.setdefault("ratelimited", set())
+        if self in charged:
+            return await next_middleware()
+        charged.add(self)
+        key = self.key(connection)
+        if key is not None:
+            retry_after = self.table.acquire(key)
+            if retry_after:
+                return HttpResponse(
+                    "Too Many Requests",
+                    headers={
+                        "content-type": "text/plain",
+                        "retry-after": str(math.ceil(retry_after)),
+                    },
+                    status_code=429,
+                )
+        return await next_middleware()
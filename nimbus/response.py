@@ -1,22 +1,52 @@
+import asyncio
 import json
-from typing import Any, Optional, Union
+from http import HTTPStatus
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    Union,
+)
 
+from nimbus.background import BackgroundTask
 from nimbus.connections import HttpConnection
+from nimbus.headers import MutableHeaders
+
+STATUS_LINES: dict[int, bytes] = {
+    status.value: b"HTTP/1.1 %d %s\r\n" % (status.value, status.phrase.encode())
+    for status in HTTPStatus
+}
+
+
+def status_line(status: int) -> bytes:
+    line = STATUS_LINES.get(status)
+    if line is None:
+        line = b"HTTP/1.1 %d \r\n" % status
+    return line
 
 
 class HttpResponse:
+    __slots__ = ("body", "connection", "status_code", "headers", "background")
+
     def __init__(
         self,
         body: Union[bytes, str] = b"",
         connection: Optional[HttpConnection] = None,
         *,
         status_code: int = 200,
-        headers: dict[str, str] = {},
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
     ):
         self.body = body
         self.connection = connection
         self.status_code = status_code
-        self.headers = headers
+        self.headers = headers if headers is not None else {}
+        self.background = background
 
     def __await__(self):
         if not self.connection:
@@ -27,13 +57,182 @@ class HttpResponse:
 
 
 class JsonResponse(HttpResponse):
+    __slots__ = ()
+
     def __init__(
         self, data: Any, connection: Optional[HttpConnection] = None, *args, **kwargs
     ):
         body = json.dumps(data)
-        headers = kwargs.get("headers")
-        if headers is None:
-            headers = {}
+        headers = MutableHeaders()
+        headers.update(kwargs.get("headers") or {})
         headers["content-type"] = "application/json"
         kwargs["headers"] = headers
         super().__init__(body, connection, *args, **kwargs)
+
+
+class StreamingResponse(HttpResponse):
+    __slots__ = ()
+
+    def __init__(
+        self,
+        body: AsyncIterable[Union[bytes, str]],
+        connection: Optional[HttpConnection] = None,
+        *,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        super().__init__(
+            b"",
+            connection,
+            status_code=status_code,
+            headers=headers,
+            background=background,
+        )
+        self.body = body  # type: ignore[assignment]
+
+    def __await__(self):
+        if not self.connection:
+            raise ValueError("No connection")
+        return self.connection.stream_response(
+            self.status_code,
+            self.body,  # type: ignore[arg-type]
+            self.headers,
+        ).__await__()
+
+
+class _JsonBatcher:
+    __slots__ = ("encode", "array", "chunk_size", "batch", "limit", "started")
+
+    def __init__(self, encode: Callable[[Any], str], array: bool, chunk_size: int):
+        self.encode = encode
+        self.array = array
+        self.chunk_size = chunk_size
+        self.batch: list[Any] = []
+        # A small first batch gets the first bytes out quickly.
+        self.limit = 16
+        self.started = False
+
+    def add(self, item: Any) -> Optional[bytes]:
+        self.batch.append(item)
+        if len(self.batch) >= self.limit:
+            return self.flush()
+        return None
+
+    def flush(self) -> bytes:
+        batch, self.batch = self.batch, []
+        if self.array:
+            # One encoder call per batch is much cheaper than one per item.
+            body = (", " if self.started else "[") + self.encode(batch)[1:-1]
+        else:
+            body = "\n".join(map(self.encode, batch)) + "\n"
+        self.started = True
+        # Size the next batch so that it encodes to about chunk_size bytes.
+        self.limit = max(1, len(batch) * self.chunk_size // len(body))
+        return body.encode("utf-8")
+
+    def finish(self) -> bytes:
+        body = self.flush() if self.batch else b""
+        if self.array:
+            return body + b"]" if self.started else b"[]"
+        return body
+
+
+class JsonStreamingResponse(StreamingResponse):
+    """Serializes the items of a sync or async iterable as they are consumed.
+
+    ``format="ndjson"`` writes one JSON document per line and ``"array"`` a
+    single JSON array. Items are batched into writes of about ``chunk_size``
+    bytes, sized from the previous batch, and the next batch is only built
+    once the previous write has drained, so memory stays at roughly one
+    batch however many items there are. Sync iterables are consumed on the
+    event loop.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        connection: Optional[HttpConnection] = None,
+        *,
+        format: Literal["ndjson", "array"] = "ndjson",
+        chunk_size: int = 65536,
+        default: Optional[Callable[[Any], Any]] = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        if format not in ("ndjson", "array"):
+            raise ValueError(f"Unknown JSON stream format {format!r}")
+        response_headers = MutableHeaders()
+        response_headers.update(headers or {})
+        response_headers["content-type"] = (
+            "application/json" if format == "array" else "application/x-ndjson"
+        )
+        encode = json.JSONEncoder(default=default).encode
+        super().__init__(
+            self._stream(items, _JsonBatcher(encode, format == "array", chunk_size)),
+            connection,
+            status_code=status_code,
+            headers=response_headers,
+            background=background,
+        )
+
+    @staticmethod
+    async def _stream(
+        items: Union[Iterable[Any], AsyncIterable[Any]], batcher: _JsonBatcher
+    ) -> AsyncIterator[bytes]:
+        if isinstance(items, AsyncIterable):
+            try:
+                async for item in items:
+                    chunk = batcher.add(item)
+                    if chunk is not None:
+                        yield chunk
+            finally:
+                aclose = getattr(items, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        else:
+            for item in items:
+                chunk = batcher.add(item)
+                if chunk is not None:
+                    yield chunk
+                    # A draining write does not yield to the loop; let other
+                    # connections run between batches.
+                    await asyncio.sleep(0)
+        tail = batcher.finish()
+        if tail:
+            yield tail
+
+
+class PrecomputedResponse(HttpResponse):
+    """A constant response whose body and headers are encoded once.
+
+    ``status_line`` and ``wire_tail`` hold the serialized HTTP/1.1 response,
+    minus the ``Date``/``Server`` headers which the writer adds from its
+    per-second cache, so the server can write it without building events.
+    """
+
+    __slots__ = ("status_line", "wire_tail")
+
+    def __init__(
+        self,
+        body: Union[bytes, str] = b"",
+        *,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        response_headers = MutableHeaders()
+        response_headers.update(headers or {})
+        response_headers.setdefault("content-type", "text/plain; charset=utf-8")
+        response_headers["content-length"] = str(len(body))
+        super().__init__(body, status_code=status_code, headers=response_headers)
+        self.status_line = status_line(status_code)
+        self.wire_tail = (
+            b"".join(b"%s: %s\r\n" % pair for pair in response_headers.raw)
+            + b"\r\n"
+            + body
+        )
@@ -1,10 +1,13 @@
 import logging
+import threading
 from typing import Any, Callable, Optional, Type
 
 from werkzeug.routing import Map, MapAdapter, Rule
 
 from nimbus.connections import BaseConnection, HttpConnection, WebSocketConnection
+from nimbus.params import compile_handler
 from nimbus.response import HttpResponse
+from nimbus.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -14,25 +17,36 @@ class Router:
         HttpConnection: "_handle_http_connection",
         WebSocketConnection: "_handle_websocket_connection",
     }
+    # True for routers holding asyncio resources of the loop that first used
+    # them; NimbusServer refuses to share those between event loop threads.
+    loop_bound = False
 
-    def __init__(self):
+    def __init__(self, typed: bool = False):
+        self.typed = typed
         self.url_map = Map()
         self.handlers: dict[str, Callable] = {}
         self.websocket_handlers: dict[str, Callable] = {}
         self.prefix: str = ""
+        self._lock = threading.Lock()
+        self._published = False
 
-    def get(self, rule: str):
-        return self.route(rule, ["GET"])
+    def get(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["GET"], typed)
 
-    def post(self, rule: str):
-        return self.route(rule, ["POST"])
+    def post(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["POST"], typed)
 
-    def patch(self, rule: str):
-        return self.route(rule, ["PATCH"])
+    def patch(self, rule: str, typed: Optional[bool] = None):
+        return self.route(rule, ["PATCH"], typed)
 
-    def route(self, rule: str, methods: Optional[list[str]] = None):
+    def route(
+        self,
+        rule: str,
+        methods: Optional[list[str]] = None,
+        typed: Optional[bool] = None,
+    ):
         def decorator(handler: Callable):
-            self.add_route(rule, handler, methods)
+            self.add_route(rule, handler, methods, typed)
             return handler
 
         return decorator
@@ -40,19 +54,42 @@ class Router:
     def websocket(self, rule: str):
         def decorator(handler: Callable[[WebSocketConnection], Any]):
             endpoint = f"websocket:{rule}"
-            self.url_map.add(Rule(rule, endpoint=endpoint))
-            self.websocket_handlers[endpoint] = handler
+            with self._lock:
+                url_map = self._writable_map()
+                url_map.add(Rule(rule, endpoint=endpoint))
+                self.websocket_handlers[endpoint] = handler
+                self.url_map = url_map
             return handler
 
         return decorator
 
     def add_route(
-        self, rule: str, handler: Callable, methods: Optional[list[str]] = None
+        self,
+        rule: str,
+        handler: Callable,
+        methods: Optional[list[str]] = None,
+        typed: Optional[bool] = None,
     ):
         endpoint = f"{rule}:{','.join(methods or [])}"
         full_rule = self.prefix + rule if not rule.startswith("/") else rule
-        self.url_map.add(Rule(full_rule, endpoint=endpoint, methods=methods))
-        self.handlers[endpoint] = handler
+        url_rule = Rule(full_rule, endpoint=endpoint, methods=methods)
+        with self._lock:
+            url_map = self._writable_map()
+            url_map.add(url_rule)
+            if self.typed if typed is None else typed:
+                handler = compile_handler(handler, set(url_rule.arguments))
+            self.handlers[endpoint] = handler
+            self.url_map = url_map
+
+    def _writable_map(self) -> Map:
+        if not self._published:
+            return self.url_map
+        # Requests in other threads may be matching against the current map;
+        # changes go into a copy that replaces it once complete.
+        return Map([rule.empty() for rule in self.url_map.iter_rules()])
+
+    async def close(self) -> None:
+        """Release resources held by the router; called on app shutdown."""
 
     def set_prefix(self, prefix: str):
         self.prefix = prefix.rstrip("/")
@@ -78,10 +115,13 @@ class Router:
         self, connection: HttpConnection
     ) -> Optional[HttpResponse]:
         try:
-            endpoint, kwargs = self._match_route(connection)
+            with span("route.match"):
+                endpoint, kwargs = self._match_route(connection)
             logger.debug(f"Matched route: {endpoint}")
+            connection.scope["route"] = self.prefix + endpoint.rsplit(":", 1)[0]
             handler = self.handlers[endpoint]
-            response = await handler(connection, **kwargs)
+            with span(f"handler {endpoint}"):
+                response = await handler(connection, **kwargs)
             return response
         except Exception as err:
             logger.error(
@@ -105,6 +145,9 @@ class Router:
         raise ValueError(f"Unsupported connection type: {type(connection)}")
 
     def _match_route(self, connection: BaseConnection) -> tuple:
+        if not self._published:
+            with self._lock:
+                self._published = True
         adapter = self.get_adapter(connection)
         path = connection.scope["path"]
         if self.prefix and path.startswith(self.prefix):
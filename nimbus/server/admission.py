@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional, Protocol, Sequence
+
+from nimbus.response import PrecomputedResponse
+from nimbus.types import SendCallable
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimit(Protocol):
+    @property
+    def limit(self) -> int: ...
+
+    def update(self, latency: float, inflight: int, dropped: bool) -> None: ...
+
+
+class AIMDLimit:
+    """Grows the limit by about one per limit's worth of fast responses and
+    multiplies it by ``backoff`` on each response slower than
+    ``latency_threshold`` (or dropped)."""
+
+    def __init__(
+        self,
+        initial: int = 20,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff: float = 0.9,
+        latency_threshold: float = 0.1,
+    ):
+        self._limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_threshold = latency_threshold
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def update(self, latency: float, inflight: int, dropped: bool) -> None:
+        if dropped or latency > self.latency_threshold:
+            self._limit = max(self.min_limit, self._limit * self.backoff)
+        elif inflight * 2 >= self._limit:
+            # Only grow when the limit is actually being used.
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+
+class GradientLimit:
+    """Scales the limit by how far recent latency drifts from its baseline,
+    in the style of Netflix's gradient limits.
+
+    Latency is averaged over windows of ``window_size`` samples and the
+    limit changes once per window. The baseline follows faster windows at
+    once and slower ones over about ``long_window`` windows. ``tolerance``
+    is how much slower than the baseline a window may be before the limit
+    shrinks;
+    ``sqrt(limit)`` is added on top of the scaled limit so a little
+    queueing is always allowed.
+    """
+
+    def __init__(
+        self,
+        initial: int = 20,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        window_size: int = 20,
+        long_window: int = 600,
+    ):
+        self._limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window_size = window_size
+        self._long_decay = 2 / (long_window + 1)
+        self.long_latency = 0.0
+        self._samples = 0
+        self._total = 0.0
+        self._dropped = False
+        self._saturated = False
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def update(self, latency: float, inflight: int, dropped: bool) -> None:
+        self._samples += 1
+        self._total += latency
+        self._dropped |= dropped
+        self._saturated |= inflight * 2 >= self._limit
+        if self._samples < self.window_size:
+            return
+        short_latency = self._total / self._samples
+        dropped, saturated = self._dropped, self._saturated
+        self._samples, self._total = 0, 0.0
+        self._dropped = self._saturated = False
+        if not self.long_latency:
+            self.long_latency = short_latency
+            return
+        if short_latency < self.long_latency:
+            self.long_latency = short_latency
+        else:
+            # Drift up slowly so sustained queueing does not become the
+            # new normal, while a genuinely slower app is still followed.
+            self.long_latency += (short_latency - self.long_latency) * self._long_decay
+        if not (saturated or dropped):
+            return  # the app is not using the limit; latency says nothing
+        gradient = max(
+            0.5, min(1.0, self.tolerance * self.long_latency / short_latency)
+        )
+        if dropped:
+            gradient = 0.5
+        target = self._limit * gradient + math.sqrt(self._limit)
+        limit = self._limit * (1 - self.smoothing) + target * self.smoothing
+        self._limit = max(self.min_limit, min(self.max_limit, limit))
+
+
+@dataclass
+class PriorityClass:
+    """Requests whose path starts with one of ``prefixes`` (or every request,
+    if there are none) wait in a queue of ``queue_size`` for at most
+    ``timeout`` seconds."""
+
+    name: str
+    prefixes: Sequence[str] = ()
+    queue_size: int = 128
+    timeout: float = 1.0
+    admitted: int = field(default=0, init=False)
+    rejected_full: int = field(default=0, init=False)
+    rejected_deadline: int = field(default=0, init=False)
+    timed_out: int = field(default=0, init=False)
+
+
+@dataclass
+class AdmissionStats:
+    limit: int
+    inflight: int
+    queued: dict[str, int]
+    admitted: dict[str, int]
+    rejected: dict[str, int]
+
+
+class AdmissionController:
+    """Caps concurrent requests at an adaptive limit and queues the rest.
+
+    ``classes`` are in priority order: a freed slot always goes to the
+    oldest waiter of the most important non-empty class. A request that
+    finds its class queue full, or whose expected wait already exceeds the
+    class timeout, is rejected at once with ``response`` (a 503), as is one
+    still queued when its timeout expires.
+
+    One controller may be shared by event loops in several threads; a slot
+    freed on one loop wakes a waiter on another.
+    """
+
+    def __init__(
+        self,
+        classes: Optional[Sequence[PriorityClass]] = None,
+        limit: Optional[ConcurrencyLimit] = None,
+        response: Optional[PrecomputedResponse] = None,
+    ):
+        self.classes = list(classes or [PriorityClass("default")])
+        if self.classes[-1].prefixes:
+            self.classes.append(PriorityClass("default"))
+        self.limiter = limit or GradientLimit()
+        self.response = response or PrecomputedResponse(
+            "Service Unavailable",
+            status_code=503,
+            headers={"retry-after": "1", "connection": "close"},
+        )
+        self.inflight = 0
+        self._queues: list[deque[asyncio.Future[None]]] = [
+            deque() for _ in self.classes
+        ]
+        self._prefixes = [tuple(c.prefixes) for c in self.classes]
+        self._latency = 0.0
+        self._lock = threading.Lock()
+
+    def classify(self, path: str) -> int:
+        for index, prefixes in enumerate(self._prefixes):
+            if not prefixes or path.startswith(prefixes):
+                return index
+        return len(self.classes) - 1
+
+    async def acquire(self, path: str) -> Optional[float]:
+        """Wait for a slot; return the admission time, or None if rejected."""
+        index = self.classify(path)
+        priority_class = self.classes[index]
+        queue = self._queues[index]
+        with self._lock:
+            limit = self.limiter.limit
+            if self.inflight < limit:
+                self.inflight += 1
+                priority_class.admitted += 1
+                return time.monotonic()
+            if len(queue) >= priority_class.queue_size:
+                priority_class.rejected_full += 1
+                return None
+            ahead = sum(len(q) for q in self._queues[: index + 1])
+            if self._latency * (ahead + 1) / max(limit, 1) > priority_class.timeout:
+                priority_class.rejected_deadline += 1
+                return None
+            waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            queue.append(waiter)
+        try:
+            async with asyncio.timeout(priority_class.timeout):
+                await waiter
+        except TimeoutError:
+            with self._lock:
+                # A waiter no longer queued was granted a slot just as the
+                # timeout fired; take it rather than give it back.
+                if waiter in queue:
+                    queue.remove(waiter)
+                    priority_class.timed_out += 1
+                    return None
+                priority_class.admitted += 1
+            return time.monotonic()
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in queue:
+                    queue.remove(waiter)
+                else:
+                    self._release_slot()
+            raise
+        with self._lock:
+            priority_class.admitted += 1
+        return time.monotonic()
+
+    def release(self, admitted_at: float, dropped: bool = False) -> None:
+        latency = time.monotonic() - admitted_at
+        with self._lock:
+            self._latency += (
+                (latency - self._latency) * 0.1 if self._latency else latency
+            )
+            self.limiter.update(latency, self.inflight, dropped)
+            self._release_slot()
+
+    def _release_slot(self) -> None:
+        # Called with the lock held. Popping a waiter grants it the slot.
+        self.inflight -= 1
+        limit = self.limiter.limit
+        for queue in self._queues:
+            while queue and self.inflight < limit:
+                waiter = queue.popleft()
+                self.inflight += 1
+                loop = waiter.get_loop()
+                if loop is _running_loop():
+                    _grant(waiter)
+                else:
+                    loop.call_soon_threadsafe(_grant, waiter)
+            if self.inflight >= limit:
+                return
+
+    def stats(self) -> AdmissionStats:
+        return AdmissionStats(
+            limit=self.limiter.limit,
+            inflight=self.inflight,
+            queued={c.name: len(q) for c, q in zip(self.classes, self._queues)},
+            admitted={c.name: c.admitted for c in self.classes},
+            rejected={
+                c.name: c.rejected_full + c.rejected_deadline + c.timed_out
+                for c in self.classes
+            },
+        )
+
+
+class AdmissionSlot:
+    """A granted slot, given back once: when the request ends, or as soon as
+    its response body starts streaming.
+
+    A stream (server-sent events, a proxied download) would otherwise hold
+    its slot for as long as it runs and report that as its latency, which
+    shrinks the limit for every other request.
+    """
+
+    __slots__ = ("controller", "admitted_at", "released")
+
+    def __init__(self, controller: AdmissionController, admitted_at: float):
+        self.controller = controller
+        self.admitted_at = admitted_at
+        self.released = False
+
+    def release(self, dropped: bool = False) -> None:
+        if not self.released:
+            self.released = True
+            self.controller.release(self.admitted_at, dropped)
+
+    def wrap_send(self, send: SendCallable) -> SendCallable:
+        async def send_event(event: dict[str, Any]) -> None:
+            await send(event)
+            if event.get("more_body"):
+                self.release()
+
+        return send_event
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _grant(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
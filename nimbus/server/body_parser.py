@@ -2,12 +2,12 @@ import json
 from typing import Any, Optional
 from urllib.parse import parse_qs
 
+from nimbus.headers import Headers
+
 
 class BodyParser:
     @classmethod
-    async def parse(
-        cls, headers: dict[str, str], body: bytes
-    ) -> Optional[dict[str, Any]]:
+    async def parse(cls, headers: Headers, body: bytes) -> Optional[dict[str, Any]]:
         content_type = headers.get("content-type", "")
 
         if "application/json" in content_type:
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NIMBUSCAP2\n"
+DEFAULT_REDACTED_HEADERS = frozenset(
+    {"authorization", "cookie", "proxy-authorization", "x-api-key"}
+)
+REDACTED = b"[redacted]"
+
+# Each record is framed as (length, crc32) followed by the fixed fields:
+# timestamp, duration in microseconds, status, the lengths of method, path
+# and route, the header count, the stored body length and the original body
+# length. Strings, headers (as name length, value length, name, value) and
+# the body follow. The method and path are UTF-8 with surrogateescape, so
+# any request target the parser accepted round-trips.
+_FRAME = struct.Struct("<II")
+_FIELDS = struct.Struct("<dIHHIHHII")
+_HEADER = struct.Struct("<HI")
+
+
+@dataclass
+class CapturedRequest:
+    timestamp: float
+    duration: float
+    status: int
+    method: str
+    path: str
+    route: Optional[str]
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    body_size: int
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.body) < self.body_size
+
+
+def encode_request(request: CapturedRequest) -> bytes:
+    method = request.method.encode("utf-8", "surrogateescape")
+    path = request.path.encode("utf-8", "surrogateescape")
+    route = (request.route or "").encode()
+    parts = [
+        _FIELDS.pack(
+            request.timestamp,
+            min(int(request.duration * 1e6), 0xFFFFFFFF),
+            request.status,
+            len(method),
+            len(path),
+            len(route),
+            len(request.headers),
+            len(request.body),
+            request.body_size,
+        ),
+        method,
+        path,
+        route,
+    ]
+    for name, value in request.headers:
+        parts.append(_HEADER.pack(len(name), len(value)))
+        parts.append(name)
+        parts.append(value)
+    parts.append(request.body)
+    payload = b"".join(parts)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_request(payload: bytes) -> CapturedRequest:
+    (
+        timestamp,
+        duration_us,
+        status,
+        method_len,
+        path_len,
+        route_len,
+        header_count,
+        body_len,
+        body_size,
+    ) = _FIELDS.unpack_from(payload)
+    offset = _FIELDS.size
+    method = payload[offset : offset + method_len].decode("utf-8", "surrogateescape")
+    offset += method_len
+    path = payload[offset : offset + path_len].decode("utf-8", "surrogateescape")
+    offset += path_len
+    route = payload[offset : offset + route_len].decode() or None
+    offset += route_len
+    headers = []
+    for _ in range(header_count):
+        name_len, value_len = _HEADER.unpack_from(payload, offset)
+        offset += _HEADER.size
+        name = payload[offset : offset + name_len]
+        offset += name_len
+        headers.append((name, payload[offset : offset + value_len]))
+        offset += value_len
+    return CapturedRequest(
+        timestamp=timestamp,
+        duration=duration_us / 1e6,
+        status=status,
+        method=method,
+        path=path,
+        route=route,
+        headers=headers,
+        body=payload[offset : offset + body_len],
+        body_size=body_size,
+    )
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """Yield the requests stored in a capture file, oldest first.
+
+    A torn record at the end (the server was killed mid-write) ends the
+    iteration instead of raising.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Nimbus capture file")
+        while frame := f.read(_FRAME.size):
+            if len(frame) < _FRAME.size:
+                return
+            length, crc = _FRAME.unpack(frame)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning(f"Ignoring a truncated record at the end of {path}")
+                return
+            yield decode_request(payload)
+
+
+class CaptureEntry:
+    __slots__ = (
+        "timestamp",
+        "started",
+        "method",
+        "path",
+        "headers",
+        "body",
+        "size",
+        "route",
+    )
+
+    def __init__(self, method: str, path: str, headers: list[tuple[bytes, bytes]]):
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = bytearray()
+        self.size = 0
+        self.route: Optional[str] = None
+
+    def tee(
+        self, receive: Callable[[int], Awaitable[bytes]], max_body: int
+    ) -> Callable[[int], Awaitable[bytes]]:
+        """Wrap ``receive`` so the body is recorded as the app reads it."""
+
+        async def read(n: int = -1) -> bytes:
+            data = await receive(n)
+            self.size += len(data)
+            room = max_body - len(self.body)
+            if room > 0:
+                self.body += data[:room]
+            return data
+
+        return read
+
+
+class TrafficCapture:
+    """Records a sample of the requests a server handles to an append-only
+    file that ``read_capture`` and ``nimbus.server.replay`` read back.
+
+    Values of ``redact_headers`` and of the ``redact_query`` parameters are
+    replaced before anything is written, bodies are cut to ``max_body``
+    bytes, and ``redact`` may rewrite a request or return None to skip it.
+    Records are buffered and written every ``flush_interval`` seconds; once
+    ``max_buffer`` bytes are waiting, new records are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        sample_rate: float = 1.0,
+        max_body: int = 65536,
+        redact_headers: Iterable[str] = DEFAULT_REDACTED_HEADERS,
+        redact_query: Iterable[str] = (),
+        redact: Optional[Callable[[CapturedRequest], Optional[CapturedRequest]]] = None,
+        flush_interval: float = 1.0,
+        max_buffer: int = 8 * 1024 * 1024,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.redact_headers = {name.lower().encode() for name in redact_headers}
+        self.redact_query = set(redact_query)
+        self.redact = redact
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.recorded = 0
+        self.dropped = 0
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._fd is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size == 0:
+                os.write(fd, MAGIC)
+            elif os.pread(fd, len(MAGIC), 0) != MAGIC:
+                os.close(fd)
+                raise ValueError(f"{self.path} is not a Nimbus capture file")
+            self._fd = fd
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def begin(
+        self, method: str, path: str, headers: list[tuple[bytes, bytes]]
+    ) -> Optional[CaptureEntry]:
+        """Start recording a request, or return None if it is not sampled."""
+        if self._fd is None:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return CaptureEntry(method, path, headers)
+
+    def end(self, entry: CaptureEntry, status: int) -> None:
+        """Record a finished request. Never raises: a request that cannot be
+        recorded, or that the ``redact`` hook fails on, is counted in
+        ``dropped``."""
+        try:
+            record = self._encode(entry, status)
+        except Exception as e:
+            logger.debug(f"Not capturing {entry.method} request: {e!r}")
+            with self._lock:
+                self.dropped += 1
+            return
+        if record is None:
+            return
+        with self._lock:
+            if len(self._buffer) + len(record) > self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer += record
+            self.recorded += 1
+
+    def _encode(self, entry: CaptureEntry, status: int) -> Optional[bytes]:
+        request = CapturedRequest(
+            timestamp=entry.timestamp,
+            duration=time.perf_counter() - entry.started,
+            status=status,
+            method=entry.method,
+            path=self._redact_path(entry.path),
+            route=entry.route,
+            headers=[
+                (name, REDACTED if name in self.redact_headers else value)
+                for name, value in entry.headers
+            ],
+            body=bytes(entry.body),
+            body_size=entry.size,
+        )
+        if self.redact is not None:
+            redacted = self.redact(request)
+            if redacted is None:
+                return None
+            request = redacted
+        return encode_request(request)
+
+    def _redact_path(self, path: str) -> str:
+        if not self.redact_query or "?" not in path:
+            return path
+        base, query = path.split("?", 1)
+        params = [
+            (key, "redacted" if key in self.redact_query else value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+        ]
+        return f"{base}?{urlencode(params)}"
+
+    async def flush(self) -> None:
+        with self._lock:
+            data, self._buffer = bytes(self._buffer), bytearray()
+        if data and self._fd is not None:
+            await asyncio.to_thread(_write_all, self._fd, data)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                logger.error(f"Failed to write traffic capture {self.path}: {e}")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
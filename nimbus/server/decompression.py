@@ -0,0 +1,222 @@
+import zlib
+from typing import Optional, Protocol
+
+from nimbus.exceptions import (
+    InvalidRequestBody,
+    RequestEntityTooLarge,
+    UnsupportedContentEncoding,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+else:
+    # Before Brotli 1.2 the decompressor cannot bound its output, so a
+    # small body could inflate to gigabytes in one call: treat it as absent.
+    if not hasattr(brotli.Decompressor, "can_accept_more_data"):  # pragma: no cover
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Zstandard output is collected in pieces of this size, so it overshoots the
+# limit by at most this much before decoding stops.
+_ZSTD_WRITE_SIZE = 16384
+
+DEFAULT_MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+
+
+class _Decoder(Protocol):
+    # Returns at most ``limit`` bytes, give or take one output buffer. Reaching
+    # the limit means the body is too large, so the decoder is not used again.
+    def decompress(self, data: bytes, limit: int) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int, fallback_wbits: Optional[int] = None):
+        self.wbits = wbits
+        self.fallback_wbits = fallback_wbits
+        self.started = False
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        try:
+            out = self._obj.decompress(data, limit)
+        except zlib.error:
+            if self.started or self.fallback_wbits is None:
+                raise
+            # "deflate" should be zlib-wrapped, but some clients send raw
+            # deflate; switch once if the very first bytes do not parse.
+            self._obj = zlib.decompressobj(self.fallback_wbits)
+            self.fallback_wbits = None
+            out = self._obj.decompress(data, limit)
+        self.started = True
+        if self._obj.eof and self._obj.unused_data and self.wbits & 16:
+            # Concatenated gzip members decode as one body.
+            rest = self._obj.unused_data
+            self._obj = zlib.decompressobj(self.wbits)
+            return out + self.decompress(rest, max(limit - len(out), 1))
+        return out
+
+    @property
+    def pending(self) -> bytes:
+        return self._obj.unconsumed_tail
+
+    def flush(self) -> bytes:
+        if self.started and not self._obj.eof:
+            raise zlib.error("compressed body is truncated")
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        out = self._obj.process(data, output_buffer_limit=limit)
+        while len(out) < limit and not self._obj.can_accept_more_data():
+            out += self._obj.process(b"", output_buffer_limit=limit - len(out))
+        return out
+
+    def flush(self) -> bytes:
+        if not self._obj.is_finished():
+            raise brotli.error("compressed body is truncated")
+        return b""
+
+
+class _OutputLimitReached(Exception):
+    pass
+
+
+class _ZstdSink:
+    """Collects a zstandard ``stream_writer``'s output up to ``limit`` bytes."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.limit = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        if self.size >= self.limit:
+            # Aborts the decompressor's write() before it inflates more.
+            raise _OutputLimitReached()
+        return len(data)
+
+    def take(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return out
+
+
+class _ZstdDecoder:
+    # decompressobj() cannot bound its output; stream_writer() hands it over
+    # in write_size pieces, and the sink stops it at the limit.
+    def __init__(self) -> None:
+        self._sink = _ZstdSink()
+        self._obj = zstandard.ZstdDecompressor().stream_writer(
+            self._sink, write_size=_ZSTD_WRITE_SIZE
+        )
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        self._sink.limit = limit
+        try:
+            self._obj.write(data)
+        except _OutputLimitReached:
+            pass
+        return self._sink.take()
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _create(encoding: str) -> _Decoder:
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS, -zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise UnsupportedContentEncoding(f"Unsupported Content-Encoding: {encoding}")
+
+
+def supported_encodings() -> list[str]:
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+class BodyDecoder:
+    """Incrementally undoes a request's ``Content-Encoding``.
+
+    Codings are removed in the reverse of the order they are listed. At most
+    ``max_size`` decoded bytes are produced; more raises
+    ``RequestEntityTooLarge`` before the rest is inflated.
+    """
+
+    def __init__(self, content_encoding: str, max_size: int):
+        codings = [c.strip().lower() for c in content_encoding.split(",")]
+        self.decoders = [_create(c) for c in reversed(codings) if c != "identity"]
+        self.max_size = max_size
+        self.size = 0
+
+    def decode(self, data: bytes) -> bytes:
+        try:
+            for decoder in self.decoders:
+                data = self._run(decoder, data)
+        except InvalidRequestBody:
+            raise
+        except Exception as e:
+            raise InvalidRequestBody(f"Malformed compressed body: {e}") from e
+        self._count(data)
+        return data
+
+    def _run(self, decoder: _Decoder, data: bytes) -> bytes:
+        out = []
+        produced = 0
+        chunk = data
+        while chunk:
+            limit = self.max_size - self.size - produced + 1
+            piece = decoder.decompress(chunk, limit)
+            produced += len(piece)
+            if self.size + produced > self.max_size:
+                raise self._too_large()
+            out.append(piece)
+            # Zlib stops at ``limit`` output bytes and keeps the rest.
+            chunk = getattr(decoder, "pending", b"")
+        return b"".join(out)
+
+    def flush(self) -> bytes:
+        """Finish decoding; raises ``InvalidRequestBody`` if the body was truncated."""
+        data = b""
+        try:
+            for decoder in self.decoders:
+                data = self._run(decoder, data) + decoder.flush()
+        except InvalidRequestBody:
+            raise
+        except Exception as e:
+            raise InvalidRequestBody(f"Malformed compressed body: {e}") from e
+        self._count(data)
+        return data
+
+    def _count(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise self._too_large()
+
+    def _too_large(self) -> RequestEntityTooLarge:
+        return RequestEntityTooLarge(
+            f"Decompressed request body exceeds {self.max_size} bytes"
+        )
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError as err:  # pragma: no cover
+    raise ImportError(
+        "HTTP/2 support requires the optional 'h2' package (pip install h2)"
+    ) from err
+
+from nimbus.applications import ASGIApplication
+from nimbus.connections import HttpConnection, create_connection
+from nimbus.types import Scope
+
+from .admission import AdmissionController, AdmissionSlot
+from .connection_handler import ConnectionHandler
+
+logger = logging.getLogger(__name__)
+
+# Connection-specific headers are forbidden in HTTP/2 (RFC 9113, 8.2.2).
+CONNECTION_HEADERS = frozenset(
+    [
+        b"connection",
+        b"keep-alive",
+        b"proxy-connection",
+        b"transfer-encoding",
+        b"upgrade",
+    ]
+)
+
+
+class Http2Stream:
+    __slots__ = ("stream_id", "body", "unacked", "ended", "readable", "task")
+
+    def __init__(self, stream_id: int):
+        self.stream_id = stream_id
+        self.body = bytearray()
+        self.unacked = 0
+        self.ended = False
+        self.readable = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class Http2Session:
+    def __init__(
+        self,
+        app: ASGIApplication,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        server: tuple[str, int],
+        client: tuple[str, int],
+        max_concurrent_streams: int = 100,
+        read_size: int = 65536,
+        admission: Optional[AdmissionController] = None,
+    ):
+        self.app = app
+        self.reader = reader
+        self.writer = writer
+        self.server = server
+        self.client = client
+        self.read_size = read_size
+        self.admission = admission
+        self.scheme = "https" if writer.get_extra_info("ssl_object") else "http"
+        self.connection_handler = ConnectionHandler()
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(
+                client_side=False,
+                header_encoding=None,
+                # Response headers are lowercased and filtered in send().
+                validate_outbound_headers=False,
+                normalize_outbound_headers=False,
+            )
+        )
+        self.conn.local_settings = h2.settings.Settings(
+            client=False,
+            initial_values={
+                h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: max_concurrent_streams,
+                h2.settings.SettingCodes.ENABLE_CONNECT_PROTOCOL: 0,
+            },
+        )
+        self.streams: dict[int, Http2Stream] = {}
+        self.window_updated = asyncio.Event()
+        self.terminated = False
+        self.closed = False
+
+    async def serve(self, preface: bytes = b"") -> None:
+        self.conn.initiate_connection()
+        await self._flush()
+        data = preface
+        try:
+            while not self.terminated:
+                if data:
+                    self._handle_events(self.conn.receive_data(data))
+                    await self._flush()
+                if self.terminated:
+                    # The peer sent GOAWAY: let in-flight streams complete.
+                    await self._finish_streams(cancel=False)
+                    break
+                data = await self.reader.read(self.read_size)
+                if not data:
+                    break
+        except h2.exceptions.ProtocolError as err:
+            logger.info(f"HTTP/2 protocol error from {self.client}: {str(err)}")
+            await self._flush()
+        finally:
+            self.closed = True
+            self.window_updated.set()
+            await self._finish_streams(cancel=True)
+
+    def _handle_events(self, events: list[h2.events.Event]) -> None:
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self._start_stream(event.stream_id, event.headers)
+            elif isinstance(event, h2.events.DataReceived):
+                self._receive_data(event)
+            elif isinstance(event, h2.events.StreamEnded):
+                self._end_stream(event.stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                self._reset_stream(event.stream_id)
+            elif isinstance(
+                event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged)
+            ):
+                self.window_updated.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.terminated = True
+
+    def _start_stream(self, stream_id: int, headers: list[tuple[bytes, bytes]]) -> None:
+        stream = Http2Stream(stream_id)
+        self.streams[stream_id] = stream
+        scope = self._create_scope(headers)
+        stream.task = asyncio.create_task(self._run_stream(stream, scope))
+
+    def _create_scope(self, headers: list[tuple[bytes, bytes]]) -> Scope:
+        pseudo: dict[bytes, bytes] = {}
+        regular: list[tuple[bytes, bytes]] = []
+        for name, value in headers:
+            if name.startswith(b":"):
+                pseudo[name] = value
+            else:
+                regular.append((name, value))
+        if b":authority" in pseudo:
+            regular.insert(0, (b"host", pseudo[b":authority"]))
+        parsed_url = urlparse(pseudo.get(b":path", b"/").decode("latin-1"))
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.1"},
+            "http_version": "2",
+            "scheme": pseudo.get(b":scheme", self.scheme.encode()).decode(),
+            "method": pseudo.get(b":method", b"GET").decode(),
+            "path": parsed_url.path,
+            "raw_path": parsed_url.path.encode(),
+            "query_string": parsed_url.query.encode(),
+            "headers": regular,
+            "server": self.server,
+            "client": self.client,
+        }
+
+    async def _run_stream(self, stream: Http2Stream, scope: Scope) -> None:
+        receive, send = self._create_receive(stream), self._create_send(stream)
+        slot = None
+        try:
+            if self.admission is not None:
+                admitted_at = await self.admission.acquire(scope["path"])
+                if admitted_at is None:
+                    rejection = self.admission.response
+                    await HttpConnection(scope, receive, send).send_response(
+                        rejection.status_code, rejection.body, rejection.headers
+                    )
+                    return
+                slot = AdmissionSlot(self.admission, admitted_at)
+                send = slot.wrap_send(send)
+            connection = create_connection(scope, receive, send)
+            await self.app(connection)
+            await self.connection_handler.handle_connection(connection)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            logger.error(f"Error handling HTTP/2 stream {stream.stream_id}. {str(err)}")
+            self._reset(stream.stream_id, h2.errors.ErrorCodes.INTERNAL_ERROR)
+        finally:
+            if slot is not None:
+                slot.release()
+            self.streams.pop(stream.stream_id, None)
+            await self._acknowledge(stream, stream.unacked)
+
+    def _receive_data(self, event: h2.events.DataReceived) -> None:
+        stream = self.streams.get(event.stream_id)
+        if stream is None:
+            self.conn.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id
+            )
+            return
+        stream.body.extend(event.data)
+        stream.unacked += len(event.data)
+        stream.readable.set()
+        # Padding never reaches the application, release it immediately.
+        padding = event.flow_controlled_length - len(event.data)
+        if padding:
+            self.conn.acknowledge_received_data(padding, event.stream_id)
+
+    def _end_stream(self, stream_id: int) -> None:
+        stream = self.streams.get(stream_id)
+        if stream is not None:
+            stream.ended = True
+            stream.readable.set()
+
+    def _reset_stream(self, stream_id: int) -> None:
+        stream = self.streams.pop(stream_id, None)
+        if stream is not None and stream.task is not None:
+            stream.task.cancel()
+
+    def _create_receive(self, stream: Http2Stream):
+        async def receive(size: int) -> bytes:
+            if size == 0:
+                return b""
+            while not stream.ended and (size < 0 or len(stream.body) < size):
+                # Window credit is only returned while the application is
+                # waiting for more body, which gives per-stream backpressure.
+                await self._acknowledge(stream, stream.unacked)
+                stream.readable.clear()
+                await stream.readable.wait()
+            if size < 0:
+                size = len(stream.body)
+            chunk = bytes(stream.body[:size])
+            acked = len(stream.body) - stream.unacked
+            del stream.body[:size]
+            await self._acknowledge(stream, len(chunk) - acked)
+            return chunk
+
+        return receive
+
+    async def _acknowledge(self, stream: Http2Stream, size: int) -> None:
+        if size <= 0 or self.closed:
+            return
+        stream.unacked -= size
+        self.conn.acknowledge_received_data(size, stream.stream_id)
+        await self._flush()
+
+    def _create_send(self, stream: Http2Stream):
+        async def send(event: dict[str, Any]) -> None:
+            if self.closed or stream.stream_id not in self.streams:
+                return
+            if event["type"] == "http.response.start":
+                headers = [(b":status", str(event["status"]).encode())]
+                headers.extend(
+                    (name.lower(), value)
+                    for name, value in event["headers"]
+                    if name.lower() not in CONNECTION_HEADERS
+                )
+                # Flushed together with the first body frame.
+                self.conn.send_headers(stream.stream_id, headers)
+            elif event["type"] == "http.response.body":
+                await self._send_data(
+                    stream.stream_id,
+                    event.get("body", b""),
+                    event.get("more_body", False),
+                )
+            else:
+                logger.warning(f"Received unknown event type: {event['type']}")
+
+        return send
+
+    async def _send_data(self, stream_id: int, data: bytes, more_body: bool) -> None:
+        view = memoryview(data)
+        while True:
+            window = min(
+                self.conn.local_flow_control_window(stream_id),
+                self.conn.max_outbound_frame_size,
+            )
+            if window <= 0 and view:
+                # Cleared before the flush: a WINDOW_UPDATE read while it
+                # drains must still wake us.
+                self.window_updated.clear()
+                await self._flush()
+                if self.conn.local_flow_control_window(stream_id) <= 0:
+                    await self.window_updated.wait()
+                if self.closed or stream_id not in self.streams:
+                    return
+                continue
+            chunk, view = view[:window], view[window:]
+            end_stream = not more_body and not view
+            if chunk or end_stream:
+                self.conn.send_data(stream_id, chunk.tobytes(), end_stream=end_stream)
+            if not view:
+                break
+        await self._flush()
+
+    def _reset(self, stream_id: int, error_code: int) -> None:
+        try:
+            self.conn.reset_stream(stream_id, error_code)
+        except h2.exceptions.StreamClosedError:
+            pass
+
+    async def _flush(self) -> None:
+        data = self.conn.data_to_send()
+        if data and not self.writer.is_closing():
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def _finish_streams(self, cancel: bool) -> None:
+        tasks = [stream.task for stream in self.streams.values() if stream.task]
+        if cancel:
+            for task in tasks:
+                task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
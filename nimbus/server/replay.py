@@ -0,0 +1,206 @@
+"""Replay a traffic capture against a running server.
+
+    python -m nimbus.server.replay capture.bin --target 127.0.0.1:8000 --speed 2
+
+``--speed`` scales the recorded arrival times (1 replays them as they
+happened, 2 twice as fast); ``--speed max`` sends every request as soon
+as one of ``--connections`` connections is free. In timed modes latency
+is measured from the moment a request was due, so a server that falls
+behind is charged for the queueing it causes. Requests whose body was cut
+to ``max_body`` when captured are skipped and counted in the report.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .capture import CapturedRequest, read_capture
+
+# Framing is recomputed for the replayed body.
+_SKIPPED_HEADERS = {b"content-length", b"transfer-encoding", b"connection"}
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    def percentile(self, p: int) -> float:
+        if not self.latencies:
+            return float("nan")
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100)[p - 1]
+
+
+@dataclass
+class ReplayReport:
+    elapsed: float
+    routes: dict[str, RouteStats]
+    # Requests not sent because their captured body is incomplete.
+    skipped: int = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(len(s.latencies) + s.errors for s in self.routes.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"{self.requests} requests in {self.elapsed:.2f} s "
+            f"({self.throughput:.0f} req/s)",
+        ]
+        if self.skipped:
+            lines.append(
+                f"{self.skipped} requests skipped: their bodies were cut to "
+                "max_body when captured"
+            )
+        lines += [
+            f"{'route':<32} {'count':>7} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>6}",
+        ]
+        for route, stats in sorted(self.routes.items()):
+            count = len(stats.latencies) + stats.errors
+            top = max(stats.latencies, default=float("nan"))
+            lines.append(
+                f"{route[:32]:<32} {count:>7} {count / self.elapsed:>8.1f} "
+                f"{stats.percentile(50) * 1e3:>8.2f} "
+                f"{stats.percentile(90) * 1e3:>8.2f} "
+                f"{stats.percentile(99) * 1e3:>8.2f} "
+                f"{top * 1e3:>8.2f} {stats.errors:>6}"
+            )
+        return "\n".join(lines)
+
+
+def route_of(request: CapturedRequest) -> str:
+    if request.route:
+        return f"{request.method} {request.route}"
+    return f"{request.method} {request.path.split('?', 1)[0]}"
+
+
+def encode_http(request: CapturedRequest, host: str) -> bytes:
+    lines = [
+        f"{request.method} {request.path} HTTP/1.1".encode("utf-8", "surrogateescape")
+    ]
+    has_host = False
+    for name, value in request.headers:
+        if name in _SKIPPED_HEADERS:
+            continue
+        has_host = has_host or name == b"host"
+        lines.append(name + b": " + value)
+    if not has_host:
+        lines.append(b"host: " + host.encode())
+    if request.body or request.method in ("POST", "PUT", "PATCH"):
+        lines.append(b"content-length: %d" % len(request.body))
+    return b"\r\n".join(lines) + b"\r\n\r\n" + request.body
+
+
+async def _send(host: str, port: int, payload: bytes, timeout: float) -> int:
+    async with asyncio.timeout(timeout):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(payload)
+            status_line = await reader.readline()
+            status = int(status_line.split(b" ", 2)[1])
+            # Nimbus closes the connection after each response.
+            while await reader.read(65536):
+                pass
+        finally:
+            writer.close()
+    return status
+
+
+async def replay(
+    requests: Iterable[CapturedRequest],
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    *,
+    speed: Optional[float] = 1.0,
+    connections: int = 64,
+    timeout: float = 30.0,
+) -> ReplayReport:
+    """Send ``requests`` to ``host:port``; ``speed=None`` means as fast as
+    ``connections`` allow."""
+    routes: dict[str, RouteStats] = {}
+    skipped = 0
+    slots = asyncio.Semaphore(connections)
+    authority = f"{host}:{port}"
+    pending: set[asyncio.Task] = set()
+
+    async def send(request: CapturedRequest, due: Optional[float]) -> None:
+        if due is not None:
+            await slots.acquire()
+        started = time.perf_counter() if due is None else due
+        stats = routes.setdefault(route_of(request), RouteStats())
+        try:
+            status = await _send(host, port, encode_http(request, authority), timeout)
+        except (OSError, TimeoutError, IndexError, ValueError):
+            stats.errors += 1
+            return
+        finally:
+            slots.release()
+        stats.latencies.append(time.perf_counter() - started)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    first: Optional[float] = None
+    for request in requests:
+        if request.truncated:
+            # Sent with the partial body, the server would see a different
+            # request, and usually a faster one.
+            skipped += 1
+            continue
+        due = None
+        if speed is None:
+            await slots.acquire()
+        else:
+            if first is None:
+                first = request.timestamp
+            due = start + (request.timestamp - first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        task = asyncio.create_task(send(request, due))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    await asyncio.gather(*pending)
+    return ReplayReport(time.perf_counter() - start, routes, skipped)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m nimbus.server.replay",
+        description="Replay a traffic capture against a running server.",
+    )
+    parser.add_argument("capture", help="file written by TrafficCapture")
+    parser.add_argument("--target", default="127.0.0.1:8000", help="host:port")
+    parser.add_argument(
+        "--speed", default="1", help="multiple of the recorded rate, or 'max'"
+    )
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    host, _, port = args.target.rpartition(":")
+    speed = None if args.speed == "max" else float(args.speed)
+    report = asyncio.run(
+        replay(
+            read_capture(args.capture),
+            host or "127.0.0.1",
+            int(port),
+            speed=speed,
+            connections=args.connections,
+            timeout=args.timeout,
+        )
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
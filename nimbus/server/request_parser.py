@@ -1,14 +1,18 @@
 import asyncio
+from typing import Optional
 from urllib.parse import urlparse
 
 from nimbus.types import Scope
 
+PREFACE_LINE = b"PRI * HTTP/2.0\r\n"
+
 
 class RequestParser:
     async def parse_request(
-        self, reader: asyncio.StreamReader
+        self, reader: asyncio.StreamReader, request_line: Optional[bytes] = None
     ) -> tuple[str, str, list[tuple[bytes, bytes]]]:
-        request_line = await reader.readline()
+        if request_line is None:
+            request_line = await reader.readline()
         method, path, _ = request_line.decode().strip().split()
         headers = await self._parse_headers(reader)
         return method, path, headers
@@ -1,33 +1,94 @@
 import asyncio
 import logging
-from typing import Any
+import time
+from email.utils import formatdate
+from typing import Any, Optional
+
+from nimbus.response import PrecomputedResponse, status_line
+from nimbus.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+class DefaultHeaders:
+    """``Date`` and ``Server`` headers, re-rendered at most once per second."""
+
+    __slots__ = ("server", "_second", "_buffer", "_pairs")
+
+    def __init__(self, server: Optional[str] = "nimbus"):
+        self.server = server.encode("latin-1") if server else None
+        self._second = -1
+        self._buffer = b""
+        self._pairs: list[tuple[bytes, bytes]] = []
+
+    def _refresh(self) -> None:
+        now = int(time.time())
+        if now == self._second:
+            return
+        # Built aside and published whole: loops in other threads may be
+        # reading the previous second's headers meanwhile.
+        pairs = [(b"date", formatdate(now, usegmt=True).encode("latin-1"))]
+        if self.server:
+            pairs.append((b"server", self.server))
+        self._pairs = pairs
+        self._buffer = b"".join(b"%s: %s\r\n" % pair for pair in pairs)
+        self._second = now
+
+    @property
+    def buffer(self) -> bytes:
+        self._refresh()
+        return self._buffer
+
+    @property
+    def pairs(self) -> list[tuple[bytes, bytes]]:
+        self._refresh()
+        return self._pairs
+
+
 class ResponseWriter:
     EVENT_HANDLERS = {
         "http.response.start": "_send_response_start",
         "http.response.body": "_send_response_body",
     }
 
+    def __init__(self, default_headers: Optional[DefaultHeaders] = None):
+        self.default_headers = default_headers or DefaultHeaders()
+
     async def send(self, writer: asyncio.StreamWriter, event: dict[str, Any]) -> None:
         handler_name = self.EVENT_HANDLERS.get(event["type"], "_handle_unknown_event")
         handler = getattr(self, handler_name)
-        await handler(writer, event)
-        await writer.drain()
+        with span(event["type"]):
+            await handler(writer, event)
+            await writer.drain()
 
     async def _send_response_start(
         self, writer: asyncio.StreamWriter, event: dict[str, Any]
     ) -> None:
-        status = event["status"]
-        headers = event["headers"]
-        writer.write(f"HTTP/1.1 {status}\r\n".encode())
-        for name, value in headers:
-            writer.write(
-                f'{name.decode("ascii")}: {value.decode("ascii")}\r\n'.encode()
+        head = [status_line(event["status"]), b""]
+        overridden = set()
+        for name, value in event["headers"]:
+            if name == b"date" or name == b"server":
+                overridden.add(name)
+            head.append(b"%s: %s\r\n" % (name, value))
+        if not overridden:
+            head[1] = self.default_headers.buffer
+        else:
+            head[1] = b"".join(
+                b"%s: %s\r\n" % pair
+                for pair in self.default_headers.pairs
+                if pair[0] not in overridden
+            )
+        head.append(b"\r\n")
+        writer.write(b"".join(head))
+
+    async def send_precomputed(
+        self, writer: asyncio.StreamWriter, response: PrecomputedResponse
+    ) -> None:
+        with span("http.response.precomputed"):
+            writer.writelines(
+                (response.status_line, self.default_headers.buffer, response.wire_tail)
             )
-        writer.write(b"\r\n")
+            await writer.drain()
 
     async def _send_response_body(
         self, writer: asyncio.StreamWriter, event: dict[str, Any]
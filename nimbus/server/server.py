@@ -1,16 +1,36 @@
 import asyncio
+import concurrent.futures
 import logging
-from typing import Optional
+import os
+import signal
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional, Type
 
 from nimbus.applications import ASGIApplication
 from nimbus.connections import create_connection
+from nimbus.headers import MutableHeaders
 from nimbus.response import HttpResponse
-from nimbus.utils import create_ssl_context
+from nimbus.tracing import Tracer
 
+from .admission import AdmissionController, AdmissionSlot
+from .capture import CaptureEntry, TrafficCapture
 from .connection_handler import ConnectionHandler
 from .error_handler import ErrorHandler
-from .request_parser import RequestParser
+from .request_parser import PREFACE_LINE, RequestParser
 from .response_writer import ResponseWriter
+from .sockets import (
+    bind_reuse_port,
+    bind_unix_socket,
+    describe_socket,
+    socket_from_fd,
+    systemd_listen_fds,
+)
+from .tls import TLSConfig
+
+if TYPE_CHECKING:
+    from .http2 import Http2Session
 
 logger = logging.getLogger(__name__)
 
@@ -23,31 +43,86 @@ class NimbusServer:
         port: int = 8000,
         ssl_keyfile: Optional[str] = None,
         ssl_certfile: Optional[str] = None,
+        shutdown_timeout: float = 10.0,
+        http2: bool = False,
+        http2_max_concurrent_streams: int = 100,
+        uds: Optional[str] = None,
+        uds_permissions: Optional[int] = None,
+        sock: Optional[socket.socket] = None,
+        fd: Optional[int] = None,
+        systemd: bool = False,
+        backlog: int = 100,
+        tls: Optional[TLSConfig] = None,
+        tracer: Optional[Tracer] = None,
+        admission: Optional[AdmissionController] = None,
+        threads: int = 1,
+        reuse_port: bool = False,
+        capture: Optional[TrafficCapture] = None,
     ):
+        if threads < 1:
+            raise ValueError("threads must be at least 1")
         self.app = app
         self.host = host
         self.port = port
-        self.ssl_context = (
-            create_ssl_context(ssl_keyfile, ssl_certfile)
-            if ssl_keyfile and ssl_certfile
-            else None
-        )
+        self.uds = uds
+        self.uds_permissions = uds_permissions
+        self.sock = sock
+        self.fd = fd
+        self.systemd = systemd
+        self.backlog = backlog
+        self.threads = threads
+        self.reuse_port = reuse_port
+        self.http2 = http2
+        self.http2_max_concurrent_streams = http2_max_concurrent_streams
+        self._http2_session: Optional[Type["Http2Session"]] = None
+        if http2:
+            from .http2 import Http2Session  # requires the optional h2 package
+
+            self._http2_session = Http2Session
+        alpn_protocols = ["h2", "http/1.1"] if http2 else None
+        if tls is None and ssl_keyfile and ssl_certfile:
+            tls = TLSConfig(ssl_certfile, ssl_keyfile, alpn_protocols=alpn_protocols)
+        elif tls is not None and alpn_protocols and tls.alpn_protocols is None:
+            tls.alpn_protocols = alpn_protocols
+            tls.rebuild()
+        self.tls = tls
+        self.tracer = tracer
+        self.admission = admission
+        self.capture = capture
         self.request_parser = RequestParser()
         self.response_writer = ResponseWriter()
         self.connection_handler = ConnectionHandler()
         self.error_handler = ErrorHandler()
+        self.shutdown_timeout = shutdown_timeout
+        self.ready = asyncio.Event()
+        self._should_exit = asyncio.Event()
+        self._connections: set[asyncio.Task] = set()
+        self._server: Optional[asyncio.Server] = None
+        self._servers: list[asyncio.Server] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_threads: list[
+            tuple[threading.Thread, asyncio.AbstractEventLoop, asyncio.Event]
+        ] = []
+        self.server_address: tuple[str, Optional[int]] = (host, port)
 
     async def handle_connection(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
-        client_addr = writer.get_extra_info("peername")
+        # Unix socket peers have no address; ASGI expects None for them.
+        client_addr = writer.get_extra_info("peername") or None
         logger.info(f"New connection from {client_addr}")
+        task = asyncio.current_task()
+        if task is not None:
+            self._connections.add(task)
         try:
+            if self.tls is not None:
+                await self.tls.handshake(writer)
             await self._process_connection(reader, writer, client_addr)
         except Exception as e:
             await self.error_handler.handle_error(e, client_addr)
         finally:
             await self._close_connection(writer, client_addr)
+            self._connections.discard(task)  # type: ignore[arg-type]
 
     async def _process_connection(
         self,
@@ -55,17 +130,150 @@ class NimbusServer:
         writer: asyncio.StreamWriter,
         client_addr: tuple[str, int],
     ) -> None:
-        method, path, headers = await self.request_parser.parse_request(reader)
-        scope = self.request_parser.create_scope(
-            method, path, headers, (self.host, self.port), client_addr
+        request_line = None
+        if self.http2:
+            if self._negotiated_http2(writer):
+                return await self._serve_http2(reader, writer, client_addr, b"")
+            request_line = await reader.readline()
+            if request_line == PREFACE_LINE:
+                return await self._serve_http2(
+                    reader, writer, client_addr, request_line
+                )
+        started = time.monotonic_ns() if self.tracer is not None else 0
+        method, path, headers = await self.request_parser.parse_request(
+            reader, request_line
+        )
+        root = (
+            self.tracer.start_request(f"HTTP {method}", headers, started)
+            if self.tracer is not None
+            else None
         )
-        connection = create_connection(
-            scope, reader.read, self._create_send_function(writer)
+        if root is None:
+            await self._handle_request(
+                reader, writer, client_addr, method, path, headers
+            )
+            return
+        assert self.tracer is not None
+        with root:
+            self.tracer.record(root, "http.parse", started, time.monotonic_ns())
+            root.set_attribute("http.method", method)
+            root.set_attribute("http.target", path)
+            status = await self._handle_request(
+                reader, writer, client_addr, method, path, headers
+            )
+            root.set_attribute("http.status_code", status)
+
+    async def _handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        client_addr: tuple[str, int],
+        method: str,
+        path: str,
+        headers: list[tuple[bytes, bytes]],
+    ) -> int:
+        entry = None
+        if self.capture is not None:
+            entry = self.capture.begin(method, path, headers)
+        if entry is None:
+            return await self._serve_request(
+                reader, writer, client_addr, method, path, headers
+            )
+        status = 0
+        try:
+            status = await self._serve_request(
+                reader, writer, client_addr, method, path, headers, entry
+            )
+            return status
+        finally:
+            self.capture.end(entry, status)
+
+    async def _serve_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        client_addr: tuple[str, int],
+        method: str,
+        path: str,
+        headers: list[tuple[bytes, bytes]],
+        entry: Optional[CaptureEntry] = None,
+    ) -> int:
+        constant = self.app.constant_response(method, path.partition("?")[0])
+        if constant is not None:
+            await self.response_writer.send_precomputed(writer, constant)
+            return constant.status_code
+        if self.admission is None:
+            return await self._dispatch(
+                reader, writer, client_addr, method, path, headers, entry
+            )
+        admitted_at = await self.admission.acquire(path)
+        if admitted_at is None:
+            await self.response_writer.send_precomputed(writer, self.admission.response)
+            return self.admission.response.status_code
+        slot = AdmissionSlot(self.admission, admitted_at)
+        dropped = False
+        try:
+            return await self._dispatch(
+                reader, writer, client_addr, method, path, headers, entry, slot
+            )
+        except asyncio.TimeoutError:
+            dropped = True
+            raise
+        finally:
+            slot.release(dropped)
+
+    async def _dispatch(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        client_addr: tuple[str, int],
+        method: str,
+        path: str,
+        headers: list[tuple[bytes, bytes]],
+        entry: Optional[CaptureEntry] = None,
+        slot: Optional[AdmissionSlot] = None,
+    ) -> int:
+        scope = self.request_parser.create_scope(
+            method, path, headers, self.server_address, client_addr
         )
+        receive = reader.read
+        if entry is not None:
+            receive = entry.tee(receive, self.capture.max_body)  # type: ignore[union-attr]
+        send = self._create_send_function(writer)
+        if slot is not None:
+            send = slot.wrap_send(send)
+        connection = create_connection(scope, receive, send)
         await self.app(connection)
+        if entry is not None:
+            entry.route = scope.get("route")
         response = await self.connection_handler.handle_connection(connection)
         if isinstance(response, HttpResponse):
             await self._send_response(writer, response)
+            return response.status_code
+        return getattr(connection, "response_status", 0)
+
+    def _negotiated_http2(self, writer: asyncio.StreamWriter) -> bool:
+        ssl_object = writer.get_extra_info("ssl_object")
+        return ssl_object is not None and ssl_object.selected_alpn_protocol() == "h2"
+
+    async def _serve_http2(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        client_addr: tuple[str, int],
+        preface: bytes,
+    ) -> None:
+        assert self._http2_session is not None
+        session = self._http2_session(
+            self.app,
+            reader,
+            writer,
+            self.server_address,
+            client_addr,
+            max_concurrent_streams=self.http2_max_concurrent_streams,
+            admission=self.admission,
+        )
+        await session.serve(preface)
 
     def _create_send_function(self, writer: asyncio.StreamWriter):
         return lambda event: self.response_writer.send(writer, event)
@@ -73,14 +281,14 @@ class NimbusServer:
     async def _send_response(
         self, writer: asyncio.StreamWriter, response: HttpResponse
     ):
+        headers = MutableHeaders()
+        headers.update(response.headers)
         await self.response_writer.send(
             writer,
             {
                 "type": "http.response.start",
                 "status": response.status_code,
-                "headers": [
-                    (k.encode(), v.encode()) for k, v in response.headers.items()
-                ],
+                "headers": headers.raw,
             },
         )
         await self.response_writer.send(
@@ -93,23 +301,229 @@ class NimbusServer:
     ) -> None:
         logger.debug(f"Closing connection from {client_addr}")
         writer.close()
-        await writer.wait_closed()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            # Already reported by the error handler (e.g. a failed handshake).
+            pass
         logger.info(f"Connection from {client_addr} closed")
 
     async def start(self) -> None:
-        server = await asyncio.start_server(
-            self.handle_connection, self.host, self.port, ssl=self.ssl_context
+        if self.threads > 1:
+            loop_bound = self.app.loop_bound_resources()
+            if loop_bound:
+                raise ValueError(
+                    f"threads={self.threads} would use {', '.join(loop_bound)} "
+                    "from several event loops; use threads=1"
+                )
+        self._should_exit.clear()
+        self._loop = asyncio.get_running_loop()
+        await self.app.startup()
+        try:
+            self._servers = await self._create_servers()
+            self._server = self._servers[0]
+            self.server_address = self._listen_address(self._server)
+            self._install_signal_handlers()
+            if self.tls is not None:
+                self.tls.start()
+            if self.capture is not None:
+                self.capture.start()
+
+            try:
+                if self.threads > 1:
+                    await self._start_loop_threads()
+                self.ready.set()
+
+                protocol = "https" if self.tls else "http"
+                loops = f" ({self.threads} event loops)" if self.threads > 1 else ""
+                for server in self._servers:
+                    for listener in server.sockets:
+                        logger.info(
+                            f"Nimbus server running on {protocol}://"
+                            f"{describe_socket(listener)}{loops}"
+                        )
+
+                await self._should_exit.wait()
+            finally:
+                for server in self._servers:
+                    server.close()
+                for server in self._servers:
+                    await server.wait_closed()
+                self.ready.clear()
+                self._remove_unix_socket()
+                await asyncio.gather(self._drain(), self._stop_loop_threads())
+        finally:
+            if self.tls is not None:
+                await self.tls.stop()
+            if self.capture is not None:
+                await self.capture.stop()
+            await self.app.shutdown()
+            if self.tracer is not None:
+                await self.tracer.shutdown()
+        logger.info("Server stopped.")
+
+    async def _create_servers(self) -> list[asyncio.Server]:
+        # TLS is started per connection (see handle_connection) so that a
+        # reloaded or rotated context applies to the next handshake.
+        options: dict[str, Any] = {"backlog": self.backlog}
+        if self.uds:
+            sock = bind_unix_socket(self.uds, self.uds_permissions, self.backlog)
+            return [
+                await asyncio.start_unix_server(
+                    self.handle_connection, sock=sock, **options
+                )
+            ]
+
+        sockets = []
+        if self.sock is not None:
+            sockets.append(self.sock)
+        if self.fd is not None:
+            sockets.append(socket_from_fd(self.fd))
+        if self.systemd:
+            sockets.extend(socket_from_fd(fd) for fd in systemd_listen_fds())
+        if not sockets:
+            return [
+                await asyncio.start_server(
+                    self.handle_connection,
+                    self.host,
+                    self.port,
+                    reuse_port=self.reuse_port or None,
+                    **options,
+                )
+            ]
+
+        return [await self._serve_socket(sock) for sock in sockets]
+
+    async def _serve_socket(self, sock: socket.socket) -> asyncio.Server:
+        sock.setblocking(False)
+        if sock.family == socket.AF_UNIX:
+            return await asyncio.start_unix_server(
+                self.handle_connection, sock=sock, backlog=self.backlog
+            )
+        return await asyncio.start_server(
+            self.handle_connection, sock=sock, backlog=self.backlog
         )
 
-        protocol = "https" if self.ssl_context else "http"
-        logger.info(f"Nimbus server running on {protocol}://{self.host}:{self.port}")
+    async def _start_loop_threads(self) -> None:
+        """Start ``threads - 1`` more event loops, each in its own thread.
+
+        Each loop accepts on its own socket bound to the same address when
+        the listener has ``SO_REUSEPORT`` set (see ``reuse_port``), and on a
+        duplicate of the listener otherwise; either way the kernel hands
+        every connection to exactly one loop. The app and everything hanging off it are
+        shared; connections and their tasks stay on the loop that accepted
+        them.
+        """
+        listeners = [sock for server in self._servers for sock in server.sockets]
+        for index in range(1, self.threads):
+            sockets = [
+                bind_reuse_port(sock, self.backlog)
+                if _reuses_port(sock)
+                else sock.dup()
+                for sock in listeners
+            ]
+            started: concurrent.futures.Future = concurrent.futures.Future()
+            thread = threading.Thread(
+                target=asyncio.run,
+                args=(self._run_loop_thread(sockets, started),),
+                name=f"nimbus-loop-{index}",
+                daemon=True,
+            )
+            thread.start()
+            loop, stopping = await asyncio.wrap_future(started)
+            self._loop_threads.append((thread, loop, stopping))
+
+    async def _run_loop_thread(
+        self, sockets: list[socket.socket], started: concurrent.futures.Future
+    ) -> None:
+        stopping = asyncio.Event()
+        try:
+            servers = [await self._serve_socket(sock) for sock in sockets]
+        except BaseException as e:
+            for sock in sockets:
+                sock.close()
+            started.set_exception(e)
+            return
+        started.set_result((asyncio.get_running_loop(), stopping))
+        try:
+            await stopping.wait()
+        finally:
+            for server in servers:
+                server.close()
+            for server in servers:
+                await server.wait_closed()
+            await self._drain()
+
+    async def _stop_loop_threads(self) -> None:
+        threads, self._loop_threads = self._loop_threads, []
+        for _, loop, stopping in threads:
+            loop.call_soon_threadsafe(stopping.set)
+        for thread, _, _ in threads:
+            await asyncio.to_thread(thread.join)
 
-        async with server:
-            await server.serve_forever()
+    def _listen_address(self, server: asyncio.Server) -> tuple[str, Optional[int]]:
+        if not server.sockets:
+            return (self.host, self.port)
+        address = server.sockets[0].getsockname()
+        if isinstance(address, tuple):
+            return address[:2]
+        return (address, None)  # unix socket path
+
+    def _remove_unix_socket(self) -> None:
+        if self.uds:
+            try:
+                os.unlink(self.uds)
+            except FileNotFoundError:
+                pass
+
+    def stop(self) -> None:
+        """Ask the server to shut down; safe to call from any thread."""
+        loop = self._loop
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if loop is None or loop.is_closed() or current is loop:
+            self._should_exit.set()
+        else:
+            loop.call_soon_threadsafe(self._should_exit.set)
+
+    def _install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        if self.tls is not None and hasattr(signal, "SIGHUP"):
+            try:
+                loop.add_signal_handler(signal.SIGHUP, self.tls.reload)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+
+    async def _drain(self) -> None:
+        # Each loop drains the connections it accepted.
+        loop = asyncio.get_running_loop()
+        connections = {
+            task for task in set(self._connections) if task.get_loop() is loop
+        }
+        if not connections:
+            return
+        logger.info(f"Waiting for {len(connections)} connection(s) to finish")
+        _, pending = await asyncio.wait(connections, timeout=self.shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
 
     def run(self) -> None:
-        loop = asyncio.get_event_loop()
         try:
-            loop.run_until_complete(self.start())
+            asyncio.run(self.start())
         except KeyboardInterrupt:
             logger.info("Server stopped.")
+
+
+def _reuses_port(sock: Any) -> bool:
+    if sock.family == socket.AF_UNIX or not hasattr(socket, "SO_REUSEPORT"):
+        return False
+    return bool(sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT))
@@ -0,0 +1,80 @@
+import logging
+import os
+import socket
+import stat
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# First file descriptor passed by systemd socket activation (sd_listen_fds(3)).
+SD_LISTEN_FDS_START = 3
+
+
+def bind_unix_socket(
+    path: str, permissions: Optional[int] = None, backlog: int = 100
+) -> socket.socket:
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)  # stale socket left by a previous process
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        if permissions is not None:
+            os.chmod(path, permissions)
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def bind_reuse_port(listener: socket.socket, backlog: int = 100) -> socket.socket:
+    """Bind another listening socket to ``listener``'s address with
+    ``SO_REUSEPORT``, so the kernel spreads connections across both."""
+    sock = socket.socket(listener.family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if listener.family == socket.AF_INET6:
+            v6only = listener.getsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY)
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, v6only)
+        sock.bind(listener.getsockname())
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def socket_from_fd(fd: int) -> socket.socket:
+    sock = socket.socket(fileno=fd)
+    if sock.type != socket.SOCK_STREAM:
+        sock.detach()
+        raise ValueError(f"File descriptor {fd} is not a stream socket")
+    return sock
+
+
+def systemd_listen_fds(unset_environment: bool = True) -> list[int]:
+    try:
+        if int(os.environ.get("LISTEN_PID", "")) != os.getpid():
+            return []
+        count = int(os.environ.get("LISTEN_FDS", "0"))
+    except ValueError:
+        return []
+    finally:
+        if unset_environment:
+            for name in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+                os.environ.pop(name, None)
+    fds = list(range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + count))
+    for fd in fds:
+        os.set_inheritable(fd, False)
+    return fds
+
+
+def describe_socket(sock: socket.socket) -> str:
+    address = sock.getsockname()
+    if sock.family == socket.AF_UNIX:
+        return f"unix:{address}"
+    return f"{address[0]}:{address[1]}"
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from nimbus.utils import create_ssl_context
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TLSStats:
+    handshakes: int = 0
+    resumed: int = 0
+    failed: int = 0
+    reloads: int = 0
+    rotations: int = 0
+
+    @property
+    def resumption_ratio(self) -> float:
+        return self.resumed / self.handshakes if self.handshakes else 0.0
+
+
+class TLSConfig:
+    """Server TLS settings plus the context currently used for new handshakes.
+
+    OpenSSL generates session ticket keys when a context is created and never
+    rotates them, so keys are rotated by building a fresh context every
+    ``ticket_key_lifetime`` seconds. Reloading the certificate works the same
+    way: the new context only applies to new handshakes, and established
+    connections keep the one they were accepted with.
+    """
+
+    def __init__(
+        self,
+        certfile: str,
+        keyfile: str,
+        *,
+        alpn_protocols: Optional[list[str]] = None,
+        ciphers: Optional[str] = None,
+        ecdh_curve: Optional[str] = None,
+        num_tickets: int = 2,
+        ticket_key_lifetime: Optional[float] = 3600.0,
+        watch_interval: Optional[float] = 5.0,
+        handshake_timeout: float = 10.0,
+    ):
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.alpn_protocols = alpn_protocols
+        self.ciphers = ciphers
+        self.ecdh_curve = ecdh_curve
+        self.num_tickets = num_tickets
+        self.ticket_key_lifetime = ticket_key_lifetime
+        self.watch_interval = watch_interval
+        self.handshake_timeout = handshake_timeout
+        self.stats = TLSStats()
+        self._stats_lock = threading.Lock()
+        self._mtimes = self._file_mtimes()
+        self.context = self._build_context()
+        self._context_created = time.monotonic()
+        self._watcher: Optional[asyncio.Task] = None
+
+    def _build_context(self) -> ssl.SSLContext:
+        context = create_ssl_context(
+            self.keyfile,
+            self.certfile,
+            self.alpn_protocols,
+            ciphers=self.ciphers,
+            ecdh_curve=self.ecdh_curve,
+            num_tickets=self.num_tickets,
+        )
+        assert context is not None
+        return context
+
+    def _file_mtimes(self) -> tuple[float, float]:
+        return (os.stat(self.certfile).st_mtime, os.stat(self.keyfile).st_mtime)
+
+    def rebuild(self) -> None:
+        """Replace the context, which also discards the old session ticket keys."""
+        self.context = self._build_context()
+        self._context_created = time.monotonic()
+
+    def reload(self) -> bool:
+        """Rebuild the context from the files on disk, keeping the old one on error."""
+        try:
+            self._mtimes = self._file_mtimes()
+            self.rebuild()
+        except (OSError, ssl.SSLError) as e:
+            logger.error(f"Failed to reload TLS certificate {self.certfile}: {e}")
+            return False
+        self.stats.reloads += 1
+        logger.info(f"Reloaded TLS certificate {self.certfile}")
+        return True
+
+    def _check(self) -> None:
+        try:
+            changed = self._file_mtimes() != self._mtimes
+        except OSError:
+            # Files are being replaced; try again on the next tick.
+            return
+        if changed:
+            self.reload()
+        elif (
+            self.ticket_key_lifetime is not None
+            and time.monotonic() - self._context_created >= self.ticket_key_lifetime
+        ):
+            self.rebuild()
+            self.stats.rotations += 1
+
+    async def _watch(self) -> None:
+        interval = min(
+            value
+            for value in (self.watch_interval, self.ticket_key_lifetime)
+            if value is not None
+        )
+        while True:
+            await asyncio.sleep(interval)
+            self._check()
+
+    def start(self) -> None:
+        if self.watch_interval is None and self.ticket_key_lifetime is None:
+            return
+        if self._watcher is None:
+            self._watcher = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def handshake(self, writer: asyncio.StreamWriter) -> None:
+        try:
+            await writer.start_tls(
+                self.context, ssl_handshake_timeout=self.handshake_timeout
+            )
+        except BaseException:
+            with self._stats_lock:
+                self.stats.failed += 1
+            raise
+        ssl_object = writer.get_extra_info("ssl_object")
+        with self._stats_lock:
+            self.stats.handshakes += 1
+            if ssl_object is not None and ssl_object.session_reused:
+                self.stats.resumed += 1
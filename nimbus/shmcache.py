@@ -0,0 +1,294 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Optional, Union
+
+Key = Union[bytes, str]
+
+_MAGIC = b"NIMBUSC1"
+# magic, sets, ways, slot size
+_FILE_HEADER = struct.Struct("<8sIII")
+_FILE_HEADER_SIZE = 64
+# seq, key length, value length, key hash, expires at, last used
+_SLOT_HEADER = struct.Struct("<IIIQdd")
+_SEQ = struct.Struct("<I")
+_LAST_USED = struct.Struct("<d")
+_LAST_USED_OFFSET = _SLOT_HEADER.size - _LAST_USED.size
+
+_TAG = struct.Struct("<Q")
+# A writer that died mid-update leaves its slot odd forever; give up on it.
+_MAX_READ_RETRIES = 1000
+
+
+def _default_path(name: str) -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"nimbus-{name}")
+
+
+def _hash(key: bytes) -> int:
+    # Must be identical in every process, so not the randomized hash(). Zero
+    # marks a free slot.
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+@dataclass
+class SharedCacheStats:
+    hits: int
+    misses: int
+    sets: int
+    evictions: int
+    too_large: int
+    retries: int
+    nbytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SharedCache:
+    """A byte-string cache in a memory-mapped file shared between processes.
+
+    Keys hash to a set of ``ways`` fixed-size slots (open addressing within
+    the set). Each set starts with the 64-bit hashes of its slots so a lookup
+    finds its slot with one unpack and ``tuple.index``. A full set evicts
+    its least recently used slot, so eviction is LRU per set and approximate
+    overall. Slots are guarded by seqlocks: readers never block and retry if
+    a writer changed the slot under them. Writers serialize on ``stripes``
+    byte-range file locks, plus a thread lock per stripe since file locks
+    are per process.
+
+    Every process opens the cache with the same ``name`` (or ``path``) and
+    geometry. Stats are counted per process.
+    """
+
+    def __init__(
+        self,
+        name: str = "cache",
+        *,
+        path: Optional[str] = None,
+        capacity: int = 65536,
+        ways: int = 8,
+        slot_size: int = 512,
+        stripes: int = 64,
+    ):
+        if slot_size <= _SLOT_HEADER.size or ways < 1 or capacity < ways:
+            raise ValueError("Invalid cache geometry")
+        self.path = path or _default_path(name)
+        self.ways = ways
+        self.sets = capacity // ways
+        self.slot_size = slot_size
+        self.stripes = stripes
+        self.max_item_size = slot_size - _SLOT_HEADER.size
+        self._tags = struct.Struct(f"<{ways}Q")
+        self._set_size = self._tags.size + ways * slot_size
+        self.nbytes = _FILE_HEADER_SIZE + self.sets * self._set_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._init_file()
+            self._map = mmap.mmap(self._fd, self.nbytes)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._sets = 0
+        self._evictions = 0
+        self._too_large = 0
+        self._retries = 0
+
+    def _init_file(self) -> None:
+        header = _FILE_HEADER.pack(_MAGIC, self.sets, self.ways, self.slot_size)
+        # Byte 0 of the lock range is reserved for initialization.
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            existing = os.pread(self._fd, _FILE_HEADER.size, 0)
+            if not existing.strip(b"\0"):
+                os.ftruncate(self._fd, self.nbytes)
+                os.pwrite(self._fd, header, 0)
+            elif existing != header:
+                raise ValueError(f"{self.path} holds a cache with a different geometry")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    def _set_offset(self, key_hash: int) -> int:
+        return _FILE_HEADER_SIZE + (key_hash % self.sets) * self._set_size
+
+    def _slot_offset(self, base: int, way: int) -> int:
+        return base + self._tags.size + way * self.slot_size
+
+    def _lock(self, key_hash: int) -> int:
+        stripe = key_hash % self.sets % self.stripes
+        self._thread_locks[stripe].acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe + 1)
+        return stripe
+
+    def _unlock(self, stripe: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe + 1)
+        self._thread_locks[stripe].release()
+
+    def get(self, key: Key) -> Optional[bytes]:
+        if isinstance(key, str):
+            key = key.encode()
+        key_hash = _hash(key)
+        buf = self._map
+        base = self._set_offset(key_hash)
+        for _ in range(_MAX_READ_RETRIES):
+            try:
+                way = self._tags.unpack_from(buf, base).index(key_hash)
+            except ValueError:
+                break
+            offset = self._slot_offset(base, way)
+            seq, key_len, value_len, slot_hash, expires, _ = _SLOT_HEADER.unpack_from(
+                buf, offset
+            )
+            if seq & 1 or slot_hash != key_hash:
+                with self._stats_lock:
+                    self._retries += 1
+                continue  # a writer is in the middle of this slot
+            start = offset + _SLOT_HEADER.size
+            slot_key = buf[start : start + key_len]
+            value = buf[start + key_len : start + key_len + value_len]
+            if _SEQ.unpack_from(buf, offset)[0] != seq:
+                with self._stats_lock:
+                    self._retries += 1
+                continue
+            if slot_key != key:
+                break
+            now = time.time()
+            if expires and expires <= now:
+                break
+            # Racy on purpose: the access time only steers eviction.
+            _LAST_USED.pack_into(buf, offset + _LAST_USED_OFFSET, now)
+            with self._stats_lock:
+                self._hits += 1
+            return value
+        with self._stats_lock:
+            self._misses += 1
+        return None
+
+    def set(self, key: Key, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store ``value``; return False if key and value do not fit in a slot."""
+        if isinstance(key, str):
+            key = key.encode()
+        if len(key) + len(value) > self.max_item_size:
+            with self._stats_lock:
+                self._too_large += 1
+            return False
+        key_hash = _hash(key)
+        now = time.time()
+        expires = now + ttl if ttl else 0.0
+        base = self._set_offset(key_hash)
+        stripe = self._lock(key_hash)
+        try:
+            tags = self._tags.unpack_from(self._map, base)
+            way = (
+                tags.index(key_hash)
+                if key_hash in tags
+                else self._victim(base, tags, now)
+            )
+            self._write(base, way, key, value, key_hash, expires, now)
+        finally:
+            self._unlock(stripe)
+        with self._stats_lock:
+            self._sets += 1
+        return True
+
+    def _victim(self, base: int, tags: tuple[int, ...], now: float) -> int:
+        if 0 in tags:
+            return tags.index(0)
+        victim, oldest = 0, float("inf")
+        for way in range(self.ways):
+            *_, expires, last_used = _SLOT_HEADER.unpack_from(
+                self._map, self._slot_offset(base, way)
+            )
+            if expires and expires <= now:
+                return way
+            if last_used < oldest:
+                victim, oldest = way, last_used
+        with self._stats_lock:
+            self._evictions += 1
+        return victim
+
+    def _write(
+        self,
+        base: int,
+        way: int,
+        key: bytes,
+        value: bytes,
+        key_hash: int,
+        expires: float,
+        now: float,
+    ) -> None:
+        buf = self._map
+        offset = self._slot_offset(base, way)
+        seq = (_SEQ.unpack_from(buf, offset)[0] + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(buf, offset, seq)
+        start = offset + _SLOT_HEADER.size
+        buf[start : start + len(key)] = key
+        buf[start + len(key) : start + len(key) + len(value)] = value
+        _SLOT_HEADER.pack_into(
+            buf, offset, seq, len(key), len(value), key_hash, expires, now
+        )
+        _TAG.pack_into(buf, base + way * _TAG.size, key_hash)
+        _SEQ.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF)
+
+    def delete(self, key: Key) -> bool:
+        if isinstance(key, str):
+            key = key.encode()
+        key_hash = _hash(key)
+        base = self._set_offset(key_hash)
+        stripe = self._lock(key_hash)
+        try:
+            tags = self._tags.unpack_from(self._map, base)
+            if key_hash not in tags:
+                return False
+            self._write(base, tags.index(key_hash), b"", b"", 0, 0.0, 0.0)
+            return True
+        finally:
+            self._unlock(stripe)
+
+    def clear(self) -> None:
+        for stripe in range(self.stripes):
+            self._thread_locks[stripe].acquire()
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe + 1)
+        try:
+            empty = bytes(self._tags.size)
+            for base in range(_FILE_HEADER_SIZE, self.nbytes, self._set_size):
+                self._map[base : base + len(empty)] = empty
+        finally:
+            for stripe in range(self.stripes):
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe + 1)
+                self._thread_locks[stripe].release()
+
+    def stats(self) -> SharedCacheStats:
+        return SharedCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            sets=self._sets,
+            evictions=self._evictions,
+            too_large=self._too_large,
+            retries=self._retries,
+            nbytes=self.nbytes,
+        )
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+            os.close(self._fd)
+
+    def unlink(self) -> None:
+        """Remove the backing file; processes that still have it open keep working."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
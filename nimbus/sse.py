@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Literal,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from nimbus.connections import HttpConnection
+from nimbus.headers import MutableHeaders
+from nimbus.response import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop", "disconnect"]
+
+PING = b": ping\n\n"
+
+
+def encode_event(
+    data: Union[str, bytes],
+    *,
+    event: Optional[str] = None,
+    id: Optional[str] = None,
+    retry: Optional[int] = None,
+) -> bytes:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    parts = []
+    if id is not None:
+        parts.append(b"id: " + id.encode("utf-8") + b"\n")
+    if event is not None:
+        parts.append(b"event: " + event.encode("utf-8") + b"\n")
+    if retry is not None:
+        parts.append(b"retry: %d\n" % retry)
+    for line in data.splitlines() or [b""]:
+        parts.append(b"data: " + line + b"\n")
+    parts.append(b"\n")
+    return b"".join(parts)
+
+
+class Subscription:
+    __slots__ = ("channel", "queue", "readable", "dropped", "closed", "loop")
+
+    def __init__(self, channel: "EventChannel", backlog: list[bytes]):
+        self.channel = channel
+        self.queue: deque[bytes] = deque(backlog)
+        self.readable = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+        self.loop = _running_loop()
+        if backlog:
+            self.readable.set()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self
+
+    async def __anext__(self) -> bytes:
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self.readable.clear()
+            await self.readable.wait()
+        return self.queue.popleft()
+
+    async def get(self, timeout: Optional[float]) -> Optional[bytes]:
+        """Like ``__anext__`` but return None if nothing arrives in ``timeout``."""
+        if not self.queue and not self.closed:
+            self.readable.clear()
+            # A timer handle is much cheaper than a task per wait when
+            # thousands of subscribers are idle.
+            timer = (
+                asyncio.get_running_loop().call_later(timeout, self.readable.set)
+                if timeout is not None
+                else None
+            )
+            try:
+                await self.readable.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        if self.queue:
+            return self.queue.popleft()
+        if self.closed:
+            raise StopAsyncIteration
+        return None
+
+    def push(self, payload: bytes) -> None:
+        if len(self.queue) >= self.channel.queue_size:
+            if self.channel.overflow == "disconnect":
+                logger.info("Disconnecting slow event stream subscriber")
+                self.queue.clear()
+                self.close()
+                return
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(payload)
+        self.readable.set()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.readable.set()
+            with self.channel._lock:
+                self.channel.subscribers.discard(self)
+
+    async def aclose(self) -> None:
+        self.close()
+
+
+class EventChannel:
+    """Fan-out of server-sent events to many subscribers.
+
+    Each published event is encoded once and the same bytes object is queued
+    for every subscriber. The last ``replay_size`` events are kept so that a
+    reconnecting client can resume from its ``Last-Event-ID``. Subscribers
+    may be on other event loop threads than the publisher; their events are
+    handed to their own loop.
+    """
+
+    def __init__(
+        self,
+        replay_size: int = 100,
+        queue_size: int = 64,
+        overflow: OverflowPolicy = "drop",
+    ):
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.subscribers: set[Subscription] = set()
+        self.replay: deque[tuple[str, bytes]] = deque(maxlen=replay_size)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def publish(
+        self,
+        data: Union[str, bytes],
+        *,
+        event: Optional[str] = None,
+        id: Optional[str] = None,
+    ) -> str:
+        with self._lock:
+            if id is None:
+                self._next_id += 1
+                id = str(self._next_id)
+            payload = encode_event(data, event=event, id=id)
+            self.replay.append((id, payload))
+            subscribers = tuple(self.subscribers)
+        self._deliver(subscribers, Subscription.push, payload)
+        return id
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        with self._lock:
+            subscription = Subscription(self, self._backlog(last_event_id))
+            self.subscribers.add(subscription)
+        return subscription
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers = tuple(self.subscribers)
+        self._deliver(subscribers, Subscription.close)
+
+    def _deliver(
+        self,
+        subscribers: tuple[Subscription, ...],
+        method: Callable[..., None],
+        *args: bytes,
+    ) -> None:
+        current = _running_loop()
+        for subscriber in subscribers:
+            loop = subscriber.loop
+            if loop is None or loop is current:
+                method(subscriber, *args)
+                continue
+            try:
+                loop.call_soon_threadsafe(method, subscriber, *args)
+            except RuntimeError:
+                # The subscriber's loop has been closed.
+                with self._lock:
+                    self.subscribers.discard(subscriber)
+
+    def _backlog(self, last_event_id: Optional[str]) -> list[bytes]:
+        if last_event_id is None:
+            return []
+        backlog: list[bytes] = []
+        for event_id, payload in reversed(self.replay):
+            if event_id == last_event_id:
+                break
+            backlog.append(payload)
+        backlog.reverse()
+        return backlog[-self.queue_size :]
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class EventSourceResponse(StreamingResponse):
+    __slots__ = ()
+
+    def __init__(
+        self,
+        source: AsyncIterable[Union[str, bytes]],
+        connection: Optional[HttpConnection] = None,
+        *,
+        ping_interval: Optional[float] = 15.0,
+        retry: Optional[int] = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        response_headers = MutableHeaders()
+        response_headers.update(headers or {})
+        response_headers["content-type"] = "text/event-stream"
+        response_headers.setdefault("cache-control", "no-cache")
+        response_headers["x-accel-buffering"] = "no"
+        super().__init__(
+            self._stream(source, ping_interval, retry),
+            connection,
+            status_code=status_code,
+            headers=response_headers,
+        )
+
+    @staticmethod
+    async def _stream(
+        source: AsyncIterable[Union[str, bytes]],
+        ping_interval: Optional[float],
+        retry: Optional[int],
+    ) -> AsyncIterator[bytes]:
+        if retry is not None:
+            yield b"retry: %d\n\n" % retry
+        if isinstance(source, Subscription):
+            try:
+                while True:
+                    try:
+                        payload = await source.get(ping_interval)
+                    except StopAsyncIteration:
+                        return
+                    yield PING if payload is None else payload
+            finally:
+                source.close()
+        iterator = source.__aiter__()
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=ping_interval)
+                if not done:
+                    yield PING
+                    continue
+                try:
+                    item = pending.result()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    pending = None
+                yield item if isinstance(item, bytes) else encode_event(item)
+        finally:
+            if pending is not None:
+                pending.cancel()
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
@@ -0,0 +1,367 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Any, Optional, Union
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+AttributeValue = Union[str, bool, int, float]
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = (
+        "tracer",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        trace_id: str,
+        parent_id: Optional[str],
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        start_ns: Optional[int] = None,
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        self.end_ns = 0
+        self.attributes: dict[str, AttributeValue] = {}
+        self.status = STATUS_UNSET
+        self._token: Any = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = time.monotonic_ns() if end_ns is None else end_ns
+        self.tracer.on_end(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self.status = STATUS_ERROR
+            self.attributes["exception.type"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.end()
+
+
+class _NoopSpan:
+    """Returned for unsampled requests so instrumentation costs two calls."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("nimbus_span", default=None)
+
+
+def span(name: str) -> Union[Span, _NoopSpan]:
+    """Start a child of the current span, or do nothing outside a sampled trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.tracer, parent.trace_id, parent.span_id, name)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """The ``traceparent`` header to send on outgoing calls made for this request."""
+    current = _current_span.get()
+    return current.traceparent if current is not None else None
+
+
+def parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    _, trace_id, parent_id, flags = parts[:4]
+    if len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        if int(trace_id, 16) == 0 or int(parent_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id.lower(), parent_id.lower(), sampled
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    async def export(self, request: dict[str, Any]) -> None:
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        pass
+
+
+class FileExporter(SpanExporter):
+    """Appends one OTLP/JSON ``ExportTraceServiceRequest`` per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def export(self, request: dict[str, Any]) -> None:
+        line = json.dumps(request, separators=(",", ":"))
+        await asyncio.to_thread(self._write, line)
+
+    def _write(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class CollectorExporter(SpanExporter):
+    """POSTs OTLP/JSON to a local collector, e.g. ``http://localhost:4318/v1/traces``."""
+
+    def __init__(self, url: str = "http://localhost:4318/v1/traces", timeout=5.0):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError("CollectorExporter supports plain http:// URLs")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/v1/traces"
+        self.timeout = timeout
+
+    async def export(self, request: dict[str, Any]) -> None:
+        body = json.dumps(request, separators=(",", ":")).encode()
+        payload = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode() + body
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            writer.write(payload)
+            status = await asyncio.wait_for(reader.readline(), self.timeout)
+            if status.split(b" ")[1:2] != [b"200"]:
+                logger.warning(f"Trace collector answered {status!r}")
+        finally:
+            writer.close()
+
+
+def _attributes(attributes: dict[str, AttributeValue]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed: dict[str, Any] = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+class Tracer:
+    """Creates request spans and batches finished ones to an exporter.
+
+    Sampling is decided once per request: an incoming ``traceparent`` keeps
+    its sampled flag, otherwise ``sample_rate`` of new traces are recorded.
+    Unsampled requests create no spans at all.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        *,
+        sample_rate: float = 1.0,
+        service_name: str = "nimbus",
+        max_batch: int = 512,
+        max_queue: int = 8192,
+        flush_interval: float = 1.0,
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._pending: list[Span] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._exporting = False
+        self._closing = False
+        self._closed = False
+        self._lock = threading.Lock()
+        # Spans are timed with the monotonic clock; this maps them to epoch
+        # time for export.
+        self._epoch_offset = time.time_ns() - time.monotonic_ns()
+
+    def start_request(
+        self,
+        name: str,
+        headers: list[tuple[bytes, bytes]],
+        start_ns: Optional[int] = None,
+    ) -> Optional[Span]:
+        parent = None
+        for header, value in headers:
+            if header.lower() == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = "", None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        if not sampled:
+            return None
+        if not trace_id:
+            trace_id = "%032x" % random.getrandbits(128)
+        return Span(self, trace_id, parent_id, name, SPAN_KIND_SERVER, start_ns)
+
+    def record(self, parent: Span, name: str, start_ns: int, end_ns: int) -> None:
+        """Record a child span for a phase that was timed before it had a parent."""
+        child = Span(self, parent.trace_id, parent.span_id, name, start_ns=start_ns)
+        child.end(end_ns)
+
+    def on_end(self, span: Span) -> None:
+        if self.exporter is None:
+            return
+        with self._lock:
+            if self._closed or len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._pending.append(span)
+            if self._closing:
+                return  # shutdown() drains what is left
+            if self._flusher is None or self._flusher.done():
+                # Exporters open a connection per export, so the flush may
+                # run on whichever loop ended the span.
+                self._flusher = asyncio.get_running_loop().create_task(
+                    self._flush_later()
+                )
+
+    async def _flush_later(self) -> None:
+        if len(self._pending) < self.max_batch:
+            await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        while self._pending and self.exporter is not None:
+            with self._lock:
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+                self._exporting = True
+            try:
+                await self.exporter.export(self.encode(batch))
+            except asyncio.CancelledError:
+                # Put the batch back for the next flush, e.g. the final one
+                # in shutdown() after a loop thread cancelled its tasks.
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            except Exception as e:
+                with self._lock:
+                    self.dropped += len(batch)
+                logger.warning(f"Failed to export {len(batch)} span(s): {e}")
+            finally:
+                self._exporting = False
+
+    async def shutdown(self) -> None:
+        with self._lock:
+            self._closing = True
+            flusher = self._flusher
+        if flusher is not None and not flusher.done():
+            loop = flusher.get_loop()
+            if loop is asyncio.get_running_loop():
+                await self._stop_flusher(flusher)
+            elif not loop.is_closed():
+                stopping = asyncio.run_coroutine_threadsafe(
+                    self._stop_flusher(flusher), loop
+                )
+                await asyncio.wrap_future(stopping)
+        await self.flush()
+        with self._lock:
+            self._closed = True
+            self.dropped += len(self._pending)
+            self._pending.clear()
+        if self.exporter is not None:
+            await self.exporter.close()
+
+    async def _stop_flusher(self, flusher: asyncio.Task) -> None:
+        # Runs on the flusher's own loop. A flusher still waiting for its
+        # interval holds no spans and is cancelled; one that is exporting is
+        # allowed to finish.
+        if not self._exporting:
+            flusher.cancel()
+        await asyncio.wait([flusher])
+
+    def encode(self, spans: list[Span]) -> dict[str, Any]:
+        offset = self._epoch_offset
+        encoded = []
+        for s in spans:
+            item: dict[str, Any] = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": s.kind,
+                "startTimeUnixNano": str(s.start_ns + offset),
+                "endTimeUnixNano": str(s.end_ns + offset),
+                "attributes": _attributes(s.attributes),
+                "status": {"code": s.status},
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            encoded.append(item)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _attributes({"service.name": self.service_name})
+                    },
+                    "scopeSpans": [{"scope": {"name": "nimbus"}, "spans": encoded}],
+                }
+            ]
+        }
@@ -1,4 +1,4 @@
-from typing import Any, Awaitable, Callable, TypedDict
+from typing import Any, Awaitable, Callable, NotRequired, TypedDict
 
 Scope = TypedDict(
     "Scope",
@@ -13,6 +13,11 @@ Scope = TypedDict(
         "headers": list[tuple[bytes, bytes]],
         "method": str,
         "query_string": bytes,
+        "scheme": NotRequired[str],
+        "app": NotRequired[Any],
+        "route": NotRequired[str],
+        # Rate limiters that already charged this request.
+        "ratelimited": NotRequired[set[Any]],
     },
 )
 
@@ -3,10 +3,28 @@ from typing import Optional
 
 
 def create_ssl_context(
-    keyfile: Optional[str], certfile: Optional[str]
+    keyfile: Optional[str],
+    certfile: Optional[str],
+    alpn_protocols: Optional[list[str]] = None,
+    *,
+    ciphers: Optional[str] = None,
+    ecdh_curve: Optional[str] = None,
+    num_tickets: Optional[int] = None,
 ) -> Optional[ssl.SSLContext]:
     if keyfile and certfile:
         ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
         ssl_context.load_cert_chain(certfile=certfile, keyfile=keyfile)
+        # Let the server pick from its own preference list, not the client's.
+        ssl_context.options |= ssl.OP_CIPHER_SERVER_PREFERENCE
+        if ciphers:
+            ssl_context.set_ciphers(ciphers)
+        if ecdh_curve:
+            ssl_context.set_ecdh_curve(ecdh_curve)
+        if num_tickets is not None:
+            if num_tickets == 0:
+                ssl_context.options |= ssl.OP_NO_TICKET
+            ssl_context.num_tickets = num_tickets
+        if alpn_protocols:
+            ssl_context.set_alpn_protocols(alpn_protocols)
         return ssl_context
     return None
@@ -0,0 +1,47 @@
+from typing import Any, Optional
+
+from nimbus.connections import HttpConnection
+
+
+def make_connection(
+    path: str = "/",
+    sent: Optional[list] = None,
+    *,
+    method: str = "GET",
+    body: bytes = b"",
+    headers: Optional[list[tuple[bytes, bytes]]] = None,
+    query: bytes = b"",
+    **scope: Any,
+) -> HttpConnection:
+    """An in-memory ``HttpConnection`` for calling an app without a server.
+
+    The body is served to ``receive`` as it asks for it, and every event the
+    app sends is appended to ``sent``. Extra keyword arguments are added to
+    the scope (``client``, ``app``, ...).
+    """
+    buffer = bytearray(body)
+
+    async def receive(n: int) -> bytes:
+        chunk = bytes(buffer[:n])
+        del buffer[:n]
+        return chunk
+
+    async def send(event):
+        if sent is not None:
+            sent.append(event)
+
+    headers = list(headers or [])
+    if body and not any(name == b"content-length" for name, _ in headers):
+        headers.append((b"content-length", str(len(body)).encode()))
+    connection_scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "headers": headers,
+        "server": ("127.0.0.1", 8000),
+        "client": ("10.0.0.7", 5000),
+        **scope,
+    }
+    return HttpConnection(connection_scope, receive, send)  # type: ignore[arg-type]
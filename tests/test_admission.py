@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse, StreamingResponse
+from nimbus.server.admission import (
+    AdmissionController,
+    AIMDLimit,
+    GradientLimit,
+    PriorityClass,
+)
+from nimbus.server.server import NimbusServer
+
+
+class FixedLimit:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.latencies: list[float] = []
+
+    def update(self, latency: float, inflight: int, dropped: bool) -> None:
+        self.latencies.append(latency)
+
+
+class TestLimits:
+    def test_aimd(self):
+        limit = AIMDLimit(10, latency_threshold=0.1)
+        for _ in range(50):
+            limit.update(0.01, inflight=10, dropped=False)
+        assert limit.limit > 10
+        grown = limit.limit
+        limit.update(0.5, inflight=10, dropped=False)
+        assert limit.limit < grown
+        limit.update(0.01, inflight=0, dropped=False)
+        assert limit.limit < grown
+
+    def test_gradient(self):
+        limit = GradientLimit(50, window_size=10)
+        for _ in range(200):
+            limit.update(0.01, inflight=50, dropped=False)
+        steady = limit.limit
+        assert steady > 50
+        for _ in range(200):
+            limit.update(0.1, inflight=steady, dropped=False)
+        assert limit.limit < steady / 2
+
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        controller = AdmissionController(
+            [PriorityClass("health", ("/health",)), PriorityClass("default")],
+            limit=FixedLimit(1),
+        )
+        first = await controller.acquire("/work")
+        assert first is not None
+        order = []
+
+        async def wait(path):
+            admitted_at = await controller.acquire(path)
+            order.append(path)
+            controller.release(admitted_at)
+
+        tasks = [asyncio.create_task(wait(p)) for p in ("/work", "/health")]
+        await asyncio.sleep(0)
+        assert controller.stats().queued == {"health": 1, "default": 1}
+        controller.release(first)
+        await asyncio.gather(*tasks)
+        assert order == ["/health", "/work"]
+        assert controller.inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_rejections(self):
+        controller = AdmissionController(
+            [PriorityClass("default", queue_size=1, timeout=0.05)],
+            limit=FixedLimit(1),
+        )
+        held = await controller.acquire("/")
+        waiter = asyncio.create_task(controller.acquire("/"))
+        await asyncio.sleep(0)
+        assert await controller.acquire("/") is None  # queue full
+        assert await waiter is None  # deadline passed
+        stats = controller.stats()
+        assert stats.rejected == {"default": 2}
+        controller.release(held)
+        assert controller.inflight == 0
+
+        # Once latency is known, hopeless waits are refused up front.
+        controller._latency = 1.0
+        held = await controller.acquire("/")
+        assert await controller.acquire("/") is None
+        assert controller.classes[0].rejected_deadline == 1
+        controller.release(held)
+
+
+class TestServerAdmission:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        app = NimbusApp()
+        gate = asyncio.Event()
+
+        @app.get("/slow")
+        async def slow(conn):
+            await gate.wait()
+            return HttpResponse("done")
+
+        controller = AdmissionController(
+            [PriorityClass("default", queue_size=1, timeout=5)],
+            limit=FixedLimit(1),
+        )
+        server = NimbusServer(app, port=0, admission=controller)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+
+        async def get():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /slow HTTP/1.1\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+        first, queued = asyncio.create_task(get()), asyncio.create_task(get())
+        while controller.stats().queued["default"] == 0:
+            await asyncio.sleep(0.01)
+        rejected = await get()
+        assert rejected.startswith(b"HTTP/1.1 503")
+        gate.set()
+        assert (await first).endswith(b"done")
+        assert (await queued).endswith(b"done")
+        server.stop()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_streams_give_back_their_slot(self):
+        app = NimbusApp()
+        gate = asyncio.Event()
+
+        async def events():
+            yield b"data: first\n\n"
+            await gate.wait()
+            yield b"data: last\n\n"
+
+        @app.get("/events")
+        async def stream(conn):
+            return StreamingResponse(events())
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse("index")
+
+        limit = FixedLimit(1)
+        controller = AdmissionController(
+            [PriorityClass("default", queue_size=0)], limit=limit
+        )
+        server = NimbusServer(app, port=0, admission=controller)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+
+        async def get(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET %s HTTP/1.1\r\n\r\n" % path.encode())
+            data = await reader.read()
+            writer.close()
+            return data
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /events HTTP/1.1\r\n\r\n")
+        await reader.readuntil(b"first")
+        # The open stream no longer holds the only slot.
+        assert (await get("/")).endswith(b"index")
+        assert controller.inflight == 0
+        gate.set()
+        assert (await reader.read()).endswith(b"data: last\n\n")
+        writer.close()
+        assert len(limit.latencies) == 2
+        server.stop()
+        await task
@@ -3,6 +3,7 @@ from typing import Dict, Any, Optional, List, Union
 from unittest.mock import Mock, AsyncMock
 from nimbus.applications import ASGIApplication, NimbusApp
 from nimbus.connections import HttpConnection, WebSocketConnection
+from nimbus.headers import MutableHeaders
 from nimbus.response import HttpResponse
 from nimbus.router import Router
 
@@ -11,7 +12,7 @@ class MockHttpConnection(HttpConnection):
         super().__init__(scope, AsyncMock(), AsyncMock())
         self.started = False
         self.finished = False
-        self.response_headers: Dict[bytes, bytes] = {}
+        self.response_headers = MutableHeaders()
         self.response_status: int = 200
         self._body = b""
         self._parsed_body = None
@@ -224,3 +225,105 @@ class TestPatch:
             pass
 
         assert "/patch" in [rule.rule for rule in app.default_router.url_map.iter_rules()]
+
+class TestLifespan:
+    @pytest.mark.asyncio
+    async def test_hooks(self, app: NimbusApp):
+        calls = []
+
+        @app.on_startup
+        async def warm_cache():
+            app.state.cache = {"warm": True}
+            calls.append("startup")
+
+        @app.on_shutdown
+        async def close_cache():
+            calls.append("shutdown")
+
+        await app.startup()
+        assert app.state.cache == {"warm": True}
+        await app.shutdown()
+        assert calls == ["startup", "shutdown"]
+
+    @pytest.mark.asyncio
+    async def test_context_manager(self):
+        from contextlib import asynccontextmanager
+
+        calls = []
+
+        @asynccontextmanager
+        async def lifespan(app: NimbusApp):
+            calls.append("enter")
+            yield {"pool": "ready"}
+            calls.append("exit")
+
+        app = NimbusApp(lifespan=lifespan)
+        await app.startup()
+        assert app.state.pool == "ready"
+        await app.shutdown()
+        assert calls == ["enter", "exit"]
+
+    @pytest.mark.asyncio
+    async def test_state_from_connection(self, app: NimbusApp):
+        app.state.greeting = "Hello"
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse(conn.state.greeting)
+
+        mock_connection = MockHttpConnection({
+            "path": "/",
+            "method": "GET",
+            "headers": []
+        })
+        response = await app(mock_connection)
+        assert mock_connection.app is app
+        assert response.body == "Hello"
+
+class TestAddConstantResponse:
+    @pytest.mark.asyncio
+    async def test_bypass_middleware(self, app: NimbusApp):
+        from nimbus.response import PrecomputedResponse
+
+        calls = []
+
+        async def middleware(conn, next_middleware):
+            calls.append(conn.scope["path"])
+            return await next_middleware()
+
+        app.add_middleware(middleware)
+        constant = PrecomputedResponse("ok")
+        app.add_constant_response("/health", constant)
+        mock_connection = MockHttpConnection({
+            "path": "/health",
+            "method": "GET",
+            "headers": []
+        })
+        response = await app(mock_connection)
+        assert response is constant
+        assert calls == []
+        assert app.constant_response("GET", "/health") is constant
+
+    @pytest.mark.asyncio
+    async def test_through_middleware(self, app: NimbusApp):
+        from nimbus.response import PrecomputedResponse
+
+        calls = []
+
+        async def middleware(conn, next_middleware):
+            calls.append(conn.scope["path"])
+            return await next_middleware()
+
+        app.add_middleware(middleware)
+        app.add_constant_response(
+            "/health", PrecomputedResponse("ok"), bypass_middleware=False
+        )
+        mock_connection = MockHttpConnection({
+            "path": "/health",
+            "method": "GET",
+            "headers": []
+        })
+        response = await app(mock_connection)
+        assert response.body == b"ok"
+        assert calls == ["/health"]
+        assert app.constant_response("GET", "/health") is None
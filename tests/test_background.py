@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.background import BackgroundTask, BackgroundWorkers
+from nimbus.response import HttpResponse
+from tests.conftest import make_connection
+
+
+class TestBackgroundWorkers:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        workers = BackgroundWorkers(workers=2)
+        done = []
+
+        async def job(value):
+            await asyncio.sleep(0)
+            done.append(value)
+
+        for i in range(5):
+            assert await workers.submit(BackgroundTask(job, i))
+        await workers.close()
+        assert sorted(done) == [0, 1, 2, 3, 4]
+        stats = workers.stats()
+        assert stats.completed == 5
+        assert stats.queued == 0
+        assert not await workers.submit(BackgroundTask(job, 5))
+
+    @pytest.mark.asyncio
+    async def test_drop_on_overflow(self):
+        workers = BackgroundWorkers(workers=1, queue_size=1)
+        release = asyncio.Event()
+        await workers.submit(BackgroundTask(release.wait))
+        await asyncio.sleep(0)  # the worker takes the first task
+        assert await workers.submit(BackgroundTask(release.wait))
+        assert not await workers.submit(BackgroundTask(release.wait))
+        assert workers.stats().dropped == 1
+        assert workers.stats().queued == 1
+        release.set()
+        await workers.close()
+        assert workers.stats().completed == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel_after_timeout(self):
+        workers = BackgroundWorkers(workers=1)
+        await workers.submit(BackgroundTask(asyncio.sleep, 10))
+        await workers.submit(BackgroundTask(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        await workers.close(timeout=0.01)
+        stats = workers.stats()
+        assert stats.workers == 0
+        assert stats.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_failure(self):
+        workers = BackgroundWorkers()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        await workers.submit(BackgroundTask(fail))
+        await workers.close()
+        assert workers.stats().failed == 1
+
+
+class TestAppBackgroundTasks:
+    @pytest.mark.asyncio
+    async def test_runs_after_response(self):
+        app = NimbusApp()
+        sent: list = []
+        events = []
+
+        async def audit(name):
+            events.append((name, [event["type"] for event in sent]))
+
+        @app.get("/")
+        async def index(conn):
+            conn.add_background_task(audit, "connection")
+            return HttpResponse("ok", background=BackgroundTask(audit, "response"))
+
+        await app(make_connection("/", sent))
+        await app.shutdown()
+        body_sent = ["http.response.start", "http.response.body"]
+        assert events == [("response", body_sent), ("connection", body_sent)]
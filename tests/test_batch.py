@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.batch import BatchRouter
+from nimbus.response import HttpResponse, JsonResponse
+from nimbus.server.admission import AdmissionController, AIMDLimit, PriorityClass
+from tests.conftest import make_connection
+
+
+async def batch(app: NimbusApp, items, method: str = "POST") -> tuple[int, bytes]:
+    sent: list = []
+    body = items if isinstance(items, bytes) else json.dumps(items).encode()
+    headers = [(b"authorization", b"Bearer token"), (b"x-private", b"no")]
+    await app(
+        make_connection("/batch", sent, method=method, body=body, headers=headers)
+    )
+    return sent[0]["status"], b"".join(event.get("body", b"") for event in sent[1:])
+
+
+def make_app(**options) -> tuple[NimbusApp, BatchRouter]:
+    app = NimbusApp()
+    router = BatchRouter(**options)
+    app.mount("/batch", router)
+
+    @app.get("/sleep/<int:ms>")
+    async def sleep(connection, ms):
+        await asyncio.sleep(ms / 1000)
+        return JsonResponse({"slept": ms})
+
+    @app.post("/echo")
+    async def echo(connection):
+        return HttpResponse(
+            await connection.get_body(),
+            headers={"content-type": connection.headers.get("content-type", "")},
+        )
+
+    @app.get("/whoami")
+    async def whoami(connection):
+        return JsonResponse(
+            {
+                "authorization": connection.headers.get("authorization"),
+                "private": connection.headers.get("x-private"),
+                "query": connection.query_params,
+            }
+        )
+
+    @app.get("/binary")
+    async def binary(connection):
+        return HttpResponse(b"\xff\xfe", headers={"content-type": "image/png"})
+
+    return app, router
+
+
+class TestBatchRouter:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        app, _ = make_app()
+        status, body = await batch(
+            app,
+            [
+                {"path": "/sleep/30"},
+                {"path": "/whoami?page=2", "headers": {"X-Private": "yes"}},
+                {"method": "POST", "path": "/echo", "body": {"a": [1, 2]}},
+                {"method": "POST", "path": "/echo", "body": "plain"},
+                {"path": "/binary"},
+                {"path": "/missing"},
+            ],
+        )
+        assert status == 200
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert lines[-1]["index"] == 0
+        results = {line["index"]: line for line in lines}
+        assert results[0]["body"] == {"slept": 30}
+        assert results[1]["body"] == {
+            "authorization": "Bearer token",
+            "private": "yes",
+            "query": {"page": "2"},
+        }
+        assert results[2]["body"] == {"a": [1, 2]}
+        assert results[3]["body"] == "plain"
+        assert results[4] == {
+            "index": 4,
+            "status": 200,
+            "headers": results[4]["headers"],
+            "body": "//4=",
+            "encoding": "base64",
+        }
+        assert results[5]["status"] == 404
+
+    @pytest.mark.asyncio
+    async def test_middleware_applies_to_sub_requests(self):
+        app, _ = make_app()
+        seen = []
+
+        async def record(connection, call_next):
+            seen.append(connection.scope["path"])
+            return await call_next()
+
+        app.add_middleware(record)
+        _, body = await batch(app, [{"path": "/sleep/0"}, {"path": "/sleep/1"}])
+        assert len(body.splitlines()) == 2
+        assert seen.count("/sleep/0") == seen.count("/sleep/1") == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        app, _ = make_app(max_concurrency=2)
+        running = peak = 0
+
+        @app.get("/count")
+        async def count(connection):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return HttpResponse("ok")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        _, body = await batch(app, [{"path": "/count"}] * 6)
+        assert len(body.splitlines()) == 6
+        assert peak == 2
+        assert loop.time() - started >= 0.03
+
+    @pytest.mark.asyncio
+    async def test_admission(self):
+        admission = AdmissionController(
+            [PriorityClass("default", queue_size=0)], limit=AIMDLimit(2)
+        )
+        app, _ = make_app(max_concurrency=4, admission=admission)
+        assert make_app()[1].timeout == 10.0
+
+        _, body = await batch(app, [{"path": "/sleep/20"}] * 4)
+        statuses = sorted(json.loads(line)["status"] for line in body.splitlines())
+        assert statuses == [200, 200, 503, 503]
+        assert admission.inflight == 0
+        assert admission.classes[0].admitted == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid(self):
+        app, _ = make_app(max_requests=2, timeout=0.05)
+        assert (await batch(app, [], method="GET"))[0] == 405
+        assert (await batch(app, b"{nope"))[0] == 400
+        assert (await batch(app, {"path": "/"}))[0] == 400
+        assert (await batch(app, [{"path": "/sleep/0"}] * 3))[0] == 413
+
+        status, body = await batch(app, [{"path": "/batch"}, {"path": "/sleep/500"}])
+        assert status == 200
+        results = {r["index"]: r for r in map(json.loads, body.splitlines())}
+        assert results[0]["status"] == 400
+        assert results[1]["status"] == 504
+        _, body = await batch(app, ["/sleep/0", {"path": "relative"}])
+        assert [json.loads(line)["status"] for line in body.splitlines()] == [400, 400]
@@ -0,0 +1,165 @@
+import asyncio
+import dataclasses
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.capture import (
+    MAGIC,
+    CapturedRequest,
+    TrafficCapture,
+    encode_request,
+    read_capture,
+)
+from nimbus.server.replay import encode_http, replay
+from nimbus.server.server import NimbusServer
+
+
+def make_request(**overrides) -> CapturedRequest:
+    fields = dict(
+        timestamp=1700000000.5,
+        duration=0.0125,
+        status=201,
+        method="POST",
+        path="/items/7?page=2",
+        route="/items/<item_id>",
+        headers=[(b"host", b"localhost"), (b"content-type", b"application/json")],
+        body=b'{"name": "x"}',
+        body_size=13,
+    )
+    fields.update(overrides)
+    return CapturedRequest(**fields)
+
+
+class TestCaptureFormat:
+    def test_valid(self, tmp_path):
+        path = tmp_path / "capture.bin"
+        first, second = make_request(), make_request(route=None, body=b"", status=404)
+        record = encode_request(second)
+        # The last record was torn by a crash.
+        path.write_bytes(MAGIC + encode_request(first) + record + record[:-3])
+        assert list(read_capture(str(path))) == [first, second]
+
+    def test_not_a_capture(self, tmp_path):
+        path = tmp_path / "capture.bin"
+        path.write_bytes(b"GET / HTTP/1.1\r\n")
+        with pytest.raises(ValueError):
+            list(read_capture(str(path)))
+
+    def test_fields_that_do_not_fit_a_byte(self, tmp_path):
+        path = tmp_path / "capture.bin"
+        request = make_request(
+            path="/\u65e5\u672c?q=\udcff",
+            headers=[(b"x-" + b"n" * 300, b"v"), (b"x-large", b"v" * 70000)],
+        )
+        path.write_bytes(MAGIC + encode_request(request))
+        assert list(read_capture(str(path))) == [request]
+        assert encode_http(request, "localhost").startswith(
+            "POST /\u65e5\u672c?q=".encode() + b"\xff HTTP/1.1\r\n"
+        )
+
+
+class TestTrafficCapture:
+    @pytest.mark.asyncio
+    async def test_failures_are_dropped(self, tmp_path):
+        def redact(request):
+            if request.path == "/secret":
+                return None
+            if request.path == "/broken":
+                raise RuntimeError("redact failed")
+            return request
+
+        capture = TrafficCapture(str(tmp_path / "capture.bin"), redact=redact)
+        capture.start()
+        for path in ("/secret", "/broken", "/ok"):
+            entry = capture.begin("GET", path, [])
+            assert entry is not None
+            capture.end(entry, 200)
+        entry = capture.begin("GET", "/", [(b"x" * 70000, b"v")])
+        assert entry is not None
+        capture.end(entry, 200)
+        await capture.stop()
+        assert (capture.recorded, capture.dropped) == (1, 2)
+        assert [r.path for r in read_capture(capture.path)] == ["/ok"]
+
+    @pytest.mark.asyncio
+    async def test_not_a_capture(self, tmp_path):
+        path = tmp_path / "capture.bin"
+        path.write_bytes(b"NIMBUSCAP1\n")
+        with pytest.raises(ValueError):
+            TrafficCapture(str(path)).start()
+
+
+class TestServerCapture:
+    @pytest.mark.asyncio
+    async def test_valid(self, tmp_path):
+        app = NimbusApp()
+
+        @app.post("/items/<item_id>")
+        async def update(conn, item_id):
+            body = await conn.get_body()
+            return HttpResponse(f"{item_id}:{len(body)}")
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse("Hello")
+
+        path = str(tmp_path / "capture.bin")
+        capture = TrafficCapture(path, max_body=4, redact_query=["token"])
+        server = NimbusServer(app, port=0, capture=capture)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+
+        async def send(raw: bytes) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            response = await reader.read()
+            writer.close()
+            return response
+
+        await send(
+            b"POST /items/7?token=secret&page=2 HTTP/1.1\r\n"
+            b"Authorization: Bearer secret\r\nContent-Length: 10\r\n\r\n0123456789"
+        )
+        await send(b"GET / HTTP/1.1\r\n\r\n")
+        server.stop()
+        await asyncio.wait_for(task, 1)
+
+        post, get = read_capture(path)
+        assert post.method == "POST"
+        assert post.path == "/items/7?token=redacted&page=2"
+        assert post.route == "/items/<item_id>"
+        assert post.status == 200
+        assert (b"authorization", b"[redacted]") in post.headers
+        assert post.body == b"0123" and post.body_size == 10 and post.truncated
+        assert get.route == "/" and get.body == b"" and get.duration > 0
+        assert capture.recorded == 2
+
+        # Replaying the capture hits the same routes again.
+        server = NimbusServer(app, port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+        # The truncated POST is skipped; a complete copy of it is sent.
+        complete = dataclasses.replace(post, body=b"0123456789")
+        report = await replay(
+            [post, complete, get] * 5, port=port, speed=None, connections=4
+        )
+        assert report.requests == 10
+        assert report.skipped == 5
+        assert "5 requests skipped" in report.format()
+        assert report.routes["POST /items/<item_id>"].statuses == {200: 5}
+        assert report.routes["GET /"].errors == 0
+        assert "GET /" in report.format()
+
+        timed = [
+            make_request(timestamp=i * 0.01, method="GET", path="/", route="/")
+            for i in range(5)
+        ]
+        report = await replay(timed, port=port, speed=2.0)
+        assert report.elapsed >= 0.02
+        assert report.routes["GET /"].statuses == {200: 5}
+        server.stop()
+        await asyncio.wait_for(task, 1)
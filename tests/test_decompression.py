@@ -0,0 +1,142 @@
+import gzip
+import json
+import tracemalloc
+import zlib
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.connections import HttpConnection
+from nimbus.exceptions import InvalidRequestBody, RequestEntityTooLarge
+from nimbus.response import JsonResponse
+from nimbus.server.decompression import BodyDecoder
+from tests.conftest import make_connection
+
+
+def encoded_request(
+    body: bytes, encoding: str, app=None, content_type: str = "application/json"
+) -> HttpConnection:
+    headers = [
+        (b"content-type", content_type.encode()),
+        (b"content-encoding", encoding.encode()),
+    ]
+    return make_connection(
+        "/ingest", method="POST", body=body, headers=headers, app=app
+    )
+
+
+class TestBodyDecoder:
+    def test_valid(self):
+        payload = b"hello world " * 1000
+        decoder = BodyDecoder("gzip", max_size=1 << 20)
+        compressed = gzip.compress(payload)
+        step = 7
+        chunks = [compressed[i : i + step] for i in range(0, len(compressed), step)]
+        out = b"".join(decoder.decode(chunk) for chunk in chunks)
+        assert out + decoder.flush() == payload
+
+    def test_deflate_variants(self):
+        payload = b'{"a": 1}'
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        for body in (zlib.compress(payload), raw.compress(payload) + raw.flush()):
+            decoder = BodyDecoder("deflate", max_size=100)
+            assert decoder.decode(body) + decoder.flush() == payload
+
+    def test_stacked_and_multi_member(self):
+        payload = b"abc" * 100
+        decoder = BodyDecoder("deflate, gzip", max_size=1000)
+        body = gzip.compress(zlib.compress(payload))
+        assert decoder.decode(body) + decoder.flush() == payload
+        decoder = BodyDecoder("gzip", max_size=1000)
+        body = gzip.compress(b"first ") + gzip.compress(b"second")
+        assert decoder.decode(body) + decoder.flush() == b"first second"
+
+    def test_bomb(self):
+        bomb = gzip.compress(bytes(64 * 1024 * 1024))
+        decoder = BodyDecoder("gzip", max_size=1024 * 1024)
+        with pytest.raises(RequestEntityTooLarge):
+            decoder.decode(bomb)
+        assert decoder.size <= 1024 * 1024
+
+    def test_truncated(self):
+        decoder = BodyDecoder("gzip", max_size=1000)
+        decoder.decode(gzip.compress(b"x" * 100)[:-8])
+        with pytest.raises(InvalidRequestBody):
+            decoder.flush()
+        with pytest.raises(InvalidRequestBody):
+            BodyDecoder("gzip", max_size=1000).decode(b"not gzip at all")
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return pytest.importorskip("brotli").compress(data, quality=5)
+    return pytest.importorskip("zstandard").ZstdCompressor().compress(data)
+
+
+class TestOptionalCodings:
+    @pytest.mark.parametrize("encoding", ["br", "zstd"])
+    def test_valid(self, encoding):
+        payload = b"hello world " * 1000
+        body = compress(encoding, payload)
+        decoder = BodyDecoder(encoding, max_size=len(payload))
+        out = b"".join(decoder.decode(body[i : i + 7]) for i in range(0, len(body), 7))
+        assert out + decoder.flush() == payload
+
+    @pytest.mark.parametrize("encoding", ["br", "zstd"])
+    def test_bomb(self, encoding):
+        bomb = compress(encoding, bytes(64 * 1024 * 1024))
+        decoder = BodyDecoder(encoding, max_size=1024 * 1024)
+        tracemalloc.start()
+        try:
+            with pytest.raises(RequestEntityTooLarge):
+                decoder.decode(bomb)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < 4 * 1024 * 1024
+
+    def test_truncated_brotli(self):
+        decoder = BodyDecoder("br", max_size=1000)
+        decoder.decode(compress("br", bytes(range(256)) * 3)[:-4])
+        with pytest.raises(InvalidRequestBody):
+            decoder.flush()
+
+
+class TestHttpConnectionBody:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        payload = [{"id": i} for i in range(100)]
+        body = gzip.compress(json.dumps(payload).encode())
+        connection = encoded_request(body, "gzip")
+        assert await connection.get_parsed_body() == payload
+        assert json.loads(await connection.get_body()) == payload
+
+    @pytest.mark.asyncio
+    async def test_stream_body(self):
+        payload = b"".join(b"line %d\n" % i for i in range(50000))
+        connection = encoded_request(gzip.compress(payload), "gzip")
+        chunks = [chunk async for chunk in connection.stream_body(chunk_size=1024)]
+        assert len(chunks) > 1
+        assert b"".join(chunks) == payload
+        with pytest.raises(RuntimeError):
+            [chunk async for chunk in connection.stream_body()]
+
+    @pytest.mark.asyncio
+    async def test_app_limits(self):
+        app = NimbusApp(max_decompressed_size=1000)
+
+        @app.post("/ingest")
+        async def ingest(connection):
+            return JsonResponse(await connection.get_parsed_body())
+
+        connection = encoded_request(gzip.compress(b" " * 5000), "gzip", app)
+        response = await app(connection)
+        assert response.status_code == 413
+
+        connection = encoded_request(b"{}", "compress", app)
+        response = await app(connection)
+        assert response.status_code == 415
+
+        connection = encoded_request(gzip.compress(b'{"ok": true}'), "gzip", app)
+        response = await app(connection)
+        assert response.status_code == 200
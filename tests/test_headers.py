@@ -0,0 +1,95 @@
+import pytest
+
+from nimbus.headers import Headers, MutableHeaders
+
+
+@pytest.fixture
+def headers():
+    return Headers(
+        [
+            (b"host", b"example.com"),
+            (b"x-forwarded-for", b"10.0.0.1"),
+            (b"x-forwarded-for", b"10.0.0.2"),
+            (b"x-name", "café".encode("latin-1")),
+        ]
+    )
+
+
+class TestGet:
+    def test_valid(self, headers: Headers):
+        assert headers.get("Host") == "example.com"
+        assert headers["HOST"] == "example.com"
+
+    def test_missing(self, headers: Headers):
+        assert headers.get("cookie") is None
+        assert headers.get("cookie", "") == ""
+        with pytest.raises(KeyError):
+            headers["cookie"]
+
+    def test_non_ascii(self, headers: Headers):
+        assert headers["x-name"] == "café"
+
+
+class TestGetall:
+    def test_valid(self, headers: Headers):
+        assert headers.getall("X-Forwarded-For") == ["10.0.0.1", "10.0.0.2"]
+        assert headers.getall("cookie") == []
+
+
+class TestContains:
+    def test_valid(self, headers: Headers):
+        assert "X-Forwarded-For" in headers
+        assert "cookie" not in headers
+
+
+class TestItems:
+    def test_valid(self, headers: Headers):
+        assert headers.items()[1:3] == [
+            ("x-forwarded-for", "10.0.0.1"),
+            ("x-forwarded-for", "10.0.0.2"),
+        ]
+
+
+class TestMutableHeaders:
+    def test_setitem_replaces(self):
+        headers = MutableHeaders()
+        headers.append("Set-Cookie", "a=1")
+        headers.append("Set-Cookie", "b=2")
+        headers["Set-Cookie"] = "c=3"
+        assert headers.raw == [(b"set-cookie", b"c=3")]
+
+    def test_append(self):
+        headers = MutableHeaders()
+        headers.append("Set-Cookie", "a=1")
+        headers.append("Set-Cookie", "b=2")
+        assert headers.raw == [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")]
+
+    def test_delitem(self):
+        headers = MutableHeaders([(b"x-a", b"1")])
+        del headers["X-A"]
+        assert headers.raw == []
+        with pytest.raises(KeyError):
+            del headers["x-a"]
+
+    def test_setdefault(self):
+        headers = MutableHeaders([(b"x-a", b"1")])
+        assert headers.setdefault("x-a", "2") == "1"
+        assert headers.setdefault("x-b", "2") == "2"
+        assert headers.raw == [(b"x-a", b"1"), (b"x-b", b"2")]
+
+    def test_update_keeps_multi_values(self):
+        other = MutableHeaders()
+        other.append("set-cookie", "a=1")
+        other.append("set-cookie", "b=2")
+        headers = MutableHeaders([(b"set-cookie", b"old=1"), (b"x-a", b"1")])
+        headers.update(other)
+        assert headers.raw == [
+            (b"x-a", b"1"),
+            (b"set-cookie", b"a=1"),
+            (b"set-cookie", b"b=2"),
+        ]
+
+    def test_update_from_dict(self):
+        headers = MutableHeaders()
+        headers.update({"Content-Type": "text/plain"})
+        assert headers.raw == [(b"content-type", b"text/plain")]
@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.memoize import memoize
+from nimbus.response import JsonResponse
+from tests.conftest import make_connection
+
+
+class TestMemoize:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        calls = []
+
+        @memoize
+        async def lookup(name, *, flag=False):
+            calls.append((name, flag))
+            return f"{name}:{flag}"
+
+        assert await lookup("a") == "a:False"
+        assert await lookup("a") == "a:False"
+        assert await lookup("a", flag=True) == "a:True"
+        assert await lookup(name="a") == "a:False"
+        assert calls == [("a", False), ("a", True), ("a", False)]
+        assert lookup.__name__ == "lookup"
+        stats = lookup.stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 3, 3)
+        assert stats.hit_ratio == 0.25
+
+        assert lookup.invalidate("a")
+        assert not lookup.invalidate("a")
+        await lookup("a")
+        assert len(calls) == 4
+        lookup.clear()
+        assert lookup.stats().size == 0
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru(self):
+        calls = []
+
+        @memoize(ttl=0.02, maxsize=2)
+        async def square(n):
+            calls.append(n)
+            return n * n
+
+        for n in (1, 2, 1, 3):
+            await square(n)
+        # 2 was the least recently used when 3 arrived.
+        assert calls == [1, 2, 3]
+        assert square.stats().evictions == 1
+        await square(1)
+        await square(2)
+        assert calls == [1, 2, 3, 2]
+
+        await asyncio.sleep(0.03)
+        await square(1)
+        assert calls == [1, 2, 3, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_coalescing(self):
+        calls = 0
+        release = asyncio.Event()
+
+        @memoize
+        async def slow(key):
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            if key == "bad":
+                raise ValueError(key)
+            return key
+
+        waiters = [asyncio.create_task(slow("k")) for _ in range(5)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert results[1:] == ["k"] * 4
+        assert calls == 1
+        assert slow.stats().coalesced == 4
+
+        failures = await asyncio.gather(
+            slow("bad"), slow("bad"), return_exceptions=True
+        )
+        assert all(isinstance(f, ValueError) for f in failures)
+        assert calls == 2
+        with pytest.raises(ValueError):
+            await slow("bad")
+        assert calls == 3
+        assert slow.stats().errors == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        version = 0
+        fail = False
+
+        @memoize(ttl=0.05, stale_ttl=10)
+        async def config():
+            nonlocal version
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError("config service down")
+            version += 1
+            return version
+
+        assert await config() == 1
+        await asyncio.sleep(0.06)
+        assert await config() == 1
+        assert await config() == 1
+        await asyncio.sleep(0.02)
+        assert version == 2
+        assert await config() == 2
+        stats = config.stats()
+        assert (stats.hits, stats.stale_hits, stats.misses) == (1, 2, 1)
+
+        fail = True
+        await asyncio.sleep(0.06)
+        assert await config() == 2
+        await asyncio.sleep(0.02)
+        assert await config() == 2
+        await asyncio.sleep(0.02)
+        assert config.stats().errors == 2
+
+    @pytest.mark.asyncio
+    async def test_request_scoped(self):
+        calls = []
+
+        @memoize(request_scoped=True)
+        async def profile(connection, user_id):
+            calls.append(user_id)
+            await asyncio.sleep(0)
+            return {"id": user_id}
+
+        app = NimbusApp()
+
+        @app.get("/users/<user_id>")
+        async def user(connection, user_id):
+            first, second = await asyncio.gather(
+                profile(connection, user_id), profile(connection, user_id)
+            )
+            third = await profile(connection, user_id)
+            assert first is second is third
+            return JsonResponse(first)
+
+        for _ in range(2):
+            sent: list = []
+            await app(make_connection("/users/7", sent))
+            assert sent[0]["status"] == 200
+        assert calls == ["7", "7"]
+        stats = profile.stats()
+        assert (stats.misses, stats.coalesced, stats.hits) == (2, 2, 2)
+
+        with pytest.raises(TypeError):
+            await profile(None, "7")
+
+    @pytest.mark.asyncio
+    async def test_methods_and_keys(self):
+        class Flags:
+            def __init__(self):
+                self.calls = 0
+
+            @memoize(key=lambda self, name, connection=None: name)
+            async def get(self, name, connection=None):
+                self.calls += 1
+                return name.upper()
+
+        flags = Flags()
+        assert await flags.get("beta", make_connection()) == "BETA"
+        assert await flags.get("beta", make_connection()) == "BETA"
+        assert flags.calls == 1
+        assert Flags.get.stats().hits == 1
+
+        @memoize
+        async def handler(connection, item_id):
+            return item_id
+
+        with pytest.raises(TypeError):
+            await handler(make_connection(), 1)
+
+    @pytest.mark.asyncio
+    async def test_callers_never_share_a_request(self):
+        @memoize(ttl=60, key=lambda connection: connection.headers["authorization"])
+        async def profile(connection):
+            await asyncio.sleep(0.01)
+            return {"user": connection.headers["authorization"]}
+
+        app = NimbusApp()
+
+        @app.get("/me")
+        async def me(connection):
+            return JsonResponse(await profile(connection))
+
+        async def get(path: str, user: str) -> tuple[int, bytes]:
+            sent: list = []
+            connection = make_connection(path, sent)
+            connection.scope["headers"] = [(b"authorization", user.encode())]
+            await app(connection)
+            return sent[0]["status"], sent[1]["body"]
+
+        for user in ("alice", "bob", "alice"):
+            assert await get("/me", user) == (200, b'{"user": "%s"}' % user.encode())
+        carol, dave = await asyncio.gather(get("/me", "carol"), get("/me", "dave"))
+        assert carol[1] == b'{"user": "carol"}'
+        assert dave[1] == b'{"user": "dave"}'
+        assert profile.stats().hits == 1
+
+        # A response belongs to one connection and is never cached.
+        @memoize(key=lambda connection: None)
+        async def cached_response(connection):
+            return JsonResponse({})
+
+        with pytest.raises(TypeError):
+            await cached_response(make_connection())
+        assert cached_response.stats().size == 0
+
+    def test_invalid(self):
+        with pytest.raises(TypeError):
+            memoize(lambda: 1)
+        with pytest.raises(ValueError):
+
+            @memoize(maxsize=0)
+            async def nothing():
+                pass
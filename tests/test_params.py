@@ -0,0 +1,89 @@
+import json
+from dataclasses import dataclass, field
+from typing import Annotated, Optional
+
+import pytest
+
+from nimbus.params import Header, Query
+from nimbus.router import Router
+from tests.conftest import make_connection
+
+
+@dataclass
+class Item:
+    name: str
+    price: float
+    tags: list[str] = field(default_factory=list)
+
+
+@pytest.fixture
+def router():
+    router = Router(typed=True)
+
+    @router.get("/items/<item_id>")
+    async def get_item(
+        conn,
+        item_id: int,
+        limit: int = 10,
+        verbose: bool = False,
+        tag: Optional[list[str]] = None,
+        token: Annotated[Optional[str], Header("x-token")] = None,
+        sort_by: Annotated[str, Query("sort")] = "name",
+    ):
+        return (item_id, limit, verbose, tag, token, sort_by)
+
+    @router.post("/items")
+    async def create_item(conn, item: Item):
+        return item
+
+    return router
+
+
+class TestTypedRoutes:
+    @pytest.mark.asyncio
+    async def test_valid(self, router: Router):
+        connection = make_connection(
+            "/items/42",
+            query=b"limit=5&verbose=yes&tag=a&tag=b&sort=price",
+            headers=[(b"X-Token", b"secret")],
+        )
+        assert await router(connection) == (42, 5, True, ["a", "b"], "secret", "price")
+
+    @pytest.mark.asyncio
+    async def test_defaults(self, router: Router):
+        result = await router(make_connection("/items/1"))
+        assert result == (1, 10, False, None, None, "name")
+
+    @pytest.mark.asyncio
+    async def test_invalid_query(self, router: Router):
+        response = await router(make_connection("/items/x", query=b"limit=many"))
+        assert response.status_code == 422
+        assert json.loads(response.body)["detail"] == [
+            {"loc": ["path", "item_id"], "msg": "value is not a valid int"},
+            {"loc": ["query", "limit"], "msg": "value is not a valid int"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_body(self, router: Router):
+        body = b'{"name": "pen", "price": 2, "tags": ["office"]}'
+        item = await router(make_connection("/items", method="POST", body=body))
+        assert item == Item("pen", 2.0, ["office"])
+
+    @pytest.mark.asyncio
+    async def test_invalid_body(self, router: Router):
+        body = b'{"price": "free", "tags": [1]}'
+        response = await router(make_connection("/items", method="POST", body=body))
+        assert response.status_code == 422
+        assert json.loads(response.body)["detail"] == [
+            {"loc": ["body", "item", "name"], "msg": "field required"},
+            {"loc": ["body", "item", "price"], "msg": "value is not a valid float"},
+            {"loc": ["body", "item", "tags", 0], "msg": "value is not a valid str"},
+        ]
+
+    def test_unsupported_type(self):
+        router = Router(typed=True)
+        with pytest.raises(TypeError):
+
+            @router.get("/")
+            async def handler(conn, value: set):
+                pass
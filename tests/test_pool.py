@@ -0,0 +1,174 @@
+import asyncio
+import socketserver
+import threading
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.exceptions import PoolClosed, PoolTimeout
+from nimbus.pool import ResourcePool
+
+
+class EchoClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def echo(self, data: bytes) -> bytes:
+        self.writer.write(data)
+        await self.writer.drain()
+        return await self.reader.readexactly(len(data))
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while data := self.request.recv(1024):
+            self.request.sendall(data)
+
+
+@pytest.fixture
+def echo_port():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def make_pool(port: int, **kwargs) -> ResourcePool[EchoClient]:
+    async def connect() -> EchoClient:
+        return EchoClient(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def close(client: EchoClient) -> None:
+        await client.close()
+
+    return ResourcePool(connect, close=close, **kwargs)
+
+
+class TestAcquire:
+    @pytest.mark.asyncio
+    async def test_valid(self, echo_port: int):
+        pool = make_pool(echo_port, min_size=1, max_size=2)
+        await pool.open()
+        async with pool.acquire() as client:
+            assert await client.echo(b"ping") == b"ping"
+        async with pool.acquire() as again:
+            assert again is client
+        stats = pool.stats()
+        assert stats.created == 1
+        assert stats.acquired == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, echo_port: int):
+        pool = make_pool(echo_port, max_size=1, acquire_timeout=0.05)
+        await pool.open()
+        async with pool.acquire():
+            with pytest.raises(PoolTimeout):
+                await pool.get()
+        assert pool.stats().timeouts == 1
+        assert pool.stats().waiting == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_fifo_waiters(self, echo_port: int):
+        pool = make_pool(echo_port, max_size=1)
+        await pool.open()
+        order = []
+        first = await pool.get()
+
+        async def waiter(index: int):
+            async with pool.acquire():
+                order.append(index)
+
+        tasks = [asyncio.create_task(waiter(index)) for index in range(3)]
+        await asyncio.sleep(0.01)
+        assert pool.stats().waiting == 3
+        await pool.release(first)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_health_check(self, echo_port: int):
+        healthy = {"value": True}
+
+        async def check(client: EchoClient) -> bool:
+            return healthy["value"]
+
+        pool = make_pool(echo_port, max_size=1, check=check)
+        await pool.open()
+        async with pool.acquire() as client:
+            pass
+        healthy["value"] = False
+        async with pool.acquire() as replaced:
+            assert replaced is not client
+        stats = pool.stats()
+        assert stats.failed_checks == 1
+        assert stats.size == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_max_lifetime(self, echo_port: int):
+        pool = make_pool(echo_port, max_size=1, max_lifetime=0.01)
+        await pool.open()
+        async with pool.acquire() as client:
+            pass
+        await asyncio.sleep(0.02)
+        async with pool.acquire() as replaced:
+            assert replaced is not client
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_eviction(self, echo_port: int):
+        pool = make_pool(echo_port, max_size=2, max_idle=0.02)
+        await pool.open()
+        async with pool.acquire():
+            pass
+        assert pool.stats().idle == 1
+        await asyncio.sleep(0.05)
+        assert pool.stats().idle == 0
+        assert pool.stats().size == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_closed(self, echo_port: int):
+        pool = make_pool(echo_port)
+        await pool.open()
+        await pool.close()
+        with pytest.raises(PoolClosed):
+            await pool.get()
+
+
+class TestAppPools:
+    @pytest.mark.asyncio
+    async def test_lifecycle(self, echo_port: int):
+        app = NimbusApp()
+        pool = app.add_pool("echo", make_pool(echo_port, min_size=2))
+        await app.startup()
+        assert app.pools["echo"] is pool
+        assert pool.stats().idle == 2
+        await app.shutdown()
+        assert pool.closed
+        assert pool.stats().idle == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_startup(self, echo_port: int):
+        app = NimbusApp()
+        pool = app.add_pool("echo", make_pool(echo_port, min_size=1))
+
+        @app.on_startup
+        async def fail():
+            raise RuntimeError("startup failed")
+
+        with pytest.raises(RuntimeError):
+            await app.startup()
+        assert pool.closed
@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.proxy import CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, ProxyRouter, Upstream
+from nimbus.response import HttpResponse, StreamingResponse
+from tests.conftest import make_connection
+
+
+class StandInUpstream:
+    """A tiny keep-alive HTTP/1.1 server that records what it receives."""
+
+    def __init__(self, mode: str = "length", close_after: bool = False, drop: int = 0):
+        self.mode = mode
+        self.close_after = close_after
+        # Requests after the first one to read and then close without answering.
+        self.drop = drop
+        self.connections = 0
+        self.requests: list[tuple[bytes, dict[bytes, bytes], bytes]] = []
+        self.server: asyncio.Server
+        self.tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        self.server.close()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def _serve(self, reader, writer) -> None:
+        self.connections += 1
+        self.tasks.add(asyncio.current_task())  # type: ignore[arg-type]
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *lines = head[:-4].split(b"\r\n")
+                headers = dict(
+                    (name.lower(), value.strip())
+                    for name, _, value in (line.partition(b":") for line in lines)
+                )
+                body = await reader.readexactly(int(headers.get(b"content-length", 0)))
+                self.requests.append((request_line, headers, body))
+                if self.drop and len(self.requests) > 1:
+                    self.drop -= 1
+                    break
+                if self.mode == "hang":
+                    await reader.read()  # until the proxy gives up
+                    break
+                payload = b"echo:" + request_line.split(b" ")[1] + b":" + body
+                if self.mode == "chunked":
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\ntransfer-encoding: chunked\r\n"
+                        b"x-upstream: yes\r\n\r\n"
+                        + b"".join(
+                            b"%x\r\n%s\r\n"
+                            % (len(payload[i : i + 3]), payload[i : i + 3])
+                            for i in range(0, len(payload), 3)
+                        )
+                        + b"0\r\n\r\n"
+                    )
+                else:
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\ncontent-length: %d\r\n"
+                        b"set-cookie: a=1\r\nset-cookie: b=2\r\n\r\n%s"
+                        % (len(payload), payload)
+                    )
+                await writer.drain()
+                if self.close_after:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def request(app: NimbusApp, path: str, **kwargs) -> tuple[int, list, bytes]:
+    sent: list = []
+    headers = [(b"host", b"front.example")]
+    await app(make_connection(path, sent, headers=headers, query=b"q=1", **kwargs))
+    start = sent[0]
+    body = b"".join(event.get("body", b"") for event in sent[1:])
+    return start["status"], start["headers"], body
+
+
+class TestProxyRouter:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        upstream = StandInUpstream()
+        app = NimbusApp()
+        proxy = ProxyRouter([await upstream.start()])
+        app.mount("/legacy", proxy)
+        try:
+            for _ in range(3):
+                status, headers, body = await request(app, "/legacy/items")
+                assert status == 200
+                assert body == b"echo:/items?q=1:"
+            assert (b"set-cookie", b"a=1") in headers
+            assert (b"set-cookie", b"b=2") in headers
+            assert upstream.connections == 1
+            _, sent_headers, _ = upstream.requests[0]
+            assert sent_headers[b"x-forwarded-for"] == b"10.0.0.7"
+            assert sent_headers[b"x-forwarded-host"] == b"front.example"
+            assert sent_headers[b"host"] == proxy.upstreams[0].address.encode()
+
+            status, _, body = await request(
+                app, "/legacy/upload", method="POST", body=b"x" * 200000
+            )
+            assert status == 200
+            assert body.endswith(b"x" * 1000)
+            assert upstream.requests[-1][2] == b"x" * 200000
+            assert proxy.stats()[0].outstanding == 0
+        finally:
+            await app.shutdown()
+            await upstream.stop()
+
+    @pytest.mark.asyncio
+    async def test_chunked_and_stale_connections(self):
+        chunked = StandInUpstream("chunked", close_after=True)
+        app = NimbusApp()
+        app.mount("/api", ProxyRouter([await chunked.start()]))
+        try:
+            for _ in range(2):
+                status, headers, body = await request(app, "/api/a")
+                assert status == 200
+                assert body == b"echo:/a?q=1:"
+                assert (b"x-upstream", b"yes") in headers
+                assert all(name != b"transfer-encoding" for name, _ in headers)
+                await asyncio.sleep(0.01)
+            assert chunked.connections == 2
+        finally:
+            await app.shutdown()
+            await chunked.stop()
+
+    @pytest.mark.asyncio
+    async def test_retries_only_idempotent_requests(self):
+        upstream = StandInUpstream(drop=1)
+        app = NimbusApp()
+        app.mount("", ProxyRouter([await upstream.start()]))
+        try:
+            assert (await request(app, "/warm"))[0] == 200
+            status, _, body = await request(app, "/again")
+            assert status == 200
+            assert body == b"echo:/again?q=1:"
+            assert [line for line, _, _ in upstream.requests[1:]] == [
+                b"GET /again?q=1 HTTP/1.1"
+            ] * 2
+
+            upstream.drop = 1
+            assert (await request(app, "/orders", method="POST"))[0] == 502
+            posts = [line for line, _, _ in upstream.requests if b"POST" in line]
+            assert posts == [b"POST /orders?q=1 HTTP/1.1"]
+        finally:
+            await app.shutdown()
+            await upstream.stop()
+
+    @pytest.mark.asyncio
+    async def test_releases_unsent_bodies(self):
+        upstream = StandInUpstream()
+        app = NimbusApp()
+        proxy = ProxyRouter([await upstream.start()])
+        app.mount("/legacy", proxy)
+
+        async def replace_streams(connection, next_middleware):
+            response = await next_middleware()
+            if connection.scope["path"] == "/legacy/replaced" and isinstance(
+                response, StreamingResponse
+            ):
+                return HttpResponse("replaced")
+            return response
+
+        app.add_middleware(replace_streams)
+
+        class ClientGone(list):
+            def append(self, event):
+                raise ConnectionResetError()
+
+        try:
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    await app(make_connection("/legacy/items", ClientGone()))
+            stats = proxy.stats()[0]
+            assert (stats.outstanding, stats.pool.in_use) == (0, 0)
+
+            for _ in range(3):
+                assert (await request(app, "/legacy/replaced"))[2] == b"replaced"
+            # Dropped bodies are released from the loop once collected.
+            for _ in range(3):
+                await asyncio.sleep(0)
+            stats = proxy.stats()[0]
+            assert (stats.outstanding, stats.pool.in_use) == (0, 0)
+            assert (await request(app, "/legacy/items"))[0] == 200
+        finally:
+            await app.shutdown()
+            await upstream.stop()
+
+    @pytest.mark.asyncio
+    async def test_least_outstanding(self):
+        proxy = ProxyRouter(["http://127.0.0.1:1", "http://127.0.0.1:2"])
+        first, second = proxy.upstreams
+        first.outstanding = 3
+        assert proxy.choose() is second
+        second.outstanding = 5
+        assert proxy.choose() is first
+        first.outstanding = second.outstanding = 0
+        picks = {proxy.choose() for _ in range(4)}
+        assert picks == {first, second}
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker(self):
+        dead = Upstream("http://127.0.0.1:1", max_failures=2, cooldown=0.05)
+        app = NimbusApp()
+        app.mount("", ProxyRouter([dead]))
+        assert (await request(app, "/"))[0] == 502
+        assert (await request(app, "/"))[0] == 502
+        assert dead.state == CIRCUIT_OPEN
+        assert (await request(app, "/"))[0] == 503
+        await asyncio.sleep(0.06)
+        assert dead.available(asyncio.get_running_loop().time() + 1e9)
+        assert dead.state == CIRCUIT_HALF_OPEN
+        assert (await request(app, "/"))[0] == 502
+        assert dead.state == CIRCUIT_OPEN
+        assert dead.stats().failures == 3
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        upstream = StandInUpstream("hang")
+        app = NimbusApp()
+        app.mount("", ProxyRouter([await upstream.start()], timeout=0.05))
+        try:
+            assert (await request(app, "/slow"))[0] == 504
+        finally:
+            await app.shutdown()
+            await upstream.stop()
@@ -0,0 +1,78 @@
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.ratelimit import RateLimitMiddleware, RateLimitTable, header_key
+from nimbus.response import HttpResponse
+from nimbus.router import Router
+from tests.conftest import make_connection
+
+
+class TestRateLimitTable:
+    def test_burst_then_limit(self):
+        table = RateLimitTable(rate=1, burst=3)
+        assert [table.acquire("a", now=100.0) for _ in range(3)] == [0.0] * 3
+        assert table.acquire("a", now=100.0) == pytest.approx(1.0)
+        assert table.acquire("b", now=100.0) == 0.0
+
+    def test_refill(self):
+        table = RateLimitTable(rate=2, burst=1)
+        assert table.acquire("a", now=10.0) == 0.0
+        assert table.acquire("a", now=10.1) == pytest.approx(0.4)
+        assert table.acquire("a", now=10.5) == 0.0
+
+    def test_fixed_memory(self):
+        table = RateLimitTable(rate=1, burst=1, capacity=64)
+        size = table.nbytes
+        for index in range(10_000):
+            table.acquire(f"client-{index}", now=float(index))
+        assert table.nbytes == size == 64 * 16
+
+
+class TestRateLimitMiddleware:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        app = NimbusApp()
+        app.add_middleware(RateLimitMiddleware(rate=1, burst=2, period=60))
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse("Hello")
+
+        statuses = [(await app(make_connection())).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        limited = await app(make_connection())
+        assert limited.headers["retry-after"] == "60"
+        assert (
+            await app(make_connection(client=("10.0.0.2", 1234)))
+        ).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_mounted_router(self):
+        app = NimbusApp()
+        app.add_middleware(RateLimitMiddleware(rate=1, burst=2, period=60))
+        api = Router()
+
+        @api.get("/x")
+        async def x(conn):
+            return HttpResponse("x")
+
+        app.mount("/api", api)
+        statuses = [
+            (await app(make_connection(path="/api/x"))).status_code for _ in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+
+    @pytest.mark.asyncio
+    async def test_header_key(self):
+        app = NimbusApp()
+        app.add_middleware(RateLimitMiddleware(rate=1, key=header_key("x-api-key")))
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse("Hello")
+
+        keyed = [(b"x-api-key", b"abc")]
+        assert (await app(make_connection(headers=keyed))).status_code == 200
+        assert (await app(make_connection(headers=keyed))).status_code == 429
+        assert (await app(make_connection())).status_code == 200
+        assert (await app(make_connection())).status_code == 200
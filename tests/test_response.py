@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from nimbus.response import JsonStreamingResponse
+from tests.conftest import make_connection
+
+
+async def collect(response: JsonStreamingResponse) -> tuple[dict, list[bytes]]:
+    sent: list = []
+    response.connection = make_connection("/export", sent)
+    await response
+    chunks = [event["body"] for event in sent[1:] if event["body"]]
+    return sent[0], chunks
+
+
+class TestJsonStreamingResponse:
+    @pytest.mark.asyncio
+    async def test_valid(self):
+        rows = ({"id": i, "name": f"row {i}"} for i in range(1000))
+        start, chunks = await collect(JsonStreamingResponse(rows, chunk_size=1024))
+        assert (b"content-type", b"application/x-ndjson") in start["headers"]
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1024 + 64 for chunk in chunks)
+        lines = b"".join(chunks).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == list(range(1000))
+
+    @pytest.mark.asyncio
+    async def test_array(self):
+        async def rows():
+            for i in range(500):
+                yield [i, i * 2]
+
+        response = JsonStreamingResponse(rows(), format="array", chunk_size=100)
+        start, chunks = await collect(response)
+        assert (b"content-type", b"application/json") in start["headers"]
+        assert json.loads(b"".join(chunks)) == [[i, i * 2] for i in range(500)]
+
+        _, chunks = await collect(JsonStreamingResponse([], format="array"))
+        assert b"".join(chunks) == b"[]"
+
+    @pytest.mark.asyncio
+    async def test_default_and_close(self):
+        closed = []
+
+        async def rows():
+            try:
+                yield {"when": object()}
+            finally:
+                closed.append(True)
+
+        response = JsonStreamingResponse(rows(), default=lambda o: "custom")
+        _, chunks = await collect(response)
+        assert json.loads(b"".join(chunks)) == {"when": "custom"}
+        assert closed == [True]
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.pool import ResourcePool
+from nimbus.proxy import ProxyRouter
+from nimbus.server.server import NimbusServer
+from nimbus.server.sockets import systemd_listen_fds
+
+
+@pytest.fixture
+def app():
+    app = NimbusApp()
+
+    @app.get("/")
+    async def index(conn):
+        return HttpResponse("Hello")
+
+    return app
+
+
+async def request(port: int, raw: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data
+
+
+def bound_port(server: NimbusServer) -> int:
+    return server._server.sockets[0].getsockname()[1]
+
+
+class TestStart:
+    @pytest.mark.asyncio
+    async def test_lifespan(self, app: NimbusApp):
+        calls = []
+
+        @app.on_startup
+        async def startup():
+            calls.append("startup")
+
+        @app.on_shutdown
+        async def shutdown():
+            calls.append("shutdown")
+
+        server = NimbusServer(app, port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        assert calls == ["startup"]
+
+        response = await request(bound_port(server), b"GET / HTTP/1.1\r\n\r\n")
+        assert response.startswith(b"HTTP/1.1 200")
+        assert response.endswith(b"Hello")
+
+        server.stop()
+        await asyncio.wait_for(task, 1)
+        assert calls == ["startup", "shutdown"]
+        assert not server.ready.is_set()
+
+
+class TestHttp2:
+    @pytest.mark.asyncio
+    async def test_prior_knowledge(self, app: NimbusApp):
+        h2_connection = pytest.importorskip("h2.connection")
+        h2_config = pytest.importorskip("h2.config")
+        h2_events = pytest.importorskip("h2.events")
+
+        @app.post("/echo")
+        async def echo(conn):
+            return HttpResponse(await conn.get_body())
+
+        server = NimbusServer(app, port=0, http2=True)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        reader, writer = await asyncio.open_connection("127.0.0.1", bound_port(server))
+
+        client = h2_connection.H2Connection(
+            h2_config.H2Configuration(client_side=True, header_encoding="utf-8")
+        )
+        client.initiate_connection()
+        request = [(":scheme", "http"), (":authority", "localhost")]
+        client.send_headers(1, [(":method", "GET"), (":path", "/"), *request], True)
+        client.send_headers(3, [(":method", "POST"), (":path", "/echo"), *request])
+        client.send_data(3, b"payload", end_stream=True)
+        writer.write(client.data_to_send())
+
+        statuses, bodies, ended = {}, {}, set()
+        while len(ended) < 2:
+            for event in client.receive_data(await reader.read(65536)):
+                if isinstance(event, h2_events.ResponseReceived):
+                    statuses[event.stream_id] = dict(event.headers)[":status"]
+                elif isinstance(event, h2_events.DataReceived):
+                    bodies[event.stream_id] = (
+                        bodies.get(event.stream_id, b"") + event.data
+                    )
+                elif isinstance(event, h2_events.StreamEnded):
+                    ended.add(event.stream_id)
+            writer.write(client.data_to_send())
+
+        assert statuses == {1: "200", 3: "200"}
+        assert bodies == {1: b"Hello", 3: b"payload"}
+
+        writer.close()
+        server.stop()
+        await asyncio.wait_for(task, 1)
+
+
+class TestConstantResponse:
+    @pytest.mark.asyncio
+    async def test_fast_path(self, app: NimbusApp):
+        from nimbus.response import PrecomputedResponse
+
+        calls = []
+
+        async def middleware(conn, next_middleware):
+            calls.append(conn.scope["path"])
+            return await next_middleware()
+
+        app.add_middleware(middleware)
+        app.add_constant_response("/health", PrecomputedResponse("ok"))
+
+        server = NimbusServer(app, port=0)
+        dispatched = []
+        dispatch = server._dispatch
+
+        async def spy(*args):
+            dispatched.append(args[4])
+            return await dispatch(*args)
+
+        server._dispatch = spy  # type: ignore[method-assign]
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+
+        response = await request(bound_port(server), b"GET /health HTTP/1.1\r\n\r\n")
+        head, body = response.split(b"\r\n\r\n", 1)
+        lines = head.split(b"\r\n")
+        assert lines[0] == b"HTTP/1.1 200 OK"
+        assert any(line.startswith(b"date: ") for line in lines)
+        assert b"server: nimbus" in lines
+        assert b"content-length: 2" in lines
+        assert body == b"ok"
+
+        response = await request(
+            bound_port(server), b"GET /health?probe=1 HTTP/1.1\r\n\r\n"
+        )
+        assert response.startswith(b"HTTP/1.1 200 OK")
+        assert response.endswith(b"\r\n\r\nok")
+        assert calls == []
+        assert dispatched == []
+
+        server.stop()
+        await asyncio.wait_for(task, 1)
+
+
+class TestListeners:
+    @pytest.mark.asyncio
+    async def test_unix_socket(self, app: NimbusApp, tmp_path):
+        path = str(tmp_path / "nimbus.sock")
+        server = NimbusServer(app, uds=path, uds_permissions=0o660)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"GET / HTTP/1.1\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        assert response.endswith(b"Hello")
+
+        server.stop()
+        await asyncio.wait_for(task, 1)
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_inherited_fd(self, app: NimbusApp):
+        sock = socket.create_server(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        server = NimbusServer(app, fd=sock.detach())
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        assert server.server_address == ("127.0.0.1", port)
+
+        response = await request(port, b"GET / HTTP/1.1\r\n\r\n")
+        assert response.endswith(b"Hello")
+
+        server.stop()
+        await asyncio.wait_for(task, 1)
+
+
+class TestSystemdListenFds:
+    def test_valid(self, monkeypatch):
+        monkeypatch.setenv("LISTEN_PID", str(os.getpid()))
+        monkeypatch.setenv("LISTEN_FDS", "0")
+        assert systemd_listen_fds() == []
+        assert "LISTEN_FDS" not in os.environ
+
+    def test_other_process(self, monkeypatch):
+        monkeypatch.setenv("LISTEN_PID", str(os.getpid() + 1))
+        monkeypatch.setenv("LISTEN_FDS", "2")
+        assert systemd_listen_fds() == []
+
+
+class TestThreads:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("reuse_port", [False, True])
+    async def test_valid(self, app: NimbusApp, reuse_port: bool):
+        @app.get("/thread")
+        async def thread(conn):
+            await asyncio.sleep(0.05)
+            return HttpResponse(threading.current_thread().name)
+
+        server = NimbusServer(app, port=0, threads=3, reuse_port=reuse_port)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = bound_port(server)
+
+        responses = await asyncio.gather(
+            *(request(port, b"GET /thread HTTP/1.1\r\n\r\n") for _ in range(30))
+        )
+        names = {response.rsplit(b"\r\n\r\n", 1)[1] for response in responses}
+        assert names <= {b"MainThread", b"nimbus-loop-1", b"nimbus-loop-2"}
+        if reuse_port:
+            assert len(names) > 1
+
+        # Routes added while other loops are matching replace the map whole.
+        @app.get("/late")
+        async def late(conn):
+            return HttpResponse("late")
+
+        responses = await asyncio.gather(
+            *(request(port, b"GET /late HTTP/1.1\r\n\r\n") for _ in range(10))
+        )
+        assert all(response.endswith(b"late") for response in responses)
+
+        server.stop()
+        await asyncio.wait_for(task, 2)
+        assert not any(t.name.startswith("nimbus-loop") for t in threading.enumerate())
+
+    @pytest.mark.asyncio
+    async def test_refuses_loop_bound_resources(self, app: NimbusApp):
+        started = []
+        app.on_startup(lambda: started.append(True))  # type: ignore[arg-type]
+
+        async def connect():
+            return object()
+
+        app.add_pool("db", ResourcePool(connect))
+        app.mount("/legacy", ProxyRouter(["http://127.0.0.1:1"]))
+        with pytest.raises(ValueError, match="pool 'db', ProxyRouter at '/legacy'"):
+            await NimbusServer(app, port=0, threads=2).start()
+        assert started == []
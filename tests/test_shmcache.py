@@ -0,0 +1,66 @@
+import multiprocessing
+import time
+
+import pytest
+
+from nimbus.shmcache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SharedCache(path=str(tmp_path / "cache"), capacity=64, ways=4, slot_size=96)
+    yield cache
+    cache.close()
+
+
+def writer(path: str) -> None:
+    cache = SharedCache(path=path, capacity=64, ways=4, slot_size=96)
+    for i in range(20):
+        cache.set(f"child-{i}", b"%d" % i)
+    cache.close()
+
+
+class TestSharedCache:
+    def test_valid(self, cache: SharedCache):
+        assert cache.get("missing") is None
+        assert cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        assert cache.set(b"key", b"other")
+        assert cache.get("key") == b"other"
+        assert cache.delete("key")
+        assert cache.get("key") is None
+        assert not cache.delete("key")
+
+    def test_ttl(self, cache: SharedCache):
+        cache.set("key", b"value", ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get("key") is None
+
+    def test_too_large(self, cache: SharedCache):
+        assert not cache.set("key", b"x" * cache.max_item_size)
+        assert cache.stats().too_large == 1
+
+    def test_evicts_least_recently_used(self, cache: SharedCache):
+        for i in range(1000):
+            cache.set(f"key-{i}", b"v")
+        stats = cache.stats()
+        assert stats.evictions == 1000 - 64
+        assert sum(cache.get(f"key-{i}") is not None for i in range(1000)) == 64
+
+    def test_clear(self, cache: SharedCache):
+        cache.set("key", b"value")
+        cache.clear()
+        assert cache.get("key") is None
+
+    def test_shared_between_processes(self, cache: SharedCache):
+        process = multiprocessing.get_context("spawn").Process(
+            target=writer, args=(cache.path,)
+        )
+        process.start()
+        process.join(10)
+        assert process.exitcode == 0
+        assert cache.get("child-7") == b"7"
+
+    def test_geometry_mismatch(self, cache: SharedCache):
+        with pytest.raises(ValueError):
+            SharedCache(path=cache.path, capacity=128)
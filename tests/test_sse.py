@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+
+from nimbus.connections import HttpConnection
+from nimbus.sse import EventChannel, EventSourceResponse, encode_event
+
+
+class RecordingConnection(HttpConnection):
+    def __init__(self, headers=None):
+        async def receive(size):
+            return b""
+
+        async def send(event):
+            self.sent.append(event)
+
+        super().__init__(
+            {"path": "/events", "method": "GET", "headers": headers or []},
+            receive,
+            send,
+        )
+        self.sent = []
+
+    @property
+    def body_chunks(self):
+        return [
+            event["body"]
+            for event in self.sent
+            if event["type"] == "http.response.body" and event["body"]
+        ]
+
+
+class TestEncodeEvent:
+    def test_valid(self):
+        assert encode_event("hello", event="greeting", id="7") == (
+            b"id: 7\nevent: greeting\ndata: hello\n\n"
+        )
+
+    def test_multiline(self):
+        assert encode_event("a\nb") == b"data: a\ndata: b\n\n"
+
+
+class TestEventChannel:
+    @pytest.mark.asyncio
+    async def test_shared_payload(self):
+        channel = EventChannel()
+        first, second = channel.subscribe(), channel.subscribe()
+        channel.publish("tick")
+        assert (await first.__anext__()) is (await second.__anext__())
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_event_id(self):
+        channel = EventChannel(replay_size=3)
+        ids = [channel.publish(f"event {index}") for index in range(5)]
+        subscription = channel.subscribe(last_event_id=ids[2])
+        assert list(subscription.queue) == [
+            encode_event("event 3", id=ids[3]),
+            encode_event("event 4", id=ids[4]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_drop_slow_reader(self):
+        channel = EventChannel(queue_size=2)
+        subscription = channel.subscribe()
+        for index in range(5):
+            channel.publish(str(index))
+        assert subscription.dropped == 3
+        assert len(subscription.queue) == 2
+
+    @pytest.mark.asyncio
+    async def test_disconnect_slow_reader(self):
+        channel = EventChannel(queue_size=2, overflow="disconnect")
+        subscription = channel.subscribe()
+        for index in range(3):
+            channel.publish(str(index))
+        assert subscription.closed
+        assert subscription not in channel.subscribers
+        with pytest.raises(StopAsyncIteration):
+            await subscription.__anext__()
+
+    @pytest.mark.asyncio
+    async def test_subscriber_on_other_loop(self):
+        channel = EventChannel()
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        async def read_all() -> list[bytes]:
+            subscription = channel.subscribe()
+            subscribed.set()
+            return [payload async for payload in subscription]
+
+        subscribed = threading.Event()
+        try:
+            received = asyncio.run_coroutine_threadsafe(read_all(), loop)
+            assert await asyncio.to_thread(subscribed.wait, 1)
+            assert next(iter(channel.subscribers)).loop is loop
+            channel.publish("one")
+            channel.publish("two")
+            channel.close()
+            payloads = await asyncio.wrap_future(received)
+            assert payloads == [
+                encode_event("one", id="1"),
+                encode_event("two", id="2"),
+            ]
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        channel.subscribe()
+        assert len(channel.subscribers) == 1
+
+
+class TestEventSourceResponse:
+    @pytest.mark.asyncio
+    async def test_channel_stream(self):
+        channel = EventChannel()
+        connection = RecordingConnection()
+        response = EventSourceResponse(
+            channel.subscribe(), connection, ping_interval=0.01
+        )
+        streaming = asyncio.ensure_future(_await(response))
+        await asyncio.sleep(0.025)
+        channel.publish("hello", id="1")
+        await asyncio.sleep(0)
+        channel.close()
+        await asyncio.wait_for(streaming, 1)
+
+        start = connection.sent[0]
+        assert start["status"] == 200
+        assert (b"content-type", b"text/event-stream") in start["headers"]
+        assert b": ping\n\n" in connection.body_chunks
+        assert connection.body_chunks[-1] == b"id: 1\ndata: hello\n\n"
+        assert not channel.subscribers
+
+    @pytest.mark.asyncio
+    async def test_iterable_source(self):
+        async def source():
+            yield "first"
+            yield b"data: raw\n\n"
+
+        connection = RecordingConnection()
+        await _await(EventSourceResponse(source(), connection, retry=1000))
+        assert connection.body_chunks == [
+            b"retry: 1000\n\n",
+            b"data: first\n\n",
+            b"data: raw\n\n",
+        ]
+
+
+async def _await(response):
+    await response
@@ -0,0 +1,84 @@
+import asyncio
+import shutil
+import socket
+import ssl
+import subprocess
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.server import NimbusServer
+from nimbus.server.tls import TLSConfig
+
+
+@pytest.fixture
+def certificate(tmp_path):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not available")
+    certfile, keyfile = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-subj", "/CN=localhost", "-days", "1",
+            "-keyout", str(keyfile), "-out", str(certfile),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    return str(certfile), str(keyfile)
+
+
+CLIENT_CONTEXT = ssl.create_default_context()
+CLIENT_CONTEXT.check_hostname = False
+CLIENT_CONTEXT.verify_mode = ssl.CERT_NONE
+
+
+def fetch(port: int, session=None):
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        with CLIENT_CONTEXT.wrap_socket(sock, session=session) as tls_sock:
+            tls_sock.sendall(b"GET / HTTP/1.1\r\n\r\n")
+            data = b""
+            while chunk := tls_sock.recv(4096):
+                data += chunk
+            return data, tls_sock.session
+
+
+class TestTLSConfig:
+    def test_reload(self, certificate, tmp_path):
+        tls = TLSConfig(*certificate, watch_interval=None)
+        context = tls.context
+        assert tls.reload()
+        assert tls.context is not context
+        assert tls.stats.reloads == 1
+
+        broken = tmp_path / "broken.pem"
+        broken.write_text("not a key")
+        tls.keyfile = str(broken)
+        context = tls.context
+        assert not tls.reload()
+        assert tls.context is context
+
+    @pytest.mark.asyncio
+    async def test_session_resumption(self, certificate):
+        app = NimbusApp()
+
+        @app.get("/")
+        async def index(conn):
+            return HttpResponse("Hello")
+
+        tls = TLSConfig(*certificate)
+        server = NimbusServer(app, port=0, tls=tls)
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+
+        response, session = await asyncio.to_thread(fetch, port)
+        assert response.endswith(b"Hello")
+        response, _ = await asyncio.to_thread(fetch, port, session)
+        assert response.endswith(b"Hello")
+        assert tls.stats.handshakes == 2
+        assert tls.stats.resumed == 1
+
+        server.stop()
+        await asyncio.wait_for(task, 1)
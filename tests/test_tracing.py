@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from nimbus.applications import NimbusApp
+from nimbus.response import HttpResponse
+from nimbus.server.server import NimbusServer
+from nimbus.tracing import (
+    NOOP_SPAN,
+    FileExporter,
+    SpanExporter,
+    Tracer,
+    current_traceparent,
+    parse_traceparent,
+    span,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+class TestParseTraceparent:
+    def test_valid(self):
+        assert parse_traceparent(TRACEPARENT) == (TRACE_ID, "00f067aa0ba902b7", True)
+
+    def test_invalid(self):
+        assert parse_traceparent("00-abc-def-01") is None
+        assert parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+        assert parse_traceparent(f"ff-{TRACE_ID}-00f067aa0ba902b7-01") is None
+
+
+class TestSampling:
+    def test_parent_flag_wins(self):
+        tracer = Tracer(sample_rate=0.0)
+        root = tracer.start_request("GET", [(b"traceparent", TRACEPARENT.encode())])
+        assert root is not None
+        assert root.trace_id == TRACE_ID
+        assert root.parent_id == "00f067aa0ba902b7"
+
+        unsampled = TRACEPARENT[:-2] + "00"
+        tracer = Tracer(sample_rate=1.0)
+        assert (
+            tracer.start_request("GET", [(b"traceparent", unsampled.encode())]) is None
+        )
+
+    def test_unsampled_is_noop(self):
+        tracer = Tracer(sample_rate=0.0)
+        assert tracer.start_request("GET", []) is None
+        assert span("anything") is NOOP_SPAN
+        assert current_traceparent() is None
+
+    def test_exporter_must_export(self):
+        class Incomplete(SpanExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()  # type: ignore[abstract]
+
+
+class TestServerSpans:
+    @pytest.mark.asyncio
+    async def test_valid(self, tmp_path):
+        app = NimbusApp()
+        seen = []
+
+        @app.get("/")
+        async def index(conn):
+            seen.append(current_traceparent())
+            return HttpResponse("Hello")
+
+        path = tmp_path / "spans.jsonl"
+        server = NimbusServer(app, port=0, tracer=Tracer(FileExporter(str(path))))
+        task = asyncio.create_task(server.start())
+        await asyncio.wait_for(server.ready.wait(), 1)
+        port = server._server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET / HTTP/1.1\r\ntraceparent: {TRACEPARENT}\r\n\r\n".encode())
+        assert (await reader.read()).endswith(b"Hello")
+        writer.close()
+        server.stop()
+        await asyncio.wait_for(task, 1)
+
+        exported = [json.loads(line) for line in path.read_text().splitlines()]
+        spans = [
+            s
+            for request in exported
+            for s in request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        ]
+        by_name = {s["name"]: s for s in spans}
+        root = by_name["HTTP GET"]
+        assert root["traceId"] == TRACE_ID
+        assert root["parentSpanId"] == "00f067aa0ba902b7"
+        assert {"http.parse", "app.handle_http", "route.match"} <= set(by_name)
+        assert "http.response.start" in by_name
+        assert all(s["traceId"] == TRACE_ID for s in spans)
+        assert by_name["http.parse"]["parentSpanId"] == root["spanId"]
+        assert seen[0].split("-")[1] == TRACE_ID
+        for s in spans:
+            assert int(s["endTimeUnixNano"]) >= int(s["startTimeUnixNano"])
+
+
+class SlowExporter(SpanExporter):
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.exported: list[str] = []
+
+    async def export(self, request) -> None:
+        await asyncio.sleep(self.delay)
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.exported.extend(s["name"] for s in spans)
+
+
+def end_spans(tracer: Tracer, count: int) -> None:
+    for i in range(count):
+        root = tracer.start_request(f"span {i}", [])
+        assert root is not None
+        root.end()
+
+
+class TestShutdown:
+    @pytest.mark.asyncio
+    async def test_waits_for_running_export(self):
+        exporter = SlowExporter(0.05)
+        tracer = Tracer(exporter, max_batch=2)
+        end_spans(tracer, 5)
+        await asyncio.sleep(0.01)  # the flusher is now inside export()
+        await tracer.shutdown()
+        assert sorted(exporter.exported) == [f"span {i}" for i in range(5)]
+        assert tracer.dropped == 0
+
+        end_spans(tracer, 1)
+        assert tracer.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_cancels_idle_flusher(self):
+        exporter = SlowExporter(0)
+        tracer = Tracer(exporter, flush_interval=60)
+        end_spans(tracer, 3)
+        await asyncio.wait_for(tracer.shutdown(), 1)
+        assert len(exporter.exported) == 3
+
+    @pytest.mark.asyncio
+    async def test_flusher_on_other_loop(self):
+        exporter = SlowExporter(0.05)
+        tracer = Tracer(exporter, max_batch=1)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        async def on_thread():
+            end_spans(tracer, 3)
+            await asyncio.sleep(0.01)
+
+        try:
+            asyncio.run_coroutine_threadsafe(on_thread(), loop).result(1)
+            await tracer.shutdown()
+            assert sorted(exporter.exported) == ["span 0", "span 1", "span 2"]
+            assert tracer.dropped == 0
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()